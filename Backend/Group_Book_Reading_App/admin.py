@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import CustomUser, Book, Group, Chapter, Discussion
+from .models import CustomUser, Book, Group, Chapter, Discussion, ChapterProgress, DeadlineNotification, IdempotencyRecord, Job
 
 # Defines a custom admin panel for the CustomUser model
 class CustomUserAdmin(admin.ModelAdmin):
@@ -10,4 +10,8 @@ admin.site.register(CustomUser, CustomUserAdmin)
 admin.site.register(Book)
 admin.site.register(Group)
 admin.site.register(Chapter)
-admin.site.register(Discussion)
\ No newline at end of file
+admin.site.register(Discussion)
+admin.site.register(ChapterProgress)
+admin.site.register(DeadlineNotification)
+admin.site.register(IdempotencyRecord)
+admin.site.register(Job)
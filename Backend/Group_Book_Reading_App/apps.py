@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class GroupBookReadingAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Group_Book_Reading_App'
+
+    def ready(self):
+        from .checks import check_shared_caches
+        check_shared_caches()  # Fail fast instead of serving stale cached state from other processes
+        from . import signals  # noqa: F401  Connect the model signal handlers
+        from . import tasks  # noqa: F401  Register the background tasks of the job queue
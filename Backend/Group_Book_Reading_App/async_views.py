@@ -0,0 +1,123 @@
+"""
+Async (ASGI-native) versions of the read-heavy member endpoints.
+
+DRF's ``@api_view`` views are synchronous, so under ASGI every request would
+hold a worker thread for its whole duration. These views run on the event loop
+and use Django's async ORM, so one ASGI worker can serve many slow or idle
+clients. They return the same payloads and status codes as the sync views in
+``views.py``, and replace them on the same URLs when the server runs with the
+ASGI profile (``SERVER_PROFILE=asgi``, see ``urls.py``).
+"""
+
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed, ParseError
+from rest_framework_simplejwt.exceptions import InvalidToken
+from .authentication import ClaimsJWTAuthentication
+from .models import Book, Group, Chapter
+from .serializers import BookSerializer, GroupSerializer, ChapterSerializer
+from .catalog_cache import catalog_cache
+from .renderers import FastJSONRenderer
+from .discussions import DiscussionTree, parse_last_fetched_at
+from .membership import ais_member
+from .pagination import alist_response
+from .progress import abuild_progress
+
+
+# Render data the way the API's JSON renderer renders a Response
+def json_response(data, status_code=status.HTTP_200_OK):
+    return HttpResponse(FastJSONRenderer().render(data), content_type='application/json', status=status_code)
+
+
+def _unauthorized(detail):
+    response = json_response(detail if isinstance(detail, dict) else {"detail": detail}, status.HTTP_401_UNAUTHORIZED)
+    response['WWW-Authenticate'] = 'Bearer realm="api"'
+    return response
+
+
+# Async counterpart of @api_view(['GET']) with IsAuthenticated and IsMember
+def member_view(view):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            return json_response({"detail": f'Method "{request.method}" not allowed.'}, status.HTTP_405_METHOD_NOT_ALLOWED)
+        try:
+            authenticated = await sync_to_async(ClaimsJWTAuthentication().authenticate)(request)
+        except (InvalidToken, AuthenticationFailed) as error:
+            return _unauthorized(error.detail)
+        if authenticated is None:
+            return _unauthorized("Authentication credentials were not provided.")
+        request.user = authenticated[0]
+        if request.user.role != 'member':
+            return json_response({"detail": "You do not have permission to perform this action."}, status.HTTP_403_FORBIDDEN)
+        try:
+            return await view(request, *args, **kwargs)
+        except ParseError as error:
+            return json_response({"detail": error.detail}, status.HTTP_400_BAD_REQUEST)
+    return wrapper
+
+
+# Fetch a list of all books (only accessible to members)
+@member_view
+@catalog_cache('books')
+async def get_books(request):
+    return json_response(await alist_response(request, Book.objects.all(), BookSerializer))
+
+
+# Fetch details of a single group by ID (only accessible to members)
+@member_view
+async def get_group(request, group_id):
+    try:
+        group = await GroupSerializer.optimize_queryset(Group.objects.all()).aget(id=group_id)
+    except Group.DoesNotExist:
+        return json_response({'error': 'Group not found'}, status.HTTP_404_NOT_FOUND)
+    return json_response(GroupSerializer(group).data)
+
+
+# Fetch chapters for a group (only accessible to members)
+@member_view
+async def group_chapters(request, group_id):
+    try:
+        group = await Group.objects.aget(id=group_id)
+    except Group.DoesNotExist:
+        return json_response({"detail": "Group not found"}, status.HTTP_404_NOT_FOUND)
+    if not await ais_member(request.user, group.id):
+        return json_response({"detail": "You are not a member of this group."}, status.HTTP_403_FORBIDDEN)
+    chapters = Chapter.objects.filter(group=group)
+    return json_response(await alist_response(request, chapters, ChapterSerializer))
+
+
+# Fetch discussions by chapter for a group (threaded, with optional polling for new posts)
+@member_view
+async def fetch_discussions_by_chapter(request, group_id):
+    try:
+        group = await Group.objects.aget(id=group_id)
+    except Group.DoesNotExist:
+        return json_response({"error": "Group with the provided ID does not exist."}, status.HTTP_404_NOT_FOUND)
+    chapter_id = request.GET.get('chapter_id')
+    last_fetched_at = request.GET.get('last_fetched_at')
+    if not chapter_id:
+        return json_response({"error": "Chapter ID is required."}, status.HTTP_400_BAD_REQUEST)
+    try:
+        chapter = await group.chapters.aget(id=chapter_id)
+    except (Chapter.DoesNotExist, ValueError):
+        return json_response({"error": "Chapter with the provided ID does not exist."}, status.HTTP_404_NOT_FOUND)
+    last_fetched_time = None
+    if last_fetched_at:
+        try:
+            last_fetched_time = parse_last_fetched_at(last_fetched_at)
+        except (ValueError, TypeError):
+            return json_response({"error": "Invalid timestamp format for last_fetched_at. Use ISO 8601 format like '2025-01-27T05:37:00Z'."}, status.HTTP_400_BAD_REQUEST)
+    threads = (await DiscussionTree.afor_chapter(chapter.id, after=last_fetched_time)).threads()
+    return json_response(threads)
+
+
+# Fetch the user's reading progress across all groups they belong to (only accessible to members)
+@member_view
+async def view_progress(request):
+    groups = [group async for group in Group.objects.filter(members=request.user)]
+    if not groups:
+        return json_response({"error": "User is not a member of any group."}, status.HTTP_400_BAD_REQUEST)
+    return json_response(await abuild_progress(groups))
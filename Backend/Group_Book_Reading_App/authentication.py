@@ -0,0 +1,149 @@
+"""
+Stateless JWT authentication.
+
+Tokens issued at login carry signed ``role`` and ``username`` claims (next to
+simplejwt's ``user_id``) plus ``auth_hash``, a fingerprint of the user's role,
+username and password hash. ``ClaimsJWTAuthentication`` builds the request user from
+those claims instead of loading the ``CustomUser`` row: a model instance whose
+other fields are deferred, so it still works in ORM filters and relations and
+loads the rest of the row only if a view reads it.
+
+Revocation is checked against the user's current auth state (active flag and
+fingerprint), kept in a bounded in-process LRU cache for ``TTL`` seconds (the
+JWT_REVOCATION_CACHE setting, read when entries are stored). A token is
+rejected once the user is deactivated or deleted, or their role, username or
+password changes. Saves in this process evict the entry at once; other
+processes pick the change up when their entry expires. Tokens without the
+claims (issued before this scheme) fall back to the database lookup.
+
+Authentication is also where the user of a request becomes known, so it routes
+the reads of users who wrote recently to the primary (see routers.py).
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.db import router
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+from .models import CustomUser
+from .routers import apply_user_pin, primary_reads
+
+DEFAULT_REVOCATION_CACHE = {
+    'MAX_SIZE': 10000,  # Users whose auth state is kept in memory
+    'TTL': 60,  # Seconds before a user's auth state is read again
+}
+CLAIM_FIELDS = ('role', 'username')
+
+
+# Fingerprint of the parts of a user that invalidate their tokens when they change
+def auth_fingerprint(role, username, password):
+    return hashlib.sha256(f"{role}:{username}:{password}".encode()).hexdigest()[:16]
+
+
+# Login serializer (SIMPLE_JWT['TOKEN_OBTAIN_SERIALIZER']) that embeds the claims in the token pair
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        for field in CLAIM_FIELDS:
+            token[field] = getattr(user, field)
+        token['auth_hash'] = auth_fingerprint(user.role, user.username, user.password)
+        return token
+
+
+def _config():
+    return {**DEFAULT_REVOCATION_CACHE, **getattr(settings, 'JWT_REVOCATION_CACHE', {})}
+
+
+# Bounded LRU of {user_id: (is_active, fingerprint)} with a time-to-live per entry.
+# The size and time-to-live come from the JWT_REVOCATION_CACHE setting unless given.
+class AuthStateCache:
+    def __init__(self, max_size=None, ttl=None):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def max_size(self):
+        return self._max_size if self._max_size is not None else _config()['MAX_SIZE']
+
+    @property
+    def ttl(self):
+        return self._ttl if self._ttl is not None else _config()['TTL']
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, state = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return state
+
+    def set(self, user_id, state):
+        ttl, max_size = self.ttl, self.max_size
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + ttl, state)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def evict(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+auth_states = AuthStateCache()
+
+
+# Current (is_active, fingerprint) of a user; the fingerprint is None if the user no longer exists
+def auth_state(user_id):
+    state = auth_states.get(user_id)
+    if state is None:
+        with primary_reads():
+            row = CustomUser.objects.filter(id=user_id).values_list('is_active', 'role', 'username', 'password').first()
+        state = (row[0], auth_fingerprint(*row[1:])) if row else (False, None)
+        auth_states.set(user_id, state)
+    return state
+
+
+# User built from token claims; the fields that are not claimed are deferred and load on first access
+def token_user(validated_token):
+    claimed = {
+        'id': validated_token[api_settings.USER_ID_CLAIM],
+        'username': validated_token['username'],
+        'role': validated_token['role'],
+        'is_active': True,  # Checked against the revocation cache
+    }
+    # from_db expects the loaded values in field order
+    names = [field.attname for field in CustomUser._meta.concrete_fields if field.attname in claimed]
+    return CustomUser.from_db(router.db_for_read(CustomUser), names, [claimed[name] for name in names])
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM in validated_token:
+            apply_user_pin(validated_token[api_settings.USER_ID_CLAIM])  # Before the user row is bound to a database
+        if not all(claim in validated_token for claim in (api_settings.USER_ID_CLAIM, 'auth_hash', *CLAIM_FIELDS)):
+            return super().get_user(validated_token)
+        is_active, fingerprint = auth_state(validated_token[api_settings.USER_ID_CLAIM])
+        if fingerprint is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        if not is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        if validated_token['auth_hash'] != fingerprint:
+            raise AuthenticationFailed("Token has been revoked", code="token_revoked")
+        return token_user(validated_token)
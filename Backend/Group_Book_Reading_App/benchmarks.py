@@ -0,0 +1,238 @@
+"""
+Endpoint benchmark suite.
+
+Drives the member and admin endpoints through the Django test client against
+the configured database (fill it with ``generate_synthetic_data`` first) and
+reports latency percentiles and SQL query counts per scenario. Each scenario
+rotates through a seeded sample of members, groups and chapters so runs are
+comparable, and runs in a transaction that is rolled back, so write scenarios
+leave the dataset as they found it. Results are saved as JSON baselines and can be compared with an
+earlier baseline to spot regressions across commits.
+"""
+
+import json
+import random
+import time
+from contextlib import ExitStack, contextmanager
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.test import Client
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from .models import CustomUser, Book, Group, Chapter, Discussion
+from .authentication import ClaimsTokenObtainPairSerializer
+from .profiling import RequestProfile
+from .serializers import BookSerializer, GroupSerializer, ChapterSerializer
+from .renderers import FastJSONRenderer
+
+SAMPLE_MEMBERS = 20
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+# A named request factory: `request(client, context)` issues one request for a sampled context
+class Scenario:
+    def __init__(self, name, request, admin=False):
+        self.name = name
+        self.request = request
+        self.admin = admin
+
+
+def _mark_chapter(client, context):
+    # The endpoint toggles the read mark; the scenario's transaction is rolled back afterwards
+    return client.patch(f"/api/groups/{context['group_id']}/chapter/{context['chapter_id']}/")
+
+
+SCENARIOS = (
+    Scenario('view_progress', lambda client, context: client.get('/api/progress/')),
+    Scenario('fetch_discussions_by_chapter', lambda client, context: client.get(
+        f"/api/groups/{context['group_id']}/discussions_by_chapter/", {'chapter_id': context['chapter_id']},
+    )),
+    Scenario('get_groups', lambda client, context: client.get('/api/groups/')),
+    Scenario('group_dashboard', lambda client, context: client.get(f"/api/groups/{context['group_id']}/dashboard/")),
+    Scenario('home_summary', lambda client, context: client.get('/api/home/')),
+    Scenario('chapter_deadline_notification', lambda client, context: client.get('/api/chapter-deadline-notifications/')),
+    Scenario('mark_chapter_as_read', _mark_chapter),
+    Scenario('get_books_admin', lambda client, context: client.get('/api/books-admin/', {'limit': 100}), admin=True),
+    Scenario('get_groups_admin', lambda client, context: client.get('/api/groups-admin/', {'limit': 100}), admin=True),
+)
+
+
+def _client(user):
+    return Client(HTTP_AUTHORIZATION=f'Bearer {ClaimsTokenObtainPairSerializer.get_token(user).access_token}')
+
+
+# Seeded sample of (member, group, chapter) contexts to rotate through
+def sample_contexts(rng, size=SAMPLE_MEMBERS):
+    member_ids = list(
+        Group.members.through.objects.filter(customuser__role='member')
+        .values_list('customuser_id', flat=True).distinct().order_by('customuser_id')[:size * 50]
+    )
+    if not member_ids:
+        return []
+    contexts = []
+    users = CustomUser.objects.in_bulk(rng.sample(member_ids, min(size, len(member_ids))))
+    for user in users.values():
+        chapter = (
+            Chapter.objects.filter(group__members=user)
+            .order_by('id').values('id', 'group_id').first()
+        )
+        if chapter:
+            contexts.append({'user': user, 'client': _client(user), 'group_id': chapter['group_id'], 'chapter_id': chapter['id']})
+    return contexts
+
+
+def _quantiles(values):
+    ordered = sorted(values)
+    summary = {f"p{int(q * 100)}": round(ordered[min(int(q * len(ordered)), len(ordered) - 1)], 3) for q in QUANTILES}
+    summary["max"] = round(ordered[-1], 3)
+    summary["mean"] = round(sum(ordered) / len(ordered), 3)
+    return summary
+
+
+# Issue one request and return (status_code, latency in ms, SQL queries)
+def _measure(scenario, client, context):
+    profile = RequestProfile()
+    with ExitStack() as stack:
+        for alias_connection in connections.all():
+            stack.enter_context(alias_connection.execute_wrapper(profile))
+        start = time.perf_counter()
+        response = scenario.request(client, context)
+        elapsed = (time.perf_counter() - start) * 1000
+    return response.status_code, elapsed, profile.sql_queries
+
+
+# Run the enclosed requests in a transaction that is always rolled back (the views' own transactions
+# become savepoints), so nothing a scenario writes outlives it
+@contextmanager
+def _rolled_back():
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def dataset_size():
+    return {
+        'users': CustomUser.objects.count(),
+        'books': Book.objects.count(),
+        'groups': Group.objects.count(),
+        'chapters': Chapter.objects.count(),
+        'discussions': Discussion.objects.count(),
+    }
+
+
+# Run every selected scenario `iterations` times (after `warmup` unmeasured requests) and return the report
+def run_benchmarks(iterations=50, warmup=5, scenarios=None, seed=0, label=''):
+    rng = random.Random(seed)
+    contexts = sample_contexts(rng)
+    if not contexts:
+        raise ValueError("No member with chapters found; generate a dataset first.")
+    admin = CustomUser.objects.filter(role='admin').order_by('id').first()
+    admin_client = _client(admin) if admin else None
+
+    results = {}
+    for scenario in SCENARIOS:
+        if scenarios and scenario.name not in scenarios:
+            continue
+        if scenario.admin and admin_client is None:
+            continue
+        latencies, queries, errors = [], [], 0
+        with _rolled_back():
+            for index in range(warmup + iterations):
+                context = contexts[index % len(contexts)]
+                client = admin_client if scenario.admin else context['client']
+                status_code, elapsed, sql_queries = _measure(scenario, client, context)
+                if index < warmup:
+                    continue
+                if status_code >= 400:
+                    errors += 1
+                latencies.append(elapsed)
+                queries.append(sql_queries)
+        results[scenario.name] = {
+            'requests': iterations,
+            'errors': errors,
+            'latency_ms': _quantiles(latencies),
+            'queries': _quantiles(queries),
+        }
+    return {
+        'label': label,
+        'created_at': timezone.now().isoformat(),
+        'database': {
+            'profile': getattr(settings, 'DB_PROFILE', connection.vendor),
+            'vendor': connection.vendor,
+            'name': str(connection.settings_dict['NAME']),
+        },
+        'dataset': dataset_size(),
+        'iterations': iterations,
+        'results': results,
+    }
+
+
+# Serializers compared by benchmark_serializers, with the list queryset they render
+SERIALIZER_CASES = (
+    ('books', BookSerializer, Book.objects.order_by('id')),
+    ('groups', GroupSerializer, Group.objects.order_by('id')),
+    ('chapters', ChapterSerializer, Chapter.objects.order_by('id')),
+)
+
+
+# Render `rows` rows of each list with the DRF serializer and renderer ('drf'), with the row serializer and
+# DRF's renderer ('rows') and with the row serializer and FastJSONRenderer ('fast'), queries included.
+# Returns the best time of `iterations` runs per path; fails if the rendered bytes differ.
+def benchmark_serializers(rows=10000, iterations=5):
+    render = JSONRenderer().render
+    fast_render = FastJSONRenderer().render
+    results = {}
+    for name, serializer_class, queryset in SERIALIZER_CASES:
+        queryset = queryset.filter(id__in=queryset.values('id')[:rows])
+        timings = {}
+        outputs = {}
+        paths = {
+            'drf': lambda: render(serializer_class(queryset, many=True).data),
+            'rows': lambda: render(serializer_class.row_serializer.serialize(queryset)),
+            'fast': lambda: fast_render(serializer_class.row_serializer.serialize(queryset)),
+        }
+        for path, serialize in paths.items():
+            best = None
+            for _ in range(iterations):
+                start = time.perf_counter()
+                outputs[path] = serialize()
+                elapsed = (time.perf_counter() - start) * 1000
+                best = elapsed if best is None else min(best, elapsed)
+            timings[path] = round(best, 3)
+        for path in ('rows', 'fast'):
+            if outputs[path] != outputs['drf']:
+                raise AssertionError(f"The '{path}' path renders different bytes than {serializer_class.__name__} for {name}.")
+        count = queryset.count()
+        results[name] = {'rows': count}
+        for path, elapsed in timings.items():
+            results[name][f'{path}_ms'] = elapsed
+            results[name][f'{path}_rows_per_second'] = round(count / elapsed * 1000) if elapsed else None
+        for path in ('rows', 'fast'):
+            results[name][f'{path}_speedup'] = round(timings['drf'] / timings[path], 2) if timings[path] else None
+    return results
+
+
+def save_report(report, path):
+    with open(path, 'w') as output:
+        json.dump(report, output, indent=2)
+
+
+def load_report(path):
+    with open(path) as source:
+        return json.load(source)
+
+
+# Per scenario change of p50/p95 latency (in percent) and of the median query count against a baseline
+def compare_reports(baseline, report):
+    comparison = {}
+    for name, result in report['results'].items():
+        before = baseline['results'].get(name)
+        if not before:
+            continue
+        comparison[name] = {
+            quantile: round((result['latency_ms'][quantile] - before['latency_ms'][quantile]) / before['latency_ms'][quantile] * 100, 1)
+            if before['latency_ms'][quantile] else None
+            for quantile in ('p50', 'p95')
+        }
+        comparison[name]['queries'] = result['queries']['p50'] - before['queries']['p50']
+    return comparison
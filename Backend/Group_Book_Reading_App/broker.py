@@ -0,0 +1,123 @@
+"""
+Fan-out broker for real-time discussion push.
+
+Writers publish each new discussion to a channel per (group, chapter); every
+open Server-Sent Events stream on that channel receives it from an in-memory
+queue, so open tabs no longer re-query the database to learn about new posts.
+
+The broker is pluggable through the ``DISCUSSION_BROKER`` setting. The default
+``InMemoryBroker`` only fans out within one process; multi-worker deployments
+should point the setting at a ``BaseBroker`` subclass that relays messages
+through a shared service (Redis pub/sub, PostgreSQL LISTEN/NOTIFY, ...) and
+delivers them to the local subscribers of each worker.
+"""
+
+import asyncio
+import threading
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+DEFAULT_BROKER = {
+    'BACKEND': 'Group_Book_Reading_App.broker.InMemoryBroker',
+    'OPTIONS': {},
+}
+
+
+# Name of the push channel for a chapter of a group
+def discussion_channel(group_id, chapter_id):
+    return f"discussions:{group_id}:{chapter_id}"
+
+
+# A single subscriber's bounded message queue, bound to the event loop that created it
+class Subscription:
+    def __init__(self, broker, channel, max_queue_size):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=max_queue_size)
+
+    # Hand a message over to the subscriber's event loop (safe to call from any thread)
+    def deliver(self, message):
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # The subscriber's event loop is gone, drop the subscription
+            self.close()
+
+    def _put(self, message):
+        if self.queue.full():
+            self.queue.get_nowait()  # Slow consumer: drop the oldest message rather than block publishers
+        self.queue.put_nowait(message)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+# Interface every broker backend implements
+class BaseBroker:
+    def __init__(self, max_queue_size=100):
+        self.max_queue_size = max_queue_size
+
+    # Register a subscriber on a channel; must be called from a running event loop
+    def subscribe(self, channel):
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+    # Send a JSON-serializable message to every subscriber of the channel
+    def publish(self, channel, message):
+        raise NotImplementedError
+
+
+# Process-local broker: fans out to the subscribers registered in this process only
+class InMemoryBroker(BaseBroker):
+    def __init__(self, max_queue_size=100):
+        super().__init__(max_queue_size)
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel, self.max_queue_size)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is None:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.channel]
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._subscribers.get(channel, ()))
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(message)
+        return len(subscribers)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+# Return the process-wide broker configured by the DISCUSSION_BROKER setting
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                config = getattr(settings, 'DISCUSSION_BROKER', DEFAULT_BROKER)
+                backend = import_string(config.get('BACKEND', DEFAULT_BROKER['BACKEND']))
+                _broker = backend(**config.get('OPTIONS', {}))
+    return _broker
@@ -0,0 +1,159 @@
+"""
+Set-based bulk writes for group membership and chapter read marks.
+
+Usernames and chapter ids are resolved with one ``__in`` query per request and
+the M2M through tables are written with ``bulk_create`` / bulk ``delete``, so a
+request costs the same handful of queries whether it touches 5 rows or 5,000.
+Every operation returns one result per requested item.
+"""
+
+from django.db import transaction
+from .models import CustomUser, Group, Chapter
+from .catalog_cache import invalidate_catalog
+from .membership import invalidate_memberships
+from .notifications import sync_chapter_notifications
+from .read_counters import refresh_chapter_counters, record_membership_change
+
+GroupMembership = Group.members.through
+ChapterReadMark = Chapter.is_read.through
+
+MAX_BULK_ITEMS = 10000
+MEMBER_ACTIONS = ('add', 'remove')
+
+
+# Map each existing username to its user id with a single query
+def resolve_usernames(usernames):
+    return dict(CustomUser.objects.filter(username__in=set(usernames)).values_list('username', 'id'))
+
+
+# Add a user to a group. Concurrent adds of the same membership insert a single row (ON CONFLICT DO
+# NOTHING) instead of failing or taking a lock on the group.
+def add_member(group, user_id):
+    with transaction.atomic():
+        GroupMembership.objects.bulk_create(
+            [GroupMembership(group_id=group.id, customuser_id=user_id)],
+            ignore_conflicts=True,
+        )
+        record_membership_change(group)
+        # bulk_create bypasses the m2m_changed signal
+        invalidate_catalog()
+        invalidate_memberships([user_id])
+
+
+# Membership rows to delete and to insert so that exactly `user_ids` are members of the group
+def member_changes(group, user_ids):
+    current = set(GroupMembership.objects.filter(group=group).values_list('customuser_id', flat=True))
+    target = set(user_ids)
+    return sorted(current - target), sorted(target - current)
+
+
+# Apply member changes in transactions of `chunk_size` rows, calling `progress(removed, added)` after each
+def apply_member_changes(group, to_remove, to_add, chunk_size, progress=None):
+    removed = added = 0
+    for start in range(0, len(to_remove), chunk_size):
+        chunk = to_remove[start:start + chunk_size]
+        with transaction.atomic():
+            GroupMembership.objects.filter(group=group, customuser_id__in=chunk).delete()
+            invalidate_memberships(chunk)
+        removed += len(chunk)
+        if progress:
+            progress(removed, added)
+    for start in range(0, len(to_add), chunk_size):
+        chunk = to_add[start:start + chunk_size]
+        with transaction.atomic():
+            GroupMembership.objects.bulk_create(
+                [GroupMembership(group_id=group.id, customuser_id=user_id) for user_id in chunk],
+                ignore_conflicts=True,
+            )
+            invalidate_memberships(chunk)
+        added += len(chunk)
+        if progress:
+            progress(removed, added)
+    with transaction.atomic():
+        record_membership_change(group)
+        # Queryset deletes and bulk_create bypass the m2m_changed signal
+        invalidate_catalog()
+
+
+# Add or remove many users of a group by username
+def bulk_update_members(group, usernames, action):
+    user_ids = resolve_usernames(usernames)
+    with transaction.atomic():
+        current = set(
+            GroupMembership.objects
+            .filter(group=group, customuser_id__in=user_ids.values())
+            .values_list('customuser_id', flat=True)
+        )
+        results = []
+        changed = set()
+        for username in usernames:
+            user_id = user_ids.get(username)
+            if user_id is None:
+                results.append({"username": username, "status": "not_found"})
+            elif action == 'add':
+                if user_id in current or user_id in changed:
+                    results.append({"username": username, "status": "already_member"})
+                else:
+                    changed.add(user_id)
+                    results.append({"username": username, "status": "added"})
+            else:
+                if user_id in current and user_id not in changed:
+                    changed.add(user_id)
+                    results.append({"username": username, "status": "removed"})
+                else:
+                    results.append({"username": username, "status": "not_member"})
+        if changed:
+            if action == 'add':
+                GroupMembership.objects.bulk_create(
+                    [GroupMembership(group_id=group.id, customuser_id=user_id) for user_id in changed],
+                    ignore_conflicts=True,
+                )
+            else:
+                GroupMembership.objects.filter(group=group, customuser_id__in=changed).delete()
+            record_membership_change(group)
+            # bulk_create and queryset deletes bypass the m2m_changed signal
+            invalidate_catalog()
+            invalidate_memberships(changed)
+    return results
+
+
+# Mark many chapters as read and/or unread for a member of their groups
+def bulk_mark_chapters(user, read_ids, unread_ids):
+    requested = set(read_ids) | set(unread_ids)
+    # Only chapters of groups the user belongs to can be marked
+    allowed = set(
+        Chapter.objects
+        .filter(id__in=requested, group__members=user)
+        .values_list('id', flat=True)
+    )
+    with transaction.atomic():
+        already_read = set(
+            ChapterReadMark.objects
+            .filter(customuser=user, chapter_id__in=allowed)
+            .values_list('chapter_id', flat=True)
+        )
+        to_read = [chapter_id for chapter_id in dict.fromkeys(read_ids) if chapter_id in allowed and chapter_id not in already_read]
+        to_unread = [chapter_id for chapter_id in dict.fromkeys(unread_ids) if chapter_id in allowed and chapter_id in already_read]
+        if to_read:
+            ChapterReadMark.objects.bulk_create(
+                [ChapterReadMark(chapter_id=chapter_id, customuser_id=user.id) for chapter_id in to_read],
+                ignore_conflicts=True,
+            )
+        if to_unread:
+            ChapterReadMark.objects.filter(customuser=user, chapter_id__in=to_unread).delete()
+        if to_read or to_unread:
+            refresh_chapter_counters(to_read + to_unread)
+            sync_chapter_notifications(user, read_ids=to_read, unread_ids=to_unread)
+
+    results = []
+    for chapter_id in read_ids:
+        if chapter_id not in allowed:
+            results.append({"chapter_id": chapter_id, "status": "not_found"})
+        else:
+            results.append({"chapter_id": chapter_id, "status": "already_read" if chapter_id in already_read else "read"})
+    for chapter_id in unread_ids:
+        if chapter_id not in allowed:
+            results.append({"chapter_id": chapter_id, "status": "not_found"})
+        else:
+            results.append({"chapter_id": chapter_id, "status": "unread" if chapter_id in already_read else "already_unread"})
+    return results
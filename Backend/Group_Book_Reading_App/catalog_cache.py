@@ -0,0 +1,165 @@
+"""
+Response cache for the book catalog read endpoints.
+
+Cached payloads are stored under keys that embed a catalog version number.
+Any write to books, groups or group membership bumps the version (from the
+write views and from model signals, once the transaction commits), so stale
+entries are never read again and simply expire. Responses carry ETag and
+Last-Modified headers derived from the version and conditional GETs are
+answered with 304 Not Modified.
+
+The cache alias and timeout come from the CATALOG_CACHE setting. The version
+is bumped by the process that made the write and must be seen by every other
+one, so with several processes the alias needs a shared backend (Redis,
+Memcached, ...); startup fails otherwise (see checks.py). Misses are built from the primary database: an
+entry read from a lagging replica would be cached under the new version.
+"""
+
+import hashlib
+import math
+import time
+from functools import wraps
+from inspect import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+from .renderers import encode_fragment
+from .routers import primary_reads
+
+DEFAULT_CATALOG_CACHE = {
+    'ALIAS': 'default',
+    'TIMEOUT': 300,
+}
+VERSION_KEY = 'catalog:version'
+
+
+def _config():
+    return {**DEFAULT_CATALOG_CACHE, **getattr(settings, 'CATALOG_CACHE', {})}
+
+
+def _cache():
+    return caches[_config()['ALIAS']]
+
+
+# Current catalog version: the write time in milliseconds of the last catalog change
+def catalog_version():
+    cache = _cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+async def acatalog_version():
+    cache = _cache()
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+
+# Bump the catalog version so every cached catalog response is bypassed. The version moves forward
+# to the current time with an atomic increment, so concurrent bumps from several processes each
+# move it and none is lost.
+def bump_catalog_version():
+    cache = _cache()
+    now = int(time.time() * 1000)
+    if cache.add(VERSION_KEY, now, timeout=None):
+        return
+    try:
+        cache.incr(VERSION_KEY, max(1, now - (cache.get(VERSION_KEY) or 0)))
+    except ValueError:
+        # Evicted since the add, a fresh version is just as new
+        cache.add(VERSION_KEY, now, timeout=None)
+
+
+# Invalidate the catalog cache once the current transaction commits (immediately outside a transaction)
+def invalidate_catalog():
+    transaction.on_commit(bump_catalog_version)
+
+
+# Data returned by `build`, encoded once and cached at the current catalog version as a Fragment
+# (for views that combine catalog data with other data)
+def cached_catalog_data(name, build):
+    key = f"catalog:{name}:{catalog_version()}"
+    cache = _cache()
+    fragment = cache.get(key)
+    if fragment is None:
+        with primary_reads():
+            fragment = encode_fragment(build())
+        cache.set(key, fragment, timeout=_config()['TIMEOUT'])
+    return fragment
+
+
+def _not_modified(request, etag, last_modified):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        # ETag takes precedence over If-Modified-Since
+        return if_none_match.strip() == '*' or etag in [tag.strip() for tag in if_none_match.split(',')]
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return if_modified_since is not None and last_modified <= if_modified_since
+
+
+# Cache key, ETag and Last-Modified (in seconds) of a catalog request at the given version
+def _validators(name, version, request):
+    key = f"catalog:{name}:{version}:{request.get_full_path()}"
+    etag = f'"{hashlib.sha1(key.encode()).hexdigest()}"'
+    return key, etag, math.ceil(version / 1000)
+
+
+def _with_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, no-cache'  # Clients must revalidate, which is cheap
+    return response
+
+
+# Cache the successful responses of a catalog GET view and answer conditional requests.
+# DRF views cache the response data pre-encoded as a Fragment; async views (which return rendered JSON)
+# cache the body bytes.
+def catalog_cache(name):
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                key, etag, last_modified = _validators(name, await acatalog_version(), request)
+                if _not_modified(request, etag, last_modified):
+                    return _with_validators(HttpResponse(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified)
+                cache = _cache()
+                content = await cache.aget(f"{key}:rendered")
+                if content is not None:
+                    response = HttpResponse(content, content_type='application/json')
+                else:
+                    with primary_reads():
+                        response = await view(request, *args, **kwargs)
+                    if response.status_code != status.HTTP_200_OK:
+                        return response
+                    await cache.aset(f"{key}:rendered", response.content, timeout=_config()['TIMEOUT'])
+                return _with_validators(response, etag, last_modified)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key, etag, last_modified = _validators(name, catalog_version(), request)
+            if _not_modified(request, etag, last_modified):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                cache = _cache()
+                data = cache.get(key)
+                if data is not None:
+                    response = Response(data)
+                else:
+                    with primary_reads():
+                        response = view(request, *args, **kwargs)
+                    if response.status_code != status.HTTP_200_OK:
+                        return response
+                    cache.set(key, encode_fragment(response.data), timeout=_config()['TIMEOUT'])
+            return _with_validators(response, etag, last_modified)
+        return wrapper
+    return decorator
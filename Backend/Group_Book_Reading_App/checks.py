@@ -0,0 +1,66 @@
+"""
+Startup check for the caches that hold state shared between processes.
+
+Some cache entries are written by one process and must be seen by all of the
+others: the catalog version that a write bumps to invalidate every cached
+catalog response, and the per-user membership ids that a membership change
+drops. A process-local backend (LocMemCache) gives each process its own copy,
+so the other processes would keep serving stale responses, and keep
+authorizing users removed from a group, until their entries expire. With read
+replicas, the pins that keep a user's reads on the primary after a write must
+be seen by the process serving the user's next request as well.
+
+``shared_cache_problems`` lists the cache aliases that hold such state on a
+process-local backend while the settings run several processes
+(``WEB_CONCURRENCY``, or job queue workers next to the server) or configure
+read replicas, and ``check_shared_caches`` (called from the app's
+``ready``) refuses to start with any of them.
+"""
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+PROCESS_LOCAL_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+def _alias(setting, key='ALIAS'):
+    return getattr(settings, setting, {}).get(key, 'default')
+
+
+# Whether several processes serve this configuration; run_jobs workers invalidate the caches the server reads
+def _multi_process():
+    return getattr(settings, 'WEB_CONCURRENCY', 1) > 1 or getattr(settings, 'JOB_QUEUE', {}).get('ENABLED', False)
+
+
+# {cache alias: [what it holds]} for the state that every process must see under the current settings
+def shared_state():
+    state = {}
+    if _multi_process():
+        state.setdefault(_alias('CATALOG_CACHE'), []).append("the catalog version (CATALOG_CACHE)")
+        state.setdefault(_alias('MEMBERSHIP_CACHE'), []).append("the membership ids (MEMBERSHIP_CACHE)")
+    # Replicas come with several servers; a pin kept in one process would not hold the user's next request on the primary
+    if getattr(settings, 'REPLICA_ROUTING', {}).get('REPLICAS'):
+        state.setdefault(_alias('REPLICA_ROUTING', 'CACHE_ALIAS'), []).append("the replica pins (REPLICA_ROUTING)")
+    return state
+
+
+# Description of each shared-state cache alias configured with a process-local backend
+def shared_cache_problems():
+    problems = []
+    for alias, holds in shared_state().items():
+        backend = settings.CACHES.get(alias, {}).get('BACKEND')
+        if backend in PROCESS_LOCAL_BACKENDS:
+            problems.append(f"CACHES[{alias!r}] uses the process-local {backend} but holds {', '.join(holds)}")
+        elif backend is None:
+            problems.append(f"CACHES has no {alias!r} alias for {', '.join(holds)}")
+    return problems
+
+
+def check_shared_caches():
+    problems = shared_cache_problems()
+    if problems:
+        raise ImproperlyConfigured(
+            "State that every server process must see is kept in caches that are not shared: "
+            + "; ".join(problems)
+            + ". Configure a shared cache backend (e.g. set REDIS_URL)."
+        )
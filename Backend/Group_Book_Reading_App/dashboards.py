@@ -0,0 +1,39 @@
+"""
+Composite payloads for the member pages.
+
+The home page and the group page each needed several sequential requests, and
+the group page downloaded the progress of every group the user belongs to just
+to render one of them. These builders return exactly what one page renders:
+
+* ``home_summary_data``: the book and group catalogs (cached at the catalog version,
+  like the catalog endpoints) and the caller's deadline notifications;
+* ``group_dashboard_data``: one group with its book and members and the reading
+  progress of that group only, loaded by the progress engine's bulk queries.
+"""
+
+from .models import Book, Group
+from .serializers import BookSerializer, GroupSerializer
+from .catalog_cache import cached_catalog_data
+from .membership import is_member
+from .notifications import user_notifications
+from .progress import build_group_progress
+
+
+def home_summary_data(user):
+    return {
+        "books": cached_catalog_data('home:books', lambda: BookSerializer.row_serializer.serialize(Book.objects.all())),
+        "groups": cached_catalog_data('home:groups', lambda: GroupSerializer.row_serializer.serialize(Group.objects.all())),
+        "notifications": user_notifications(user),
+    }
+
+
+# Raises Group.DoesNotExist; chapters are only included for members of the group
+def group_dashboard_data(user, group_id):
+    group = GroupSerializer.optimize_queryset(Group.objects.all()).get(id=group_id)
+    progress = build_group_progress(group) if is_member(user, group.id) else None
+    return {
+        "user_id": user.id,
+        "group": GroupSerializer(group).data,
+        "total_members": len(group.members.all()),
+        "chapters": progress["chapters"] if progress else [],
+    }
@@ -0,0 +1,18 @@
+"""
+Per-connection database tuning.
+
+SQLite keeps most settings per connection, so the pragmas in
+``settings.SQLITE_PRAGMAS`` (WAL journaling, busy timeout, synchronous level,
+memory-mapped I/O) are applied from a ``connection_created`` hook every time
+Django opens a connection.
+"""
+
+from django.conf import settings
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+        # Straight on the DB-API connection: these are not application queries
+        connection.connection.execute(f"PRAGMA {name} = {value}")
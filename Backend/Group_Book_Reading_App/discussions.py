@@ -0,0 +1,137 @@
+"""
+Threaded discussion tree loader and incremental discussion feed.
+
+Fetches the discussions of a chapter in a single query and assembles the reply
+forest in memory by grouping on ``parent_id``, so serializing a thread costs one
+query regardless of its size or depth. The feed returns a flat page of every
+discussion created after an opaque ``(created_at, id)`` cursor.
+"""
+
+import base64
+import json
+from datetime import datetime, timezone as dt_timezone
+from django.db.models import Q
+from django.utils.timezone import make_aware
+from .models import Discussion
+
+FEED_PAGE_SIZE = 50
+FEED_MAX_PAGE_SIZE = 200
+
+
+# Raised when a feed cursor cannot be decoded
+class InvalidCursor(ValueError):
+    pass
+
+
+# Serialize a discussion row into the same shape as DiscussionSerializer, without lazy relation lookups
+def discussion_node(discussion):
+    return {
+        "id": discussion.id,
+        "chapter": discussion.chapter_id,
+        "user": {
+            "id": discussion.user_id,
+            "username": discussion.user.username,
+        },
+        "content": discussion.content,
+        "parent": discussion.parent_id,
+        "created_at": discussion.created_at,
+        "replies": [],
+    }
+
+
+# Parse the `last_fetched_at` polling parameter (ISO 8601, naive values are UTC); raises ValueError
+def parse_last_fetched_at(value):
+    last_fetched_time = datetime.fromisoformat(value)
+    if not last_fetched_time.tzinfo:
+        last_fetched_time = make_aware(last_fetched_time, timezone=dt_timezone.utc)
+    return last_fetched_time
+
+
+# In-memory reply forest for a set of discussions of one chapter
+class DiscussionTree:
+    def __init__(self, discussions):
+        self.nodes = {}
+        self.roots = []
+        loaded = []
+        # Discussions arrive ordered by creation time, so every reply list ends up ordered too
+        for discussion in discussions:
+            node = discussion_node(discussion)
+            self.nodes[node["id"]] = node
+            loaded.append(node)
+        for node in loaded:
+            parent = self.nodes.get(node["parent"])
+            if parent is None:
+                self.roots.append(node)  # Top-level post, or a reply whose parent was not loaded
+            else:
+                parent["replies"].append(node)
+
+    # Load every discussion of a chapter (optionally only those created after `after`) in one query
+    @classmethod
+    def for_chapter(cls, chapter_id, after=None):
+        return cls(cls._chapter_discussions(chapter_id, after))
+
+    # Async variant of for_chapter for the ASGI read views
+    @classmethod
+    async def afor_chapter(cls, chapter_id, after=None):
+        return cls([discussion async for discussion in cls._chapter_discussions(chapter_id, after)])
+
+    @staticmethod
+    def _chapter_discussions(chapter_id, after):
+        discussions = Discussion.objects.filter(chapter_id=chapter_id).select_related('user')
+        if after is not None:
+            # Replies are always created after their parent, so the threads started after `after` load whole
+            discussions = discussions.filter(created_at__gt=after)
+        return discussions.order_by('created_at', 'id')
+
+    def __contains__(self, discussion_id):
+        return discussion_id in self.nodes
+
+    # Top-level discussions (parent is None), in creation order
+    def threads(self):
+        return [node for node in self.roots if node["parent"] is None]
+
+    # Serialized replies of a discussion, nested to any depth
+    def replies(self, discussion_id):
+        node = self.nodes.get(discussion_id)
+        return node["replies"] if node else []
+
+
+# Encode the (created_at, id) position of a discussion as an opaque cursor
+def encode_cursor(created_at, discussion_id):
+    payload = json.dumps([created_at.isoformat(), discussion_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+# Decode an opaque cursor back into its (created_at, id) position
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, discussion_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(discussion_id)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise InvalidCursor(cursor)
+
+
+# Fetch one page of a chapter's discussions created after the cursor, oldest first
+def discussion_feed(chapter_id, cursor=None, limit=FEED_PAGE_SIZE):
+    limit = max(1, min(limit, FEED_MAX_PAGE_SIZE))
+    discussions = Discussion.objects.filter(chapter_id=chapter_id).select_related('user')
+    if cursor:
+        created_at, discussion_id = decode_cursor(cursor)
+        discussions = discussions.filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=discussion_id)
+        )
+    # Fetch one extra row to learn whether another page follows
+    page = list(discussions.order_by('created_at', 'id')[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+    results = []
+    for discussion in page:
+        node = discussion_node(discussion)
+        del node["replies"]  # The feed is flat, clients thread it with the parent ids
+        results.append(node)
+    return {
+        "results": results,
+        "next_cursor": encode_cursor(page[-1].created_at, page[-1].id) if page else cursor,
+        "has_more": has_more,
+    }
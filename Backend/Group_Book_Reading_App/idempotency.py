@@ -0,0 +1,105 @@
+"""
+Idempotent POST endpoints.
+
+A client that may retry a request (after a timeout, a dropped connection or a
+double submit) sends an ``Idempotency-Key`` header, unique per operation. The
+first request runs the view and stores its response together with the key in
+the same transaction. Later requests with the same key get the stored response
+back, marked with an ``Idempotent-Replayed: true`` header, without running the
+view again.
+
+When two requests with the same key run concurrently, the unique constraint
+on (user, key) lets only one of them commit: the other rolls its work back and
+replays the winner's response. Reusing a key for a different request (method,
+path or body) is rejected with 422. Responses with a server error are not
+stored, so those requests can be retried. Records expire after
+``IDEMPOTENCY['TTL']`` seconds; ``purge_idempotency_records`` deletes them.
+"""
+
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from .models import IdempotencyRecord
+
+DEFAULT_IDEMPOTENCY = {
+    'TTL': 24 * 60 * 60,  # Seconds a stored response is replayed
+}
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = IdempotencyRecord._meta.get_field('key').max_length
+
+
+def _config():
+    return {**DEFAULT_IDEMPOTENCY, **getattr(settings, 'IDEMPOTENCY', {})}
+
+
+def _expired_before():
+    return timezone.now() - timedelta(seconds=_config()['TTL'])
+
+
+# Hash of what makes two requests the same operation
+def _fingerprint(request):
+    body = json.dumps(request.data, cls=JSONEncoder, sort_keys=True)
+    return hashlib.sha256(f"{request.method} {request.path}\n{body}".encode()).hexdigest()
+
+
+# Stored record of the user's key, after dropping it if it has expired
+def _stored(user, key):
+    records = IdempotencyRecord.objects.filter(user=user, key=key)
+    records.filter(created_at__lt=_expired_before()).delete()
+    return records.first()
+
+
+def _replay(record, fingerprint):
+    if record.fingerprint != fingerprint:
+        return Response(
+            {"error": f"{HEADER} has already been used for a different request."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return Response(record.response, status=record.status_code, headers={'Idempotent-Replayed': 'true'})
+
+
+# Make a DRF view replay its stored response to requests that repeat an Idempotency-Key
+def idempotent(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view(request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"error": f"{HEADER} must be between 1 and {MAX_KEY_LENGTH} characters."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        fingerprint = _fingerprint(request)
+        record = _stored(request.user, key)
+        if record is not None:
+            return _replay(record, fingerprint)
+        try:
+            with transaction.atomic():
+                response = view(request, *args, **kwargs)
+                if response.status_code < 500:
+                    IdempotencyRecord.objects.create(
+                        user=request.user, key=key, fingerprint=fingerprint,
+                        status_code=response.status_code, response=response.data,
+                    )
+        except IntegrityError:
+            # A concurrent request with the same key stored its response first
+            record = _stored(request.user, key)
+            if record is None:
+                raise
+            return _replay(record, fingerprint)
+        return response
+    return wrapper
+
+
+# Delete the expired records; returns how many were deleted
+def purge_expired_records():
+    deleted, _ = IdempotencyRecord.objects.filter(created_at__lt=_expired_before()).delete()
+    return deleted
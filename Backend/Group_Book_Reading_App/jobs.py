@@ -0,0 +1,207 @@
+"""
+Persistent background job queue backed by the Job table.
+
+Writes that fan out over many rows (cascading deletes, member resets,
+notification generation) ``enqueue`` a job in their own transaction instead
+of doing the work inline, and the request answers 202 Accepted with the job,
+whose status is served by ``GET /api/jobs/<id>/``.
+
+Workers (the ``run_jobs`` management command) claim due jobs one at a time
+with ``SELECT ... FOR UPDATE SKIP LOCKED`` on PostgreSQL, so concurrent
+workers never block on or run the same job (SQLite's write lock serializes
+the claims instead), run the registered task and record its result. A task
+that raises is retried with exponential backoff until ``max_attempts``.
+
+Tasks (see tasks.py) work in chunks, each in its own transaction, and call
+``heartbeat`` between chunks to report progress and extend their lease. A job
+whose worker died is picked up again once its lease expires, so tasks must be
+safe to re-run: they always continue with whatever work is left.
+
+Workers are processes of their own, and tasks invalidate cached state (the
+catalog version, membership ids) that the web processes read, so the queue is
+only used with ``JOB_QUEUE['ENABLED']``, which requires a shared cache (see
+checks.py). Otherwise requests run the task themselves with ``run_now`` and
+answer synchronously, and ``enqueue`` runs the job in the current process once
+the transaction commits, with a single attempt.
+"""
+
+import logging
+import random
+import threading
+from datetime import timedelta
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_QUEUE = {
+    'ENABLED': False,  # Run jobs on run_jobs workers; when off, each job runs in the process that queued it
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF_SECONDS': 10,  # Delay before the first retry, doubled on every further attempt
+    'MAX_BACKOFF_SECONDS': 3600,
+    'LEASE_SECONDS': 300,  # A running job without a heartbeat for this long is taken over by another worker
+    'POLL_INTERVAL': 1.0,  # Seconds an idle worker waits before looking for due jobs again
+    'CHUNK_SIZE': 1000,  # Rows per transaction in the chunked tasks
+}
+TASKS = {}  # Task name -> function(job, **payload) returning a JSON-serializable result
+
+
+class LeaseLost(Exception):
+    """Another worker took over the job after its lease expired."""
+
+
+def job_queue_settings():
+    return {**DEFAULT_JOB_QUEUE, **getattr(settings, 'JOB_QUEUE', {})}
+
+
+# Register a function as the task with the given name
+def task(name):
+    def decorator(function):
+        TASKS[name] = function
+        return function
+    return decorator
+
+
+# Queue a task; it runs once the current transaction commits, on a worker or (queue disabled) in this process
+def enqueue(task_name, payload=None, user=None):
+    if task_name not in TASKS:
+        raise ValueError(f"Unknown task {task_name!r}")
+    config = job_queue_settings()
+    job = Job.objects.create(
+        task=task_name, payload=payload or {}, created_by=user,
+        max_attempts=config['MAX_ATTEMPTS'] if config['ENABLED'] else 1,  # No worker would run a retry
+    )
+    if not config['ENABLED']:
+        transaction.on_commit(lambda: run_inline(job))
+    return job
+
+
+# Run a task in this process right away, recorded as a single-attempt job (for requests while the queue is disabled)
+def run_now(task_name, payload=None, user=None):
+    if task_name not in TASKS:
+        raise ValueError(f"Unknown task {task_name!r}")
+    job = Job.objects.create(task=task_name, payload=payload or {}, created_by=user, max_attempts=1)
+    run_inline(job)
+    return job
+
+
+# Claim a queued job for this process and run it; the job instance is updated with its outcome
+def run_inline(job):
+    fields = {'status': 'running', 'attempts': job.attempts + 1, 'locked_by': 'inline', 'locked_at': timezone.now()}
+    if Job.objects.filter(id=job.id, status='queued').update(**fields):
+        for name, value in fields.items():
+            setattr(job, name, value)
+        run_job(job)
+
+
+# Lock the next due job (queued, or running with an expired lease) for this worker
+def claim_job(worker):
+    now = timezone.now()
+    expired = now - timedelta(seconds=job_queue_settings()['LEASE_SECONDS'])
+    with transaction.atomic():
+        job = (
+            Job.objects
+            .select_for_update(skip_locked=True)
+            .filter(Q(status='queued', run_after__lte=now) | Q(status='running', locked_at__lt=expired))
+            .order_by('run_after', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = 'running'
+        job.attempts += 1
+        job.locked_by = worker
+        job.locked_at = now
+        job.save(update_fields=['status', 'attempts', 'locked_by', 'locked_at'])
+    return job
+
+
+# Record the progress of a running job and extend its lease
+def heartbeat(job, **progress):
+    job.result = {**(job.result or {}), **progress}
+    job.locked_at = timezone.now()
+    updated = Job.objects.filter(id=job.id, status='running', locked_by=job.locked_by).update(
+        result=job.result, locked_at=job.locked_at,
+    )
+    if not updated:
+        raise LeaseLost(f"Job {job.id} was taken over by another worker")
+
+
+def _backoff(attempts):
+    config = job_queue_settings()
+    delay = min(config['BACKOFF_SECONDS'] * 2 ** (attempts - 1), config['MAX_BACKOFF_SECONDS'])
+    return timedelta(seconds=delay * random.uniform(0.5, 1.0))  # Jitter spreads out the retries of jobs that failed together
+
+
+# Save the outcome of a job, unless another worker has taken it over meanwhile
+def _finish(job, **fields):
+    Job.objects.filter(id=job.id, status='running', locked_by=job.locked_by).update(**fields)
+    for name, value in fields.items():
+        setattr(job, name, value)
+
+
+# Run a claimed job and record its result, or schedule its retry
+def run_job(job):
+    function = TASKS.get(job.task)
+    try:
+        if function is None:
+            raise LookupError(f"Unknown task {job.task!r}")
+        if job.attempts > job.max_attempts:
+            raise RuntimeError("Lease expired on the last attempt")
+        result = function(job, **job.payload)
+    except LeaseLost:
+        logger.warning("Job %s (%s) lost its lease", job.id, job.task)
+    except Exception as error:  # Any failure of a task is recorded on the job; the worker keeps going
+        logger.exception("Job %s (%s) failed on attempt %s", job.id, job.task, job.attempts)
+        now = timezone.now()
+        if job.attempts < job.max_attempts:
+            _finish(job, status='queued', run_after=now + _backoff(job.attempts), last_error=repr(error), locked_by='', locked_at=None)
+        else:
+            _finish(job, status='failed', finished_at=now, last_error=repr(error), locked_at=None)
+    else:
+        _finish(job, status='succeeded', result={**(job.result or {}), **(result or {})}, finished_at=timezone.now(), locked_at=None)
+
+
+# Run due jobs until there are none left (or `limit` jobs ran); returns how many ran
+def run_pending_jobs(worker='inline', limit=None):
+    ran = 0
+    while limit is None or ran < limit:
+        job = claim_job(worker)
+        if job is None:
+            break
+        run_job(job)
+        ran += 1
+    return ran
+
+
+# Worker loop for one thread: run due jobs, wait POLL_INTERVAL when there are none
+def work(worker, stop, burst=False):
+    poll_interval = job_queue_settings()['POLL_INTERVAL']
+    try:
+        while not stop.is_set():
+            job = claim_job(worker)
+            if job is not None:
+                run_job(job)
+            elif burst:
+                break
+            else:
+                stop.wait(poll_interval)
+    finally:
+        connections.close_all()  # Each thread has its own connections
+
+
+# Run `concurrency` worker threads until `stop` is set (or, with `burst`, until no job is due)
+def run_workers(name, concurrency, stop=None, burst=False):
+    stop = stop or threading.Event()
+    threads = [
+        threading.Thread(target=work, args=(f"{name}-{index}", stop, burst), name=f"{name}-{index}")
+        for index in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        while thread.is_alive():
+            thread.join(timeout=0.5)  # Wake up regularly so the main thread can handle signals
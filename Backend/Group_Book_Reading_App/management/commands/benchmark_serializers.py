@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from Group_Book_Reading_App.benchmarks import benchmark_serializers
+
+
+# Compares the DRF serializers with their compiled row serializers on large list responses
+class Command(BaseCommand):
+    help = (
+        "Render the book, group and chapter lists with the DRF serializers, with the row serializers and with the "
+        "row serializers and the orjson renderer, and compare throughput."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help="Rows rendered per list.")
+        parser.add_argument('--iterations', type=int, default=5, help="Runs per serializer; the best run is reported.")
+
+    def handle(self, *args, **options):
+        try:
+            results = benchmark_serializers(rows=options['rows'], iterations=options['iterations'])
+        except AssertionError as error:
+            raise CommandError(str(error))
+        self.stdout.write(
+            f"{'list':10} {'rows':>7} {'drf ms':>10} {'rows ms':>10} {'fast ms':>10} "
+            f"{'drf rows/s':>11} {'fast rows/s':>12} {'rows':>7} {'fast':>7}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:10} {result['rows']:>7} {result['drf_ms']:>10} {result['rows_ms']:>10} {result['fast_ms']:>10} "
+                f"{result['drf_rows_per_second']:>11} {result['fast_rows_per_second']:>12} "
+                f"{result['rows_speedup']:>6}x {result['fast_speedup']:>6}x"
+            )
@@ -0,0 +1,35 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from Group_Book_Reading_App.jobs import enqueue
+from Group_Book_Reading_App.notifications import generate_deadline_notifications
+
+
+# Recomputes the overdue-unread chapter notifications of every member; meant to run periodically (e.g. from cron)
+class Command(BaseCommand):
+    help = "Generate chapter deadline notifications for all members."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            help="Compute notifications as of this ISO date (YYYY-MM-DD) instead of today.",
+        )
+        parser.add_argument(
+            '--enqueue',
+            action='store_true',
+            help="Queue the computation as a background job (see run_jobs) instead of running it here.",
+        )
+
+    def handle(self, *args, **options):
+        today = None
+        if options['date']:
+            try:
+                today = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError("--date must be an ISO date like 2025-01-27.")
+        if options['enqueue']:
+            job = enqueue('generate_deadline_notifications', {'today': today.isoformat() if today else None})
+            # With the queue disabled the job has already run
+            self.stdout.write(self.style.SUCCESS(f"Queued job {job.id}." if job.status == 'queued' else f"Job {job.id} {job.status}."))
+            return
+        total, removed = generate_deadline_notifications(today)
+        self.stdout.write(self.style.SUCCESS(f"{total} deadline notifications active, {removed} cleared."))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from Group_Book_Reading_App.models import CustomUser
+from Group_Book_Reading_App.synthetic_data import (
+    generate_synthetic_data, flush_synthetic_data, scaled_counts, DEFAULT_PREFIX, DEFAULT_PASSWORD, BATCH_SIZE,
+)
+
+
+# Fills the database with a synthetic dataset for load tests and benchmarks
+class Command(BaseCommand):
+    help = "Generate a synthetic dataset (users, books, groups, chapters, read marks, discussions) with bulk inserts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0,
+                            help="Multiplier of the full-size dataset (10k users, 2k books, 5k groups, 100k chapters, 1M discussions).")
+        for name in ('users', 'books', 'groups', 'chapters', 'discussions'):
+            parser.add_argument(f'--{name}', type=int, help=f"Number of {name} (overrides --scale).")
+        parser.add_argument('--members-per-group', type=int, default=20)
+        parser.add_argument('--read-ratio', type=float, default=0.5, help="Share of members that read each chapter.")
+        parser.add_argument('--reply-ratio', type=float, default=0.3, help="Share of discussions that are replies.")
+        parser.add_argument('--admins', type=int, default=5, help="Number of the generated users with the admin role.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--prefix', default=DEFAULT_PREFIX, help="Tag of the generated usernames and book titles.")
+        parser.add_argument('--flush', action='store_true', help="Delete the data generated with --prefix before generating.")
+        parser.add_argument('--flush-only', action='store_true', help="Only delete the data generated with --prefix.")
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if options['flush'] or options['flush_only']:
+            deleted = flush_synthetic_data(prefix)
+            self.stdout.write(f"Deleted {deleted} synthetic rows.")
+            if options['flush_only']:
+                return
+        if CustomUser.objects.filter(username__startswith=f'{prefix}_user_').exists():
+            raise CommandError(f"Synthetic data with prefix '{prefix}' already exists; use --flush or another --prefix.")
+        counts = scaled_counts(options['scale'], **{name: options[name] for name in ('users', 'books', 'groups', 'chapters', 'discussions')})
+        if counts['users'] <= options['admins']:
+            raise CommandError("--users must be larger than --admins.")
+        created = generate_synthetic_data(
+            counts, prefix=prefix, members_per_group=options['members_per_group'], read_ratio=options['read_ratio'],
+            reply_ratio=options['reply_ratio'], admins=options['admins'], seed=options['seed'],
+            batch_size=options['batch_size'], log=self.stdout.write,
+        )
+        summary = ", ".join(f"{total} {name}" for name, total in created.items())
+        self.stdout.write(self.style.SUCCESS(f"Created {summary}. Password of every synthetic user: {DEFAULT_PASSWORD}"))
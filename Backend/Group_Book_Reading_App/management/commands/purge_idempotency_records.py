@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from Group_Book_Reading_App.idempotency import purge_expired_records
+
+
+# Deletes the stored Idempotency-Key responses older than IDEMPOTENCY['TTL'] (run periodically, e.g. from cron)
+class Command(BaseCommand):
+    help = "Delete expired Idempotency-Key records."
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_records()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired idempotency records."))
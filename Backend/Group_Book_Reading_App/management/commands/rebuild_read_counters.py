@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from Group_Book_Reading_App.read_counters import rebuild_counters, verify_counters
+
+
+# Rebuilds the ChapterProgress read counters from the through tables and verifies the result
+class Command(BaseCommand):
+    help = "Rebuild and verify the denormalized per-chapter read counters."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify-only',
+            action='store_true',
+            help="Only compare stored counters against the through tables, without rebuilding.",
+        )
+
+    def handle(self, *args, **options):
+        if not options['verify_only']:
+            with transaction.atomic():
+                total = rebuild_counters()
+            self.stdout.write(f"Rebuilt read counters for {total} chapters.")
+        mismatched = verify_counters()
+        if mismatched:
+            raise CommandError(f"Read counters out of date for {len(mismatched)} chapters: {mismatched[:20]}")
+        self.stdout.write(self.style.SUCCESS("Read counters verified."))
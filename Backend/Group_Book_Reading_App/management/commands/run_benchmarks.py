@@ -0,0 +1,55 @@
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from Group_Book_Reading_App.benchmarks import SCENARIOS, run_benchmarks, save_report, load_report, compare_reports
+
+BASELINE_DIR = Path(settings.BASE_DIR) / 'benchmarks'
+
+
+# Benchmarks the member and admin endpoints against the configured database and saves a JSON baseline
+class Command(BaseCommand):
+    help = "Run the endpoint benchmarks, print latency percentiles and query counts, and save a JSON baseline."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help="Measured requests per scenario.")
+        parser.add_argument('--warmup', type=int, default=5, help="Unmeasured requests per scenario.")
+        parser.add_argument('--scenario', action='append', choices=[scenario.name for scenario in SCENARIOS],
+                            help="Run only this scenario (repeatable).")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--label', default='', help="Free-form label stored in the baseline (e.g. the commit).")
+        parser.add_argument('--output', help=f"Baseline file to write (default: {BASELINE_DIR}/<timestamp>.json).")
+        parser.add_argument('--compare', help="Baseline file to compare the results with.")
+
+    def handle(self, *args, **options):
+        baseline = load_report(options['compare']) if options['compare'] else None
+        # The test client needs the test environment (e.g. the 'testserver' host)
+        setup_test_environment()
+        try:
+            report = run_benchmarks(
+                iterations=options['iterations'], warmup=options['warmup'], scenarios=options['scenario'],
+                seed=options['seed'], label=options['label'],
+            )
+        except ValueError as error:
+            raise CommandError(str(error))
+        finally:
+            teardown_test_environment()
+
+        self.stdout.write(f"{report['database']['profile']} profile, {report['dataset']}")
+        self.stdout.write(f"{'scenario':32} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries':>8} {'errors':>7}")
+        for name, result in report['results'].items():
+            latency = result['latency_ms']
+            self.stdout.write(
+                f"{name:32} {latency['p50']:>9} {latency['p95']:>9} {latency['p99']:>9} "
+                f"{result['queries']['p50']:>8} {result['errors']:>7}"
+            )
+        if baseline:
+            self.stdout.write("Change against the baseline (latency in %, queries in absolute count):")
+            for name, change in compare_reports(baseline, report).items():
+                self.stdout.write(f"{name:32} p50 {change['p50']:>+7}%  p95 {change['p95']:>+7}%  queries {change['queries']:>+d}")
+
+        output = Path(options['output']) if options['output'] else BASELINE_DIR / f"{timezone.now():%Y%m%d-%H%M%S}.json"
+        output.parent.mkdir(parents=True, exist_ok=True)
+        save_report(report, output)
+        self.stdout.write(self.style.SUCCESS(f"Baseline saved to {output}"))
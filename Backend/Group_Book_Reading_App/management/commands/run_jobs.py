@@ -0,0 +1,42 @@
+import os
+import signal
+import socket
+import threading
+from django.core.management.base import BaseCommand, CommandError
+from Group_Book_Reading_App.jobs import job_queue_settings, run_workers
+
+
+# Runs background jobs from the database-backed queue until stopped (SIGINT/SIGTERM finish the running jobs first)
+class Command(BaseCommand):
+    help = "Run background job workers."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=1,
+            help="Number of worker threads (default 1).",
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help="Exit once no job is due instead of waiting for new jobs.",
+        )
+
+    def handle(self, *args, **options):
+        if not job_queue_settings()['ENABLED']:
+            raise CommandError("The job queue is disabled: jobs run in the process that queues them. Set JOB_QUEUE_ENABLED=1 to use workers.")
+        if options['concurrency'] < 1:
+            raise CommandError("--concurrency must be at least 1.")
+        name = f"{socket.gethostname()}:{os.getpid()}"
+        stop = threading.Event()
+
+        def request_stop(signum, frame):
+            self.stdout.write("Stopping after the running jobs...")
+            stop.set()
+
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGTERM, request_stop)
+        self.stdout.write(f"Worker {name} running {options['concurrency']} thread(s).")
+        run_workers(name, options['concurrency'], stop=stop, burst=options['burst'])
+        self.stdout.write(self.style.SUCCESS("Workers stopped."))
@@ -0,0 +1,132 @@
+"""
+Group membership checks.
+
+Every view authorizes group-scoped actions through ``is_member`` (or
+``ais_member`` in async views) instead of loading the whole member list. Reads
+are answered from a per-user cache of group ids, filled with one indexed query
+on the membership table. Write paths pass ``fresh=True`` to check with an
+indexed ``exists()`` query against the database instead.
+
+Cached ids are invalidated when the transaction that changes a membership
+commits: from the ``m2m_changed`` and group delete signals (see signals.py),
+and explicitly by the bulk paths, whose ``bulk_create`` / queryset ``delete``
+send no signals. Entries are keyed by a per-user generation that an
+invalidation increments, and a fill stores its ids under the generation it
+read before querying, so a fill that raced an invalidation lands under a
+generation that is never read again. Entries are filled from the primary
+database, never from a lagging read replica. The alias and timeout come from
+the MEMBERSHIP_CACHE setting.
+
+The ids authorize requests, so every process must see an invalidation as soon
+as it commits: with several processes the alias must be a shared cache, which
+checks.py enforces at startup.
+"""
+
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from .models import Group
+from .routers import primary_reads
+
+GroupMembership = Group.members.through
+
+DEFAULT_MEMBERSHIP_CACHE = {
+    'ALIAS': 'default',
+    'TIMEOUT': 300,
+}
+
+
+def _config():
+    return {**DEFAULT_MEMBERSHIP_CACHE, **getattr(settings, 'MEMBERSHIP_CACHE', {})}
+
+
+def _cache():
+    return caches[_config()['ALIAS']]
+
+
+def _generation_key(user_id):
+    return f"membership:generation:{user_id}"
+
+
+def _key(user_id, generation):
+    return f"membership:groups:{user_id}:{generation}"
+
+
+# Current generation of a user's cached ids. A missing generation starts from the current time in
+# milliseconds, so the entries of an evicted generation are not picked up again.
+def _generation(cache, user_id):
+    generation = cache.get(_generation_key(user_id))
+    if generation is None:
+        cache.add(_generation_key(user_id), int(time.time() * 1000), timeout=None)
+        generation = cache.get(_generation_key(user_id))
+    return generation
+
+
+async def _ageneration(cache, user_id):
+    generation = await cache.aget(_generation_key(user_id))
+    if generation is None:
+        await cache.aadd(_generation_key(user_id), int(time.time() * 1000), timeout=None)
+        generation = await cache.aget(_generation_key(user_id))
+    return generation
+
+
+def _group_ids_query(user_id):
+    return GroupMembership.objects.filter(customuser_id=user_id).values_list('group_id', flat=True)
+
+
+# Ids of the groups a user belongs to
+def user_group_ids(user_id):
+    cache = _cache()
+    key = _key(user_id, _generation(cache, user_id))
+    group_ids = cache.get(key)
+    if group_ids is None:
+        with primary_reads():
+            group_ids = frozenset(_group_ids_query(user_id))
+        cache.set(key, group_ids, timeout=_config()['TIMEOUT'])
+    return group_ids
+
+
+async def auser_group_ids(user_id):
+    cache = _cache()
+    key = _key(user_id, await _ageneration(cache, user_id))
+    group_ids = await cache.aget(key)
+    if group_ids is None:
+        with primary_reads():
+            group_ids = frozenset([group_id async for group_id in _group_ids_query(user_id)])
+        await cache.aset(key, group_ids, timeout=_config()['TIMEOUT'])
+    return group_ids
+
+
+def _membership(user_id, group_id):
+    return GroupMembership.objects.filter(group_id=group_id, customuser_id=user_id)
+
+
+# Whether the user belongs to the group; `fresh` skips the cache (for decisions inside write transactions)
+def is_member(user, group_id, fresh=False):
+    if fresh:
+        return _membership(user.id, group_id).exists()
+    return int(group_id) in user_group_ids(user.id)
+
+
+async def ais_member(user, group_id, fresh=False):
+    if fresh:
+        return await _membership(user.id, group_id).aexists()
+    return int(group_id) in await auser_group_ids(user.id)
+
+
+# Move these users to a new generation of cached ids
+def _bump_generations(user_ids):
+    cache = _cache()
+    for user_id in user_ids:
+        try:
+            cache.incr(_generation_key(user_id))
+        except ValueError:
+            pass  # No generation yet: the next check starts a new one
+
+
+# Invalidate the cached group ids of these users once the current transaction commits
+def invalidate_memberships(user_ids):
+    user_ids = list(user_ids)
+    if user_ids:
+        transaction.on_commit(lambda: _bump_generations(user_ids))
@@ -0,0 +1,52 @@
+# Generated by Django 5.1.5 on 2026-10-18 12:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+# Backfill one progress row per existing chapter from the is_read and members through tables
+def populate_chapter_progress(apps, schema_editor):
+    Chapter = apps.get_model('Group_Book_Reading_App', 'Chapter')
+    Group = apps.get_model('Group_Book_Reading_App', 'Group')
+    ChapterProgress = apps.get_model('Group_Book_Reading_App', 'ChapterProgress')
+    member_counts = dict(
+        Group.members.through.objects.values('group_id').annotate(n=Count('id')).order_by().values_list('group_id', 'n')
+    )
+    read_counts = dict(
+        Chapter.is_read.through.objects.values('chapter_id').annotate(n=Count('id')).order_by().values_list('chapter_id', 'n')
+    )
+    ChapterProgress.objects.bulk_create(
+        [
+            ChapterProgress(
+                chapter_id=chapter_id,
+                group_id=group_id,
+                read_count=read_counts.get(chapter_id, 0),
+                member_count=member_counts.get(group_id, 0),
+            )
+            for chapter_id, group_id in Chapter.objects.values_list('id', 'group_id').iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Group_Book_Reading_App', '0005_discussion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChapterProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('read_count', models.PositiveIntegerField(default=0)),
+                ('member_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('chapter', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='progress', to='Group_Book_Reading_App.chapter')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chapter_progress', to='Group_Book_Reading_App.group')),
+            ],
+        ),
+        migrations.RunPython(populate_chapter_progress, migrations.RunPython.noop),
+    ]
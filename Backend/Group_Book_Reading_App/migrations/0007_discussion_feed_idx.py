@@ -0,0 +1,17 @@
+# Generated by Django 5.1.5 on 2026-10-18 12:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Group_Book_Reading_App', '0006_chapterprogress'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='discussion',
+            index=models.Index(fields=['chapter', 'created_at', 'id'], name='discussion_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.5 on 2026-10-18 12:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Group_Book_Reading_App', '0007_discussion_feed_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='chapter',
+            name='deadline',
+            field=models.DateField(db_index=True),
+        ),
+        migrations.CreateModel(
+            name='DeadlineNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('chapter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deadline_notifications', to='Group_Book_Reading_App.chapter')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deadline_notifications', to='Group_Book_Reading_App.group')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deadline_notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'chapter'), name='unique_user_chapter_notification')],
+            },
+        ),
+    ]
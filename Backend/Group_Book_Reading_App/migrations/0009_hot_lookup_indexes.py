@@ -0,0 +1,47 @@
+# Generated by Django 5.1.5 on 2026-10-18 12:59
+
+from django.db import migrations, models
+
+
+# Rename duplicate (book, name) groups created before the unique constraint existed, keeping the oldest name intact
+def rename_duplicate_groups(apps, schema_editor):
+    Group = apps.get_model('Group_Book_Reading_App', 'Group')
+    seen = set()
+    for group in Group.objects.order_by('id').only('id', 'book_id', 'name').iterator():
+        key = (group.book_id, group.name)
+        if key in seen:
+            group.name = f"{group.name} ({group.id})"[:200]
+            group.save(update_fields=['name'])
+        seen.add((group.book_id, group.name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Group_Book_Reading_App', '0008_deadlinenotification'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='role',
+            field=models.CharField(choices=[('admin', 'Admin'), ('member', 'Member')], db_index=True, default='member', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['genre', 'author'], name='book_genre_author_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chapter',
+            index=models.Index(fields=['group', 'deadline'], name='chapter_group_deadline_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='discussion',
+            index=models.Index(fields=['chapter', 'parent', 'created_at'], name='discussion_thread_idx'),
+        ),
+        migrations.RunPython(rename_duplicate_groups, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='group',
+            constraint=models.UniqueConstraint(fields=('book', 'name'), name='unique_group_book_name'),
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.1.5 on 2026-10-18 13:01
+
+from django.db import migrations
+
+# FTS5 indexes over books and discussions. They use the app tables as external content, so only the
+# inverted index is stored, and the triggers below keep them in sync with every insert, update and delete.
+CREATE_SEARCH_INDEX = [
+    """CREATE VIRTUAL TABLE "Group_Book_Reading_App_book_fts" USING fts5(
+        title, author, genre, description,
+        content='Group_Book_Reading_App_book', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER "Group_Book_Reading_App_book_fts_ai" AFTER INSERT ON "Group_Book_Reading_App_book" BEGIN
+        INSERT INTO "Group_Book_Reading_App_book_fts"(rowid, title, author, genre, description)
+        VALUES (new.id, new.title, new.author, new.genre, new.description);
+    END""",
+    """CREATE TRIGGER "Group_Book_Reading_App_book_fts_ad" AFTER DELETE ON "Group_Book_Reading_App_book" BEGIN
+        INSERT INTO "Group_Book_Reading_App_book_fts"("Group_Book_Reading_App_book_fts", rowid, title, author, genre, description)
+        VALUES ('delete', old.id, old.title, old.author, old.genre, old.description);
+    END""",
+    """CREATE TRIGGER "Group_Book_Reading_App_book_fts_au" AFTER UPDATE ON "Group_Book_Reading_App_book" BEGIN
+        INSERT INTO "Group_Book_Reading_App_book_fts"("Group_Book_Reading_App_book_fts", rowid, title, author, genre, description)
+        VALUES ('delete', old.id, old.title, old.author, old.genre, old.description);
+        INSERT INTO "Group_Book_Reading_App_book_fts"(rowid, title, author, genre, description)
+        VALUES (new.id, new.title, new.author, new.genre, new.description);
+    END""",
+    """CREATE VIRTUAL TABLE "Group_Book_Reading_App_discussion_fts" USING fts5(
+        content,
+        content='Group_Book_Reading_App_discussion', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER "Group_Book_Reading_App_discussion_fts_ai" AFTER INSERT ON "Group_Book_Reading_App_discussion" BEGIN
+        INSERT INTO "Group_Book_Reading_App_discussion_fts"(rowid, content) VALUES (new.id, new.content);
+    END""",
+    """CREATE TRIGGER "Group_Book_Reading_App_discussion_fts_ad" AFTER DELETE ON "Group_Book_Reading_App_discussion" BEGIN
+        INSERT INTO "Group_Book_Reading_App_discussion_fts"("Group_Book_Reading_App_discussion_fts", rowid, content)
+        VALUES ('delete', old.id, old.content);
+    END""",
+    """CREATE TRIGGER "Group_Book_Reading_App_discussion_fts_au" AFTER UPDATE OF content ON "Group_Book_Reading_App_discussion" BEGIN
+        INSERT INTO "Group_Book_Reading_App_discussion_fts"("Group_Book_Reading_App_discussion_fts", rowid, content)
+        VALUES ('delete', old.id, old.content);
+        INSERT INTO "Group_Book_Reading_App_discussion_fts"(rowid, content) VALUES (new.id, new.content);
+    END""",
+    # Index the rows that already exist
+    """INSERT INTO "Group_Book_Reading_App_book_fts"("Group_Book_Reading_App_book_fts") VALUES ('rebuild')""",
+    """INSERT INTO "Group_Book_Reading_App_discussion_fts"("Group_Book_Reading_App_discussion_fts") VALUES ('rebuild')""",
+]
+
+DROP_SEARCH_INDEX = [
+    'DROP TRIGGER IF EXISTS "Group_Book_Reading_App_book_fts_ai"',
+    'DROP TRIGGER IF EXISTS "Group_Book_Reading_App_book_fts_ad"',
+    'DROP TRIGGER IF EXISTS "Group_Book_Reading_App_book_fts_au"',
+    'DROP TABLE IF EXISTS "Group_Book_Reading_App_book_fts"',
+    'DROP TRIGGER IF EXISTS "Group_Book_Reading_App_discussion_fts_ai"',
+    'DROP TRIGGER IF EXISTS "Group_Book_Reading_App_discussion_fts_ad"',
+    'DROP TRIGGER IF EXISTS "Group_Book_Reading_App_discussion_fts_au"',
+    'DROP TABLE IF EXISTS "Group_Book_Reading_App_discussion_fts"',
+]
+
+
+# FTS5 is SQLite only; other databases use the LIKE-based fallback in search.py
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in CREATE_SEARCH_INDEX:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in DROP_SEARCH_INDEX:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Group_Book_Reading_App', '0009_hot_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
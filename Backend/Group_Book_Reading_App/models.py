@@ -1,6 +1,8 @@
 from django.contrib.auth.models import AbstractUser, Group, Permission
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
 
 # CustomUser model inherits from Django's AbstractUser, adding extra fields and functionality
 class CustomUser(AbstractUser):
@@ -8,7 +10,7 @@ class CustomUser(AbstractUser):
         ('admin', 'Admin'),
         ('member', 'Member'),
     ]
-    role = models.CharField(max_length=10, choices=ROLE_CHOICES, default='member')
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES, default='member', db_index=True)  # Filtered by fetch_users
     # Many-to-many relationship with Group, allowing users to belong to multiple groups
     groups = models.ManyToManyField(
         Group,
@@ -29,6 +31,11 @@ class Book(models.Model):
     genre = models.CharField(max_length=100)  
     description = models.TextField()  
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['genre', 'author'], name='book_genre_author_idx'),
+        ]
+
     def __str__(self):
         return f" Book {self.id} - {self.title} "
 
@@ -39,6 +46,12 @@ class Group(models.Model):
     members = models.ManyToManyField(get_user_model(), related_name='user_groups', blank=True)  
     reading_goals = models.TextField()  
 
+    class Meta:
+        constraints = [
+            # One group per name and book, so concurrent create-or-join requests cannot create duplicates
+            models.UniqueConstraint(fields=['book', 'name'], name='unique_group_book_name'),
+        ]
+
     def __str__(self):
         return f" Group {self.id} - {self.name} for the {self.book} created."
 
@@ -46,9 +59,14 @@ class Group(models.Model):
 class Chapter(models.Model):
     group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name='chapters')  
     title = models.CharField(max_length=200)  
-    deadline = models.DateField()  
+    deadline = models.DateField(db_index=True)  
     is_read = models.ManyToManyField(CustomUser, related_name='read_chapters', blank=True)  
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['group', 'deadline'], name='chapter_group_deadline_idx'),
+        ]
+
     def __str__(self):
         return f" Chapter {self.id} - {self.title} for the {self.group}"
 
@@ -59,6 +77,98 @@ class Discussion(models.Model):
     content = models.TextField()  
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies')  
     created_at = models.DateTimeField(auto_now_add=True)  
+
+    class Meta:
+        indexes = [
+            # Backs the (created_at, id) cursor of the incremental discussion feed
+            models.Index(fields=['chapter', 'created_at', 'id'], name='discussion_feed_idx'),
+            # Backs the top-level thread listing (parent IS NULL) of a chapter in creation order
+            models.Index(fields=['chapter', 'parent', 'created_at'], name='discussion_thread_idx'),
+        ]
    
     def __str__(self):
-        return f" Discussion {self.id} of member {self.user} created for the {self.chapter}"
\ No newline at end of file
+        return f" Discussion {self.id} of member {self.user} created for the {self.chapter}"
+
+# The DeadlineNotification model stores an overdue, unread chapter for a member (precomputed by generate_deadline_notifications)
+class DeadlineNotification(models.Model):
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='deadline_notifications')
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name='deadline_notifications')
+    chapter = models.ForeignKey(Chapter, on_delete=models.CASCADE, related_name='deadline_notifications')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'chapter'], name='unique_user_chapter_notification'),
+        ]
+
+    def __str__(self):
+        return f" Deadline notification for {self.user} - {self.chapter}"
+
+
+# The ChapterProgress model stores denormalized read counters for a chapter within its group
+class ChapterProgress(models.Model):
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name='chapter_progress')
+    chapter = models.OneToOneField(Chapter, on_delete=models.CASCADE, related_name='progress')
+    read_count = models.PositiveIntegerField(default=0)  # Number of users that marked the chapter as read
+    member_count = models.PositiveIntegerField(default=0)  # Number of members in the chapter's group
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def read_percentage(self):
+        if self.member_count <= 0:
+            return 0
+        return min((self.read_count / self.member_count) * 100, 100.0)
+
+    def __str__(self):
+        return f" Progress of {self.chapter} - {self.read_count}/{self.member_count} read"
+
+
+# The IdempotencyRecord model stores the response to a request sent with an Idempotency-Key header, replayed on retries
+class IdempotencyRecord(models.Model):
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='idempotency_records')
+    key = models.CharField(max_length=255)  # Chosen by the client, unique per user
+    fingerprint = models.CharField(max_length=64)  # Hash of the request method, path and body
+    status_code = models.PositiveSmallIntegerField()
+    response = models.JSONField(encoder=DjangoJSONEncoder, null=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)  # Records expire after IDEMPOTENCY['TTL']
+
+    class Meta:
+        constraints = [
+            # Concurrent requests with the same key cannot both store a response
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_user_idempotency_key'),
+        ]
+
+    def __str__(self):
+        return f" Idempotency key {self.key} of {self.user} - {self.status_code}"
+
+
+# The Job model is a unit of background work in the database-backed queue (see jobs.py), run by the run_jobs command
+class Job(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+    task = models.CharField(max_length=100)  # Name of a task registered in jobs.TASKS
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)  # Keyword arguments of the task
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)  # Not picked up before this time (retry backoff)
+    locked_by = models.CharField(max_length=100, blank=True)  # Worker running the job
+    locked_at = models.DateTimeField(null=True, blank=True)  # Last heartbeat of that worker
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)  # Progress while running, outcome when done
+    last_error = models.TextField(blank=True)
+    created_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Backs the workers' search for due jobs
+            models.Index(fields=['status', 'run_after'], name='job_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f" Job {self.id} - {self.task} {self.status}"
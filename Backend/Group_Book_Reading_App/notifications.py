@@ -0,0 +1,101 @@
+"""
+Precomputed chapter deadline notifications.
+
+``generate_deadline_notifications`` finds every (member, chapter) pair whose
+deadline has passed without a read mark in one anti-join query and syncs the
+DeadlineNotification table with it. It is run periodically by the
+``generate_deadline_notifications`` management command; the notification
+endpoint then only reads the caller's rows.
+"""
+
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+from .models import Chapter, DeadlineNotification
+
+ChapterReadMark = Chapter.is_read.through
+
+BATCH_SIZE = 1000
+
+
+# All (user_id, group_id, chapter_id) triples of members with an overdue chapter they have not read
+def overdue_unread(today):
+    read_mark = ChapterReadMark.objects.filter(
+        chapter_id=OuterRef('id'),
+        customuser_id=OuterRef('member_id'),
+    )
+    return (
+        Chapter.objects
+        .filter(deadline__lt=today)
+        .annotate(member_id=F('group__members'))  # One row per (chapter, member of its group)
+        .filter(member_id__isnull=False)
+        .filter(~Exists(read_mark))
+        .values_list('member_id', 'group_id', 'id')
+    )
+
+
+# Sync the notification table with the overdue-unread chapters as of `today`
+def generate_deadline_notifications(today=None):
+    today = today or timezone.now().date()
+    with transaction.atomic():
+        expected = {(user_id, chapter_id): group_id for user_id, group_id, chapter_id in overdue_unread(today).iterator()}
+        existing = {
+            (user_id, chapter_id): notification_id
+            for notification_id, user_id, chapter_id in DeadlineNotification.objects.values_list('id', 'user_id', 'chapter_id').iterator()
+        }
+        # Drop notifications whose chapter has been read since, or whose user left the group
+        stale_ids = [notification_id for key, notification_id in existing.items() if key not in expected]
+        for start in range(0, len(stale_ids), BATCH_SIZE):
+            DeadlineNotification.objects.filter(id__in=stale_ids[start:start + BATCH_SIZE]).delete()
+        DeadlineNotification.objects.bulk_create(
+            [
+                DeadlineNotification(user_id=user_id, chapter_id=chapter_id, group_id=group_id)
+                for (user_id, chapter_id), group_id in expected.items()
+                if (user_id, chapter_id) not in existing
+            ],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+    return len(expected), len(stale_ids)
+
+
+# Keep a member's notification for a chapter in step with a read mark toggled between generator runs
+def sync_chapter_notification(user, chapter, is_read):
+    if is_read:
+        DeadlineNotification.objects.filter(user=user, chapter=chapter).delete()
+    elif chapter.deadline < timezone.now().date():
+        DeadlineNotification.objects.get_or_create(user=user, chapter=chapter, defaults={"group_id": chapter.group_id})
+
+
+# Bulk variant of sync_chapter_notification for many toggled chapters of one member
+def sync_chapter_notifications(user, read_ids=(), unread_ids=()):
+    if read_ids:
+        DeadlineNotification.objects.filter(user=user, chapter_id__in=read_ids).delete()
+    if unread_ids:
+        overdue = Chapter.objects.filter(id__in=unread_ids, deadline__lt=timezone.now().date()).values_list('id', 'group_id')
+        DeadlineNotification.objects.bulk_create(
+            [DeadlineNotification(user=user, chapter_id=chapter_id, group_id=group_id) for chapter_id, group_id in overdue],
+            ignore_conflicts=True,
+        )
+
+
+# Render a user's stored notifications in the chapter deadline notification response format
+def user_notifications(user, today=None):
+    today = today or timezone.now().date()
+    notifications = (
+        DeadlineNotification.objects
+        .filter(user=user)
+        .select_related('group', 'chapter')
+        .order_by('group_id', 'chapter_id')
+    )
+    return [
+        {
+            "group_name": notification.group.name,
+            "chapter_id": notification.chapter_id,
+            "chapter_title": notification.chapter.title,
+            "notification": f"The deadline for chapter '{notification.chapter.title}' has passed {(today - notification.chapter.deadline).days} days ago!",
+        }
+        for notification in notifications
+        # A deadline moved into the future since the last generator run is no longer overdue
+        if notification.chapter.deadline < today
+    ]
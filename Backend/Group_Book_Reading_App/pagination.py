@@ -0,0 +1,140 @@
+"""
+Keyset (seek) pagination and field selection for list endpoints.
+
+List views pass their queryset and serializer class to ``list_response``:
+
+* ``?fields=id,title`` returns only the named top-level fields and only loads those columns;
+* ``?expand=book`` embeds only the listed nested relations, the others are returned as ids;
+* unknown names in ``fields`` or ``expand`` are rejected with 400, listing them;
+* responses are pages ``{"results": [...], "next_cursor": ..., "has_more": ...}`` ordered by id,
+  of ``?limit=<n>`` rows (``DEFAULT_PAGE_SIZE`` when not sent, at most ``MAX_PAGE_SIZE``), where
+  ``?cursor=<next_cursor>`` fetches the following page with ``WHERE id > <cursor>`` instead of an
+  OFFSET scan;
+* ``?limit=all`` opts out of paging and returns the full list as a bare array, as before.
+
+Serializers that declare a ``row_serializer`` are rendered from ``values_list()`` rows by
+their compiled counterpart (see fast_serializers.py) instead of from model instances.
+"""
+
+import base64
+from rest_framework.exceptions import ParseError
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def _csv(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def encode_cursor(last_id):
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        return int(base64.urlsafe_b64decode((cursor + "=" * (-len(cursor) % 4)).encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise ParseError("Invalid cursor.")
+
+
+# Query parameters of a DRF request or of a plain Django request (async views)
+def _query_params(request):
+    return getattr(request, 'query_params', request.GET)
+
+
+# Parse the `fields` and `expand` query parameters
+def field_selection(request):
+    params = _query_params(request)
+    fields = _csv(params['fields']) if params.get('fields') else None
+    expand = _csv(params['expand']) if 'expand' in params else None
+    return fields, expand
+
+
+# Reject `fields` and `expand` names the serializer does not have, so typos do not go unnoticed
+def _validate_selection(fields, expand, serializer_class):
+    for param, names, known in (
+        ('fields', fields, serializer_class.readable_fields()),
+        ('expand', expand, serializer_class.expandable_fields),
+    ):
+        unknown = [name for name in names or () if name not in known]
+        if unknown:
+            raise ParseError(f"Unknown {param}: {', '.join(unknown)}. Valid {param}: {', '.join(sorted(known)) or 'none'}.")
+
+
+# Queryset to evaluate for a list request, and the page size (None when the full list is requested with limit=all).
+# Serializers with a row_serializer are rendered from values_list() rows, the others from optimized model instances.
+def _list_query(request, queryset, serializer_class):
+    fields, expand = field_selection(request)
+    _validate_selection(fields, expand, serializer_class)
+    if serializer_class.row_serializer is not None:
+        queryset = serializer_class.row_serializer.rows_queryset(queryset, fields, expand)
+    else:
+        queryset = serializer_class.optimize_queryset(queryset, fields, expand)
+    params = _query_params(request)
+    if params.get('limit') == 'all':
+        if params.get('cursor'):
+            raise ParseError("limit=all cannot be combined with cursor.")
+        return queryset, None
+    try:
+        limit = int(params.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ParseError("limit must be an integer or 'all'.")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    queryset = queryset.order_by('id')
+    if params.get('cursor'):
+        queryset = queryset.filter(id__gt=decode_cursor(params['cursor']))
+    # Fetch one extra row to learn whether another page follows
+    return queryset[:limit + 1], limit
+
+
+# Rows of the response (the page without the extra row) and whether another page follows
+def _page(rows, limit):
+    if limit is None:
+        return rows, False
+    return rows[:limit], len(rows) > limit
+
+
+def _list_data(request, rows, limit, serializer_class, related_rows=None):
+    fields, expand = field_selection(request)
+    page, has_more = _page(rows, limit)
+    if serializer_class.row_serializer is not None:
+        results = serializer_class.row_serializer.build(page, related_rows, fields, expand)
+        last_id = page[-1][0] if page else None
+    else:
+        results = serializer_class(page, many=True, fields=fields, expand=expand).data
+        last_id = page[-1].id if page else None
+    if limit is None:
+        return results
+    return {
+        "results": results,
+        "next_cursor": encode_cursor(last_id) if page else _query_params(request).get('cursor'),
+        "has_more": has_more,
+    }
+
+
+# Many-to-many queries of a row serializer for the rows of the response
+def _related_queries(request, rows, limit, serializer_class):
+    if serializer_class.row_serializer is None:
+        return {}
+    fields, expand = field_selection(request)
+    return serializer_class.row_serializer.related_queries(_page(rows, limit)[0], fields, expand)
+
+
+# Serialize a list endpoint's queryset, applying field selection and keyset pagination (unless limit=all)
+def list_response(request, queryset, serializer_class):
+    queryset, limit = _list_query(request, queryset, serializer_class)
+    rows = list(queryset)
+    related_rows = {name: list(query) for name, query in _related_queries(request, rows, limit, serializer_class).items()}
+    return _list_data(request, rows, limit, serializer_class, related_rows)
+
+
+# Async variant of list_response for the ASGI read views
+async def alist_response(request, queryset, serializer_class):
+    queryset, limit = _list_query(request, queryset, serializer_class)
+    rows = [row async for row in queryset]
+    related_rows = {
+        name: [row async for row in query]
+        for name, query in _related_queries(request, rows, limit, serializer_class).items()
+    }
+    return _list_data(request, rows, limit, serializer_class, related_rows)
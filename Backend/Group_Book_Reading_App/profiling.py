@@ -0,0 +1,272 @@
+"""
+Per-request profiling and query budgets.
+
+``RequestProfilingMiddleware`` records, for every request, the number of SQL
+queries, the time spent in SQL, the time spent in serializers and the total
+time. Samples are aggregated per URL name in a bounded in-process window and
+exposed as p50/p95/p99 by the admin metrics endpoint (JSON or Prometheus text).
+
+Queries are counted by ``count_queries``, an execute wrapper that every
+database connection gets when it opens (see signals.py). It adds to the profile
+of the request in the current context, which follows the request into the
+threads that run sync views (and async ORM calls) under ASGI. Streaming
+responses are recorded once their body has been sent, so the queries that run
+while streaming are counted too.
+
+Views can be given query budgets in ``PROFILING['QUERY_BUDGETS']``; a request
+that exceeds its view's budget is logged, or raises ``QueryBudgetExceeded`` when
+``PROFILING['BUDGET_MODE']`` is ``'raise'`` (use that in tests to catch N+1
+regressions).
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from functools import partial
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILING = {
+    'ENABLED': True,
+    'WINDOW_SIZE': 1000,  # Samples kept per URL name
+    'QUERY_BUDGETS': {},  # {url_name: max queries per request}
+    'BUDGET_MODE': 'log',  # 'log' or 'raise'
+}
+METRICS = ('total_ms', 'sql_ms', 'sql_queries', 'serializer_ms')
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def profiling_settings():
+    return {**DEFAULT_PROFILING, **getattr(settings, 'PROFILING', {})}
+
+
+# Raised in 'raise' budget mode when a view runs more queries than its budget allows
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+# Counters of the request being processed; None outside a profiled request
+_current = ContextVar('request_profile', default=None)
+
+
+class RequestProfile:
+    def __init__(self):
+        self.sql_queries = 0
+        self.sql_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.serializer_depth = 0
+
+    # Database execute wrapper counting queries and their duration
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_queries += 1
+            self.sql_seconds += time.perf_counter() - start
+
+
+# Execute wrapper counting a query into the profile of the current request, if any
+def count_queries(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    return profile(execute, sql, params, many, context)
+
+
+# connection_created receiver installing count_queries on every connection, in whichever thread it opens.
+# Inserted first: execute_wrapper() context managers remove the last wrapper when they exit.
+def install_query_counter(sender, connection, **kwargs):
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, count_queries)
+
+
+# Wrap a serializer's to_representation (or a row serializer's build) so the outermost call is timed for the current request
+def timed_representation(to_representation):
+    def wrapper(*args, **kwargs):
+        profile = _current.get()
+        if profile is None or profile.serializer_depth:
+            return to_representation(*args, **kwargs)
+        profile.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return to_representation(*args, **kwargs)
+        finally:
+            profile.serializer_seconds += time.perf_counter() - start
+            profile.serializer_depth -= 1
+    return wrapper
+
+
+# Bounded window of recent samples per URL name
+class MetricsRegistry:
+    def __init__(self, window_size):
+        self.window_size = window_size
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._counts = {}
+
+    def record(self, name, sample):
+        with self._lock:
+            if name not in self._samples:
+                self._samples[name] = deque(maxlen=self.window_size)
+                self._counts[name] = 0
+            self._samples[name].append(sample)
+            self._counts[name] += 1
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+
+    # p50/p95/p99 (and max) of every metric over the window, per URL name
+    def snapshot(self):
+        with self._lock:
+            windows = {name: list(samples) for name, samples in self._samples.items()}
+            counts = dict(self._counts)
+        summary = {}
+        for name, samples in sorted(windows.items()):
+            entry = {"requests": counts[name], "window": len(samples)}
+            for index, metric in enumerate(METRICS):
+                values = sorted(sample[index] for sample in samples)
+                entry[metric] = {f"p{int(q * 100)}": _quantile(values, q) for q in QUANTILES}
+                entry[metric]["max"] = round(values[-1], 3)
+            summary[name] = entry
+        return summary
+
+
+def _quantile(sorted_values, q):
+    index = min(int(q * len(sorted_values)), len(sorted_values) - 1)
+    return round(sorted_values[index], 3)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = MetricsRegistry(profiling_settings()['WINDOW_SIZE'])
+    return _registry
+
+
+# Render a metrics snapshot in the Prometheus text exposition format (as summaries)
+def prometheus_text(snapshot):
+    lines = []
+    for metric in METRICS:
+        name = f"grouped_reading_request_{metric}"
+        lines.append(f"# TYPE {name} summary")
+        for view, entry in snapshot.items():
+            for q in QUANTILES:
+                lines.append(f'{name}{{view="{view}",quantile="{q}"}} {entry[metric][f"p{int(q * 100)}"]}')
+            lines.append(f'{name}_count{{view="{view}"}} {entry["requests"]}')
+    return "\n".join(lines) + "\n"
+
+
+# Stream the chunks of a streaming response in the context of its request's profile, then call `finish`
+def _profiled_stream(content, profile, finish):
+    iterator = iter(content)
+    try:
+        while True:
+            token = _current.set(profile)
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                _current.reset(token)
+            yield chunk
+    finally:
+        finish()
+
+
+async def _aprofiled_stream(content, profile, finish):
+    iterator = aiter(content)
+    try:
+        while True:
+            token = _current.set(profile)
+            try:
+                chunk = await anext(iterator)
+            except StopAsyncIteration:
+                break
+            finally:
+                _current.reset(token)
+            yield chunk
+    finally:
+        finish()
+
+
+# Middleware recording query count, SQL time, serializer time and total time of every request.
+# Sync and async capable, so an ASGI deployment keeps async views on the event loop.
+class RequestProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = profiling_settings()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.config['ENABLED']:
+            return self.get_response(request)
+        profile, start = RequestProfile(), time.perf_counter()
+        token = _current.set(profile)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._record(request, response, profile, start)
+
+    async def __acall__(self, request):
+        if not self.config['ENABLED']:
+            return await self.get_response(request)
+        profile, start = RequestProfile(), time.perf_counter()
+        token = _current.set(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._record(request, response, profile, start)
+
+    # Record the request now, or once the body of a streaming response has been sent
+    def _record(self, request, response, profile, start):
+        if not response.streaming:
+            self._finish(request, profile, start)
+            return response
+        finish = partial(self._finish, request, profile, start)
+        if response.is_async:
+            response.streaming_content = _aprofiled_stream(response.streaming_content, profile, finish)
+        else:
+            response.streaming_content = _profiled_stream(response.streaming_content, profile, finish)
+        return response
+
+    def _finish(self, request, profile, start):
+        total_seconds = time.perf_counter() - start
+        match = getattr(request, 'resolver_match', None)
+        name = (match.url_name or match.route) if match else 'unmatched'
+        get_registry().record(name, (
+            total_seconds * 1000,
+            profile.sql_seconds * 1000,
+            profile.sql_queries,
+            profile.serializer_seconds * 1000,
+        ))
+        self.check_budget(name, profile.sql_queries)
+
+    def check_budget(self, name, sql_queries):
+        budget = self.config['QUERY_BUDGETS'].get(name)
+        if budget is None or sql_queries <= budget:
+            return
+        message = f"{name} ran {sql_queries} SQL queries, over its budget of {budget}"
+        if self.config['BUDGET_MODE'] == 'raise':
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
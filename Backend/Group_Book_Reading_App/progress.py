@@ -0,0 +1,120 @@
+"""
+Set-based reading progress engine.
+
+Loads members, chapters and read marks for a batch of groups in a fixed number
+of bulk queries and computes read / not-read lists in memory, so the cost of a
+progress response does not grow with the number of groups, chapters or members.
+"""
+
+from collections import defaultdict
+from .models import Group, Chapter
+
+GroupMembership = Group.members.through
+ChapterReadMark = Chapter.is_read.through
+
+
+# Compute read percentage capped at 100, matching the legacy progress response
+def read_percentage(read_count, total_members):
+    if total_members <= 0:
+        return 0
+    return min((read_count / total_members) * 100, 100.0)
+
+
+# The three bulk queries behind a progress payload: memberships, chapters and read marks of the groups
+def _progress_queries(group_ids):
+    membership_rows = (
+        GroupMembership.objects
+        .filter(group_id__in=group_ids)
+        .values_list('group_id', 'customuser_id', 'customuser__username')
+        .order_by('customuser_id')
+    )
+    chapter_rows = (
+        Chapter.objects
+        .filter(group_id__in=group_ids)
+        .values('id', 'group_id', 'title', 'deadline')
+        .order_by('id')
+    )
+    read_rows = (
+        ChapterReadMark.objects
+        .filter(chapter__group_id__in=group_ids)
+        .values_list('chapter_id', 'customuser_id', 'customuser__username')
+        .order_by('id')
+    )
+    return membership_rows, chapter_rows, read_rows
+
+
+# Build the progress payload for the given groups (one entry per group that has chapters)
+def build_progress(groups):
+    groups = list(groups)
+    if not groups:
+        return []
+    membership_rows, chapter_rows, read_rows = _progress_queries([group.id for group in groups])
+    return _assemble_progress(groups, membership_rows, chapter_rows, read_rows)
+
+
+# Async variant of build_progress for the ASGI read views
+async def abuild_progress(groups):
+    if not groups:
+        return []
+    membership_rows, chapter_rows, read_rows = _progress_queries([group.id for group in groups])
+    return _assemble_progress(
+        groups,
+        [row async for row in membership_rows],
+        [row async for row in chapter_rows],
+        [row async for row in read_rows],
+    )
+
+
+# Progress entry of a single group whose members are already loaded (e.g. prefetched by GroupSerializer);
+# None when the group has no chapters
+def build_group_progress(group):
+    membership_rows = sorted((group.id, member.id, member.username) for member in group.members.all())
+    _, chapter_rows, read_rows = _progress_queries([group.id])
+    progress_data = _assemble_progress([group], membership_rows, chapter_rows, read_rows)
+    return progress_data[0] if progress_data else None
+
+
+def _assemble_progress(groups, membership_rows, chapter_rows, read_rows):
+    # Group members, keyed by group id: {group_id: {user_id: username}}
+    members_by_group = defaultdict(dict)
+    for group_id, user_id, username in membership_rows:
+        members_by_group[group_id][user_id] = username
+
+    # Chapters, keyed by group id, in primary key order
+    chapters_by_group = defaultdict(list)
+    for chapter in chapter_rows:
+        chapters_by_group[chapter['group_id']].append(chapter)
+
+    # Read marks, keyed by chapter id: {chapter_id: {user_id: username}}
+    readers_by_chapter = defaultdict(dict)
+    for chapter_id, user_id, username in read_rows:
+        readers_by_chapter[chapter_id][user_id] = username
+
+    progress_data = []
+    for group in groups:
+        chapters = chapters_by_group.get(group.id)
+        if not chapters:
+            continue
+        members = members_by_group.get(group.id, {})
+        total_members = len(members)
+        group_data = {
+            "group_id": group.id,
+            "group_name": group.name,
+            "total_members": total_members,
+            "chapters": [],
+        }
+        for chapter in chapters:
+            readers = readers_by_chapter.get(chapter['id'], {})
+            group_data["chapters"].append({
+                "chapter_id": chapter['id'],
+                "title": chapter['title'],
+                "deadline": chapter['deadline'],
+                "read_percentage": read_percentage(len(readers), total_members),
+                "read_users": [{"id": user_id, "username": username} for user_id, username in readers.items()],
+                "not_read_users": [
+                    {"id": user_id, "username": username}
+                    for user_id, username in members.items() if user_id not in readers
+                ],
+            })
+        progress_data.append(group_data)
+    return progress_data
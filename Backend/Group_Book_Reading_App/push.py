@@ -0,0 +1,115 @@
+"""
+Server-Sent Events push of new discussion posts.
+
+``publish_discussion`` is called by the write path once the post is committed;
+``discussion_event_stream`` is the async generator behind the SSE endpoint. The
+stream is only routed under ``SERVER_PROFILE = 'asgi'``: served by the ASGI
+application (``Group_Book_Reading_Platform.asgi``) idle subscribers do not hold
+a worker thread, while a WSGI worker would be tied up for the whole stream.
+
+``EventSource`` cannot send an Authorization header, so clients first exchange
+their access token for a stream token and pass it in the ``stream_token`` query
+parameter. Query strings end up in server and proxy access logs, so a stream
+token only opens the stream of one group and expires after
+``STREAM_TOKEN_SECONDS``; it is checked when the stream opens, and a client
+that reconnects later asks for a new one.
+"""
+
+import asyncio
+import json
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.tokens import Token
+from .authentication import ClaimsJWTAuthentication, CLAIM_FIELDS
+from .broker import get_broker, discussion_channel
+from .discussions import discussion_feed, encode_cursor, FEED_MAX_PAGE_SIZE
+
+KEEPALIVE_SECONDS = 15
+RETRY_MILLISECONDS = 3000
+STREAM_TOKEN_SECONDS = 60
+
+
+# Short-lived token that only authenticates the discussion stream of one group
+class StreamToken(Token):
+    token_type = 'stream'
+    lifetime = timedelta(seconds=STREAM_TOKEN_SECONDS)
+
+
+# Issue a stream token for the user of an authenticated request, carrying over the claims of its access token
+def stream_token(request, group_id):
+    token = StreamToken.for_user(request.user)
+    token['group_id'] = group_id
+    for claim in ('auth_hash', *CLAIM_FIELDS):
+        if claim in request.auth:
+            token[claim] = request.auth[claim]
+    return token
+
+
+# Format a discussion as a Server-Sent Events frame; the event id doubles as a feed cursor
+def discussion_event(cursor, discussion_data):
+    data = json.dumps(discussion_data, cls=JSONEncoder)
+    return f"id: {cursor}\nevent: discussion\ndata: {data}\n\n"
+
+
+# Publish a new discussion to the subscribers of its chapter once the transaction commits
+def publish_discussion(group_id, discussion, discussion_data):
+    # Pushed posts are flat like the feed, clients thread them with the parent ids
+    discussion_data = {key: value for key, value in discussion_data.items() if key != "replies"}
+    # Encode the frame once here, every subscriber receives the same string
+    frame = discussion_event(encode_cursor(discussion.created_at, discussion.id), discussion_data)
+    message = {"id": discussion.id, "frame": frame}
+    channel = discussion_channel(group_id, discussion.chapter_id)
+    transaction.on_commit(lambda: get_broker().publish(channel, message))
+
+
+# Resolve the user of a stream request from the Authorization header or a `stream_token` query parameter
+# issued for this group (EventSource cannot send custom headers)
+def authenticate_stream_request(request, group_id):
+    authenticator = ClaimsJWTAuthentication()
+    header = authenticator.get_header(request)
+    if header:
+        raw_token = authenticator.get_raw_token(header)
+        return authenticator.get_user(authenticator.get_validated_token(raw_token)) if raw_token else None
+    raw_token = request.GET.get('stream_token')
+    if not raw_token:
+        return None
+    try:
+        validated_token = StreamToken(raw_token)
+    except TokenError as error:
+        raise InvalidToken(str(error))
+    if validated_token.get('group_id') != group_id:
+        raise InvalidToken("Stream token was issued for another group")
+    return authenticator.get_user(validated_token)
+
+
+# Async generator of SSE frames: replays posts after `last_event_id`, then relays live posts
+async def discussion_event_stream(group_id, chapter_id, last_event_id=None):
+    subscription = get_broker().subscribe(discussion_channel(group_id, chapter_id))
+    try:
+        yield f"retry: {RETRY_MILLISECONDS}\n\n"
+        replayed = set()
+        if last_event_id:
+            # Subscribed before replaying, so nothing posted in between is lost; duplicates are skipped below
+            cursor = last_event_id
+            while True:
+                page = await sync_to_async(discussion_feed)(chapter_id, cursor=cursor, limit=FEED_MAX_PAGE_SIZE)
+                for discussion_data in page["results"]:
+                    replayed.add(discussion_data["id"])
+                    cursor = encode_cursor(discussion_data["created_at"], discussion_data["id"])
+                    yield discussion_event(cursor, discussion_data)
+                if not page["has_more"]:
+                    break
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.get(), timeout=KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if message["id"] in replayed:
+                continue
+            yield message["frame"]
+    finally:
+        subscription.close()
@@ -0,0 +1,185 @@
+"""
+Incremental maintenance of the denormalized ChapterProgress read counters.
+
+Views that change read marks or group membership call into this module inside
+their own transaction, so the counters commit (or roll back) together with the
+change. The ``rebuild_read_counters`` management command rebuilds and verifies
+the whole table from the through tables.
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Prefetch
+from django.utils import timezone
+from .models import Group, Chapter, ChapterProgress
+
+GroupMembership = Group.members.through
+ChapterReadMark = Chapter.is_read.through
+
+REBUILD_BATCH_SIZE = 1000
+
+
+# Count members per group straight from the membership through table
+def _member_counts(group_ids):
+    rows = (
+        GroupMembership.objects
+        .filter(group_id__in=group_ids)
+        .values('group_id')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    return {row['group_id']: row['total'] for row in rows}
+
+
+# Count read marks per chapter straight from the is_read through table
+def _read_counts(chapter_ids):
+    rows = (
+        ChapterReadMark.objects
+        .filter(chapter_id__in=chapter_ids)
+        .values('chapter_id')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    return {row['chapter_id']: row['total'] for row in rows}
+
+
+# Recompute and upsert the counters for the given chapters
+def refresh_chapter_counters(chapter_ids):
+    chapters = list(Chapter.objects.filter(id__in=chapter_ids).values_list('id', 'group_id'))
+    if not chapters:
+        return
+    member_counts = _member_counts({group_id for _, group_id in chapters})
+    read_counts = _read_counts([chapter_id for chapter_id, _ in chapters])
+    now = timezone.now()
+    ChapterProgress.objects.bulk_create(
+        [
+            ChapterProgress(
+                chapter_id=chapter_id,
+                group_id=group_id,
+                read_count=read_counts.get(chapter_id, 0),
+                member_count=member_counts.get(group_id, 0),
+                updated_at=now,
+            )
+            for chapter_id, group_id in chapters
+        ],
+        update_conflicts=True,
+        unique_fields=['chapter'],
+        update_fields=['group', 'read_count', 'member_count', 'updated_at'],
+    )
+
+
+# Apply a +1 / -1 change to a chapter's read counter after a read mark is added or removed
+def record_read_mark(chapter, delta):
+    updated = ChapterProgress.objects.filter(chapter=chapter).update(
+        read_count=F('read_count') + delta,
+        updated_at=timezone.now(),
+    )
+    if not updated:
+        # No counter row yet (e.g. data written outside the API), compute it from scratch
+        refresh_chapter_counters([chapter.id])
+
+
+# Toggle a user's read mark on a chapter; returns True when the chapter ends up read.
+# The counter moves by the rows this call actually deleted or inserted, so concurrent toggles and
+# double submits of the same user cannot make it drift from the through table.
+def toggle_read_mark(chapter, user):
+    deleted, _ = ChapterReadMark.objects.filter(chapter=chapter, customuser=user).delete()
+    if deleted:
+        record_read_mark(chapter, -deleted)
+        return False
+    try:
+        with transaction.atomic():
+            ChapterReadMark.objects.create(chapter=chapter, customuser=user)
+    except IntegrityError:
+        return True  # A concurrent request inserted (and counted) the same mark
+    record_read_mark(chapter, 1)
+    return True
+
+
+# Propagate a membership change to the member counters of every chapter in the group
+def record_membership_change(group):
+    member_count = GroupMembership.objects.filter(group=group).count()
+    ChapterProgress.objects.filter(group=group).update(
+        member_count=member_count,
+        updated_at=timezone.now(),
+    )
+
+
+# Read percentages per chapter of a user's groups, from the counters. Every group of the user is listed,
+# including groups without chapters; chapters that have no counter row yet (e.g. bulk-inserted) are
+# counted from the through tables instead of being left out.
+def progress_summary(user):
+    groups = list(
+        Group.objects
+        .filter(members=user)
+        .order_by('id')
+        .prefetch_related(Prefetch('chapters', queryset=Chapter.objects.select_related('progress').order_by('id')))
+    )
+    counters = {}
+    for group in groups:
+        for chapter in group.chapters.all():
+            try:
+                counters[chapter.id] = chapter.progress
+            except ChapterProgress.DoesNotExist:
+                pass
+    uncounted_chapters = [chapter.id for group in groups for chapter in group.chapters.all() if chapter.id not in counters]
+    uncounted_groups = [group.id for group in groups if not any(chapter.id in counters for chapter in group.chapters.all())]
+    read_counts = _read_counts(uncounted_chapters) if uncounted_chapters else {}
+    member_counts = _member_counts(uncounted_groups) if uncounted_groups else {}
+    summary = []
+    for group in groups:
+        chapters = list(group.chapters.all())
+        counted = [counters[chapter.id] for chapter in chapters if chapter.id in counters]
+        total_members = counted[0].member_count if counted else member_counts.get(group.id, 0)
+        chapter_rows = []
+        for chapter in chapters:
+            counter = counters.get(chapter.id) or ChapterProgress(
+                chapter=chapter,
+                group=group,
+                read_count=read_counts.get(chapter.id, 0),
+                member_count=total_members,
+            )
+            chapter_rows.append({
+                "chapter_id": chapter.id,
+                "title": chapter.title,
+                "deadline": chapter.deadline,
+                "read_count": counter.read_count,
+                "read_percentage": counter.read_percentage,
+            })
+        summary.append({
+            "group_id": group.id,
+            "group_name": group.name,
+            "total_members": total_members,
+            "chapters": chapter_rows,
+        })
+    return summary
+
+
+# Rebuild the whole counter table in batches
+def rebuild_counters():
+    chapter_ids = list(Chapter.objects.order_by('id').values_list('id', flat=True))
+    ChapterProgress.objects.exclude(chapter_id__in=chapter_ids).delete()
+    for start in range(0, len(chapter_ids), REBUILD_BATCH_SIZE):
+        refresh_chapter_counters(chapter_ids[start:start + REBUILD_BATCH_SIZE])
+    return len(chapter_ids)
+
+
+# Compare stored counters against the through tables and return the chapter ids that drifted
+def verify_counters():
+    member_counts = dict(
+        GroupMembership.objects.values('group_id').annotate(total=Count('id')).order_by().values_list('group_id', 'total')
+    )
+    read_counts = dict(
+        ChapterReadMark.objects.values('chapter_id').annotate(total=Count('id')).order_by().values_list('chapter_id', 'total')
+    )
+    stored = {
+        chapter_id: (group_id, read_count, member_count)
+        for chapter_id, group_id, read_count, member_count in ChapterProgress.objects.values_list(
+            'chapter_id', 'group_id', 'read_count', 'member_count'
+        )
+    }
+    mismatched = []
+    for chapter_id, group_id in Chapter.objects.order_by('id').values_list('id', 'group_id').iterator():
+        expected = (group_id, read_counts.get(chapter_id, 0), member_counts.get(group_id, 0))
+        if stored.get(chapter_id) != expected:
+            mismatched.append(chapter_id)
+    return mismatched
@@ -0,0 +1,106 @@
+"""
+JSON renderer and parser backed by orjson, with pre-encoded fragments.
+
+``FastJSONRenderer`` renders the same bytes as DRF's ``JSONRenderer`` (compact
+separators, UTF-8, ``Z`` for UTC datetimes, escaped U+2028/U+2029) but encodes
+with orjson when it is installed (``requirements-optional.txt``); without it, or for
+indented output and values orjson cannot encode, it falls back to DRF's
+encoder. ``FastJSONParser`` likewise parses UTF-8 request bodies with orjson.
+
+A ``Fragment`` holds already encoded JSON. It can be placed anywhere in the
+data given to the renderer and is spliced into the output verbatim, so
+payloads that do not change between requests (e.g. cached catalog data, see
+catalog_cache.py) are encoded once and not on every response.
+"""
+
+import re
+import secrets
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # Optional: the renderer and parser fall back to the standard library
+    orjson = None
+
+ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z) if orjson else 0
+# Fragments are encoded as a quoted placeholder that is replaced after encoding
+_PLACEHOLDER = f"__fragment_{secrets.token_hex(8)}_"
+_PLACEHOLDER_PATTERN = re.compile(rb'"' + re.escape(_PLACEHOLDER.encode()) + rb'(\d+)"')
+
+
+# Already encoded JSON, spliced verbatim into the rendered output
+class Fragment:
+    __slots__ = ('content',)
+
+    def __init__(self, content):
+        self.content = content
+
+    def __getstate__(self):
+        return self.content
+
+    def __setstate__(self, content):
+        self.content = content
+
+
+class _FragmentEncoder(JSONEncoder):
+    def __init__(self, *args, fragments, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fragments = fragments
+
+    def default(self, obj):
+        if isinstance(obj, Fragment):
+            self.fragments.append(obj.content)
+            return f"{_PLACEHOLDER}{len(self.fragments) - 1}"
+        return super().default(obj)
+
+
+def _splice(content, fragments):
+    if not fragments:
+        return content
+    return _PLACEHOLDER_PATTERN.sub(lambda match: fragments[int(match.group(1))], content)
+
+
+def _escape_separators(content):
+    # Same as DRF: keep the output a strict JavaScript subset
+    return content.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if isinstance(data, Fragment):
+            return data.content
+        fragments = []
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if orjson is not None and indent is None and self.compact and not self.ensure_ascii:
+            encoder = _FragmentEncoder(fragments=fragments)
+            try:
+                content = orjson.dumps(data, default=encoder.default, option=ORJSON_OPTIONS)
+            except orjson.JSONEncodeError:
+                fragments.clear()
+            else:
+                return _splice(_escape_separators(content), fragments)
+        self.encoder_class = lambda *args, **kwargs: _FragmentEncoder(*args, fragments=fragments, **kwargs)
+        return _splice(super().render(data, accepted_media_type, renderer_context), fragments)
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        if orjson is None or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+# Encode data once into a Fragment (with the same encoding as FastJSONRenderer)
+def encode_fragment(data):
+    return Fragment(FastJSONRenderer().render(data))
@@ -0,0 +1,137 @@
+"""
+Read-replica routing with read-your-writes consistency.
+
+``ReplicaRouter`` sends the reads of safe requests (GET, HEAD, OPTIONS) to one
+of the replica aliases listed in the REPLICA_ROUTING setting, picked once per
+request so that all of a request's queries see the same snapshot. Writes, the
+reads of unsafe requests, reads inside a transaction on the primary, and
+everything outside a request (management commands, workers) use the primary.
+
+Replicas lag behind the primary, so after a user's successful unsafe request
+``ReplicaPinningMiddleware`` records a pin for that user in the cache for
+``PIN_SECONDS``. While it lasts, authentication (see authentication.py) routes
+the user's reads to the primary and they always see their own posts and read
+marks. The pin is read by whichever process serves the user's next request,
+so with replicas configured ``CACHE_ALIAS`` must name a shared cache (see
+checks.py). Cache fills whose entries are shared or outlive a request (catalog,
+membership, auth state) read from the primary with ``primary_reads()`` so a
+lagging replica cannot put stale data into them.
+
+Without replicas configured, the router leaves every query on the primary.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+
+DEFAULT_REPLICA_ROUTING = {
+    'REPLICAS': [],  # Database aliases of the read replicas
+    'PIN_SECONDS': 5,  # Reads of a user stay on the primary this long after their last write
+    'CACHE_ALIAS': 'default',  # Holds the pins; must be a shared cache (checks.py enforces it when REPLICAS is set)
+}
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Replica alias serving the reads of the current request (None: the primary)
+_read_alias = ContextVar('replica_read_alias', default=None)
+
+
+def _config():
+    return {**DEFAULT_REPLICA_ROUTING, **getattr(settings, 'REPLICA_ROUTING', {})}
+
+
+def _pin_key(user_id):
+    return f"replica:pin:{user_id}"
+
+
+# Keep the user's reads on the primary for PIN_SECONDS
+def pin_user(user_id):
+    config = _config()
+    if config['REPLICAS']:
+        caches[config['CACHE_ALIAS']].set(_pin_key(user_id), True, timeout=config['PIN_SECONDS'])
+
+
+# Route the rest of the current request to the primary if the user wrote within PIN_SECONDS
+def apply_user_pin(user_id):
+    if _read_alias.get() is not None and caches[_config()['CACHE_ALIAS']].get(_pin_key(user_id)):
+        _read_alias.set(None)
+
+
+# Send the reads in the block to the primary
+@contextmanager
+def primary_reads():
+    token = _read_alias.set(None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db == DEFAULT_DB_ALIAS:
+            return DEFAULT_DB_ALIAS  # Related objects of a row read from (or written to) the primary
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {DEFAULT_DB_ALIAS, *_config()['REPLICAS']}
+        return obj1._state.db in pool and obj2._state.db in pool
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        return db not in _config()['REPLICAS']
+
+
+# Chooses the replica of each safe request and pins users after their writes
+class ReplicaPinningMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _read_alias.set(self._read_alias(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        self._pin_writer(request, response)
+        return response
+
+    async def __acall__(self, request):
+        token = _read_alias.set(self._read_alias(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        self._pin_writer(request, response)
+        return response
+
+    @staticmethod
+    def _read_alias(request):
+        replicas = _config()['REPLICAS']
+        if request.method in SAFE_METHODS and replicas:
+            return random.choice(replicas)
+        return None
+
+    @staticmethod
+    def _pin_writer(request, response):
+        # DRF sets the authenticated user on the underlying request
+        user = getattr(request, 'user', None)
+        if request.method not in SAFE_METHODS and response.status_code < 400 and user is not None and user.is_authenticated:
+            pin_user(user.id)
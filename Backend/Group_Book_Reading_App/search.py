@@ -0,0 +1,109 @@
+"""
+Full-text search over books and discussions.
+
+On SQLite the search runs against the FTS5 indexes created by migration
+0010_search_index (kept in sync by triggers), ranked with bm25 and returned
+with highlighted snippets. Other databases fall back to a LIKE-based search
+without ranking. Discussion results are restricted to the groups the caller
+belongs to.
+"""
+
+import re
+from datetime import timezone as dt_timezone
+from django.db import connection
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import is_naive, make_aware
+from .models import Book, Discussion
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+SNIPPET_TOKENS = 12
+
+# bm25 column weights for title, author, genre, description
+BOOK_SEARCH_SQL = """
+    SELECT b.id, b.title, b.author, b.genre,
+           snippet("Group_Book_Reading_App_book_fts", -1, '<mark>', '</mark>', '…', %s) AS snippet,
+           bm25("Group_Book_Reading_App_book_fts", 10.0, 5.0, 2.0, 1.0) AS rank
+    FROM "Group_Book_Reading_App_book_fts"
+    JOIN "Group_Book_Reading_App_book" b ON b.id = "Group_Book_Reading_App_book_fts".rowid
+    WHERE "Group_Book_Reading_App_book_fts" MATCH %s
+    ORDER BY rank
+    LIMIT %s OFFSET %s
+"""
+
+DISCUSSION_SEARCH_SQL = """
+    SELECT d.id, d.chapter_id, c.group_id, d.parent_id, d.user_id, u.username, d.created_at,
+           snippet("Group_Book_Reading_App_discussion_fts", 0, '<mark>', '</mark>', '…', %s) AS snippet,
+           bm25("Group_Book_Reading_App_discussion_fts") AS rank
+    FROM "Group_Book_Reading_App_discussion_fts"
+    JOIN "Group_Book_Reading_App_discussion" d ON d.id = "Group_Book_Reading_App_discussion_fts".rowid
+    JOIN "Group_Book_Reading_App_chapter" c ON c.id = d.chapter_id
+    JOIN "Group_Book_Reading_App_group_members" gm ON gm.group_id = c.group_id AND gm.customuser_id = %s
+    JOIN "Group_Book_Reading_App_customuser" u ON u.id = d.user_id
+    WHERE "Group_Book_Reading_App_discussion_fts" MATCH %s
+    ORDER BY rank
+    LIMIT %s OFFSET %s
+"""
+
+
+# Split free text into search terms (anything that is not a word character separates terms)
+def search_terms(text):
+    return re.findall(r"\w+", text or "")
+
+
+# Build an FTS5 MATCH expression: every term must match, the last one as a prefix (search-as-you-type)
+def match_expression(terms):
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _fetch(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def _page(rows, limit):
+    return {"results": rows[:limit], "has_more": len(rows) > limit}
+
+
+# Ranked book search; returns one page of results
+def search_books(terms, limit=SEARCH_PAGE_SIZE, offset=0):
+    if connection.vendor == 'sqlite':
+        rows = _fetch(BOOK_SEARCH_SQL, [SNIPPET_TOKENS, match_expression(terms), limit + 1, offset])
+        return _page(rows, limit)
+    books = Book.objects.all()
+    for term in terms:
+        books = books.filter(
+            Q(title__icontains=term) | Q(author__icontains=term) | Q(genre__icontains=term) | Q(description__icontains=term)
+        )
+    rows = [
+        {"id": book.id, "title": book.title, "author": book.author, "genre": book.genre,
+         "snippet": book.description[:200], "rank": None}
+        for book in books.order_by('title', 'id')[offset:offset + limit + 1]
+    ]
+    return _page(rows, limit)
+
+
+# Ranked search over the discussions of the groups the user belongs to; returns one page of results
+def search_discussions(user, terms, limit=SEARCH_PAGE_SIZE, offset=0):
+    if connection.vendor == 'sqlite':
+        rows = _fetch(DISCUSSION_SEARCH_SQL, [SNIPPET_TOKENS, user.id, match_expression(terms), limit + 1, offset])
+        for row in rows:
+            # Raw SQLite queries return timestamps as naive UTC strings
+            created_at = parse_datetime(row["created_at"]) if isinstance(row["created_at"], str) else row["created_at"]
+            row["created_at"] = make_aware(created_at, dt_timezone.utc) if is_naive(created_at) else created_at
+        return _page(rows, limit)
+    discussions = Discussion.objects.filter(chapter__group__members=user).select_related('user', 'chapter')
+    for term in terms:
+        discussions = discussions.filter(content__icontains=term)
+    rows = [
+        {"id": discussion.id, "chapter_id": discussion.chapter_id, "group_id": discussion.chapter.group_id,
+         "parent_id": discussion.parent_id, "user_id": discussion.user_id, "username": discussion.user.username,
+         "created_at": discussion.created_at, "snippet": discussion.content[:200], "rank": None}
+        for discussion in discussions.order_by('-created_at', '-id')[offset:offset + limit + 1]
+    ]
+    return _page(rows, limit)
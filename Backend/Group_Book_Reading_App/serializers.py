@@ -1,6 +1,81 @@
+from functools import cache
 from rest_framework import serializers
-from .models import CustomUser, Book, Group, Chapter, Discussion
+from .models import CustomUser, Book, Group, Chapter, Discussion, Job
+from .discussions import DiscussionTree
+from .profiling import timed_representation
+from .fast_serializers import BookRows, GroupRows, ChapterRows
 from django.contrib.auth.password_validation import validate_password
+from django.db import models
+from django.db.models import Prefetch, prefetch_related_objects
+
+
+def _relation_name(lookup):
+    return lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup.split('__')[0]
+
+
+# Mixin for serializers that declare the relations they read, so every queryset or instance
+# they are given is loaded with select_related/prefetch_related instead of one query per object.
+# It also supports field selection: `fields` keeps only the named top-level fields and `expand`
+# lists the nested relations to embed (the other expandable relations are rendered as primary keys).
+class QuerysetOptimizingMixin:
+    select_related_fields = ()  # Forward foreign keys, joined into the main query
+    prefetch_related_fields = ()  # Many-valued relations (names or Prefetch objects), one query each
+    expandable_fields = ()  # Nested relations that `expand` can collapse to primary keys
+    row_serializer = None  # Compiled read-only counterpart used by list responses (fast_serializers.py)
+
+    # Names of the fields a response can contain, which are the names `fields` can select
+    @classmethod
+    @cache
+    def readable_fields(cls):
+        return frozenset(name for name, field in cls().fields.items() if not field.write_only)
+
+    # Apply the declared relation loading (restricted to the selected fields) to a queryset
+    @classmethod
+    def optimize_queryset(cls, queryset, fields=None, expand=None):
+        selected = set(fields) if fields else None
+        select_related = [
+            name for name in cls.select_related_fields
+            if (selected is None or name in selected) and (expand is None or name not in cls.expandable_fields or name in expand)
+        ]
+        prefetch_related = [
+            lookup for lookup in cls.prefetch_related_fields
+            if selected is None or _relation_name(lookup) in selected
+        ]
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        if selected is not None:
+            # Only load the selected columns (plus the primary key)
+            concrete = {field.name for field in queryset.model._meta.concrete_fields}
+            queryset = queryset.only(*({queryset.model._meta.pk.name} | (selected & concrete)))
+        return queryset
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        if args and isinstance(args[0], models.QuerySet):
+            args = (cls.optimize_queryset(args[0], kwargs.get('fields'), kwargs.get('expand')),) + args[1:]
+        return super().many_init(*args, **kwargs)
+
+    def __init__(self, instance=None, *args, fields=None, expand=None, **kwargs):
+        # Read-only serialization of a single object: load its relations up front as well
+        if isinstance(instance, models.Model) and 'data' not in kwargs:
+            prefetch_related_objects([instance], *self.select_related_fields, *self.prefetch_related_fields)
+        super().__init__(instance, *args, **kwargs)
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        if expand is not None:
+            for name in self.expandable_fields:
+                if name in self.fields and name not in expand:
+                    many = isinstance(self.fields[name], serializers.ListSerializer)
+                    self.fields[name] = serializers.PrimaryKeyRelatedField(read_only=True, many=many)
+
+    # Serializer time is reported per request by the profiling middleware
+    @timed_representation
+    def to_representation(self, instance):
+        return super().to_representation(instance)
+
 
 # Serializer for user registration
 class RegisterSerializer(serializers.ModelSerializer):
@@ -23,14 +98,15 @@ class RegisterSerializer(serializers.ModelSerializer):
 
 
 # Serializer for basic user details based on the roles admin/member.
-class CustomUserSerializer(serializers.ModelSerializer):
+class CustomUserSerializer(QuerysetOptimizingMixin, serializers.ModelSerializer):
     class Meta:
         model = CustomUser
         fields = ['id', 'username','role']  # Only return ID and username
 
 
 # Serializer for books
-class BookSerializer(serializers.ModelSerializer):
+class BookSerializer(QuerysetOptimizingMixin, serializers.ModelSerializer):
+    row_serializer = BookRows
     class Meta:
         model = Book
         fields = '__all__'  # Include all fields in the Book model
@@ -44,17 +120,24 @@ class MemberSerializer(serializers.ModelSerializer):
 
 
 # Serializer for groups
-class GroupSerializer(serializers.ModelSerializer):
+class GroupSerializer(QuerysetOptimizingMixin, serializers.ModelSerializer):
     book = BookSerializer()  # Include book details within the group
     members = MemberSerializer(many=True)  # Include member details within the group    
+    select_related_fields = ('book',)
+    # Ordered so the members are listed in the same order by GroupRows
+    prefetch_related_fields = (Prefetch('members', queryset=CustomUser.objects.only('id', 'username').order_by('id')),)
+    expandable_fields = ('book', 'members')
+    row_serializer = GroupRows
     class Meta:
         model = Group
         fields = '__all__'  # Include all fields in the Group model
 
 
 # Serializer for chapters
-class ChapterSerializer(serializers.ModelSerializer):
+class ChapterSerializer(QuerysetOptimizingMixin, serializers.ModelSerializer):
     is_read = serializers.SerializerMethodField()  # Custom field to track users who read the chapter
+    prefetch_related_fields = (Prefetch('is_read', queryset=CustomUser.objects.only('id', 'username').order_by('id')),)
+    row_serializer = ChapterRows
     class Meta:
         model = Chapter
         fields = '__all__'  # Include all fields in the Chapter model
@@ -64,13 +147,27 @@ class ChapterSerializer(serializers.ModelSerializer):
 
 
 # Serializer for discussions
-class DiscussionSerializer(serializers.ModelSerializer):
+class DiscussionSerializer(QuerysetOptimizingMixin, serializers.ModelSerializer):
     user = MemberSerializer()  # Include user details
     replies = serializers.SerializerMethodField()  # Custom field for nested replies
+    select_related_fields = ('user',)
     class Meta:
         model = Discussion
         fields = ['id', 'chapter', 'user', 'content', 'parent', 'created_at', 'replies']    
     # Method to get replies for a discussion, ordered by creation time
     def get_replies(self, obj):
-        replies = obj.replies.order_by('created_at')
-        return DiscussionSerializer(replies, many=True).data
\ No newline at end of file
+        # Reuse a tree passed in the context, otherwise load the chapter's tree once for every discussion
+        # serialized with this context (a list shares its context with its children)
+        tree = self.context.get('discussion_tree')
+        if tree is None or obj.id not in tree:
+            trees = self.context.setdefault('discussion_trees', {})
+            tree = trees.get(obj.chapter_id)
+            if tree is None or obj.id not in tree:
+                tree = trees[obj.chapter_id] = DiscussionTree.for_chapter(obj.chapter_id)
+        return tree.replies(obj.id)
+
+# Serializer for background jobs (status endpoint)
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = ['id', 'task', 'status', 'attempts', 'max_attempts', 'result', 'last_error', 'run_after', 'created_at', 'finished_at']
@@ -0,0 +1,92 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import pre_save, post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+from .models import CustomUser, Book, Group
+from .authentication import auth_states
+from .catalog_cache import invalidate_catalog
+from .database import apply_sqlite_pragmas
+from .membership import invalidate_memberships
+from .profiling import install_query_counter
+from .read_counters import record_membership_change
+
+
+# Invalidate cached catalog responses whenever a book or group changes, including edits from the admin site
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_catalog_on_change(sender, **kwargs):
+    invalidate_catalog()
+
+
+# Group listings embed the member list, so membership changes invalidate the catalog as well
+@receiver(m2m_changed, sender=Group.members.through)
+def invalidate_catalog_on_membership_change(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_catalog()
+
+
+# Drop the cached group ids of the users whose memberships change
+@receiver(m2m_changed, sender=Group.members.through)
+def invalidate_membership_cache(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('post_add', 'post_remove'):
+        invalidate_memberships([instance.pk] if reverse else pk_set)
+    elif action == 'pre_clear':
+        invalidate_memberships([instance.pk] if reverse else instance.members.values_list('id', flat=True))
+
+
+# Keep the member counters in step with membership changes made through the relation (admin site, shell, ...).
+# The API's bulk paths write the through table directly and update the counters themselves.
+@receiver(m2m_changed, sender=Group.members.through)
+def update_member_counters(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            record_membership_change(instance)
+        return
+    if action == 'pre_clear':
+        instance._cleared_group_ids = list(instance.user_groups.values_list('id', flat=True))
+        return
+    if action in ('post_add', 'post_remove'):
+        group_ids = pk_set
+    elif action == 'post_clear':
+        group_ids = getattr(instance, '_cleared_group_ids', [])
+    else:
+        return
+    for group in Group.objects.filter(id__in=group_ids):
+        record_membership_change(group)
+
+
+# Deleting a group removes its memberships without an m2m_changed signal
+@receiver(pre_delete, sender=Group)
+def invalidate_membership_cache_on_delete(sender, instance, **kwargs):
+    invalidate_memberships(list(instance.members.values_list('id', flat=True)))
+
+
+# Cached group listings embed member usernames, so renaming a user invalidates the catalog as well
+@receiver(pre_save, sender=CustomUser)
+def note_username_change(sender, instance, update_fields=None, **kwargs):
+    if instance.pk is None or (update_fields is not None and 'username' not in update_fields):
+        instance._username_changed = False
+        return
+    previous = CustomUser.objects.filter(pk=instance.pk).values_list('username', flat=True).first()
+    instance._username_changed = previous is not None and previous != instance.username
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_catalog_on_username_change(sender, instance, **kwargs):
+    if getattr(instance, '_username_changed', False):
+        invalidate_catalog()
+
+
+# Drop the cached auth state of a user who changes in this process, so revoked tokens are rejected at once
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def evict_auth_state(sender, instance, **kwargs):
+    auth_states.evict(instance.pk)
+
+
+# Tune every new SQLite connection (WAL, busy timeout, ...)
+connection_created.connect(apply_sqlite_pragmas, dispatch_uid='apply_sqlite_pragmas')
+
+# Count the queries of every new connection into the profile of the request that runs them
+connection_created.connect(install_query_counter, dispatch_uid='install_query_counter')
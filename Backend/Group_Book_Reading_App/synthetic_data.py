@@ -0,0 +1,178 @@
+"""
+Synthetic dataset generator for load tests and benchmarks.
+
+Every row is written with ``bulk_create`` in batches, chapter by chapter for
+the high-volume tables, so memory stays bounded at any scale. The generated
+rows are tagged with a prefix (usernames, book titles) so they can be removed
+again with ``flush_synthetic_data``. Generation is deterministic for a given
+seed. The denormalized read counters, deadline notifications and catalog cache
+version are brought up to date at the end, because ``bulk_create`` bypasses
+the signals and the per-view bookkeeping.
+"""
+
+import random
+from datetime import timedelta
+from itertools import islice
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from .models import CustomUser, Book, Group, Chapter, Discussion
+from .catalog_cache import invalidate_catalog
+from .notifications import generate_deadline_notifications
+from .read_counters import rebuild_counters
+
+GroupMembership = Group.members.through
+ChapterReadMark = Chapter.is_read.through
+
+# Full-size dataset; `scale` multiplies every count
+FULL_SCALE = {
+    'users': 10000,
+    'books': 2000,
+    'groups': 5000,
+    'chapters': 100000,
+    'discussions': 1000000,
+}
+DEFAULT_PREFIX = 'synthetic'
+DEFAULT_PASSWORD = 'synthetic-password'
+BATCH_SIZE = 2000
+GENRES = ('Fantasy', 'Science Fiction', 'Mystery', 'Romance', 'History', 'Biography', 'Poetry', 'Horror')
+WORDS = (
+    'chapter', 'ending', 'character', 'plot', 'twist', 'theme', 'author', 'reading', 'quote', 'scene',
+    'villain', 'hero', 'pacing', 'setting', 'dialogue', 'mystery', 'journey', 'letter', 'storm', 'memory',
+)
+
+
+def scaled_counts(scale=1.0, **overrides):
+    counts = {name: max(int(total * scale), 1) for name, total in FULL_SCALE.items()}
+    counts.update({name: value for name, value in overrides.items() if value is not None})
+    return counts
+
+
+def _sentence(rng, length):
+    return ' '.join(rng.choice(WORDS) for _ in range(length)).capitalize() + '.'
+
+
+def _batches(items, size):
+    items = iter(items)
+    while batch := list(islice(items, size)):
+        yield batch
+
+
+# Chapter rows of every group, built lazily so only one batch of chapters is held in memory
+def _chapters(group_ids, count, rng, today):
+    chapters_per_group, extra_chapters = divmod(count, len(group_ids))
+    for index, group_id in enumerate(group_ids):
+        for number in range(chapters_per_group + (1 if index < extra_chapters else 0)):
+            yield Chapter(
+                group_id=group_id, title=f'Chapter {number + 1}',
+                deadline=today + timedelta(days=rng.randint(-60, 60)),
+            )
+
+
+# Create the dataset; returns the number of rows created per table
+def generate_synthetic_data(counts, prefix=DEFAULT_PREFIX, members_per_group=20, read_ratio=0.5,
+                            reply_ratio=0.3, admins=5, seed=0, batch_size=BATCH_SIZE, log=None):
+    rng = random.Random(seed)
+    log = log or (lambda message: None)
+    created = {}
+    today = timezone.now().date()
+
+    # One hash for every synthetic user: hashing is deliberately slow
+    password = make_password(DEFAULT_PASSWORD)
+    users = [
+        CustomUser(
+            username=f'{prefix}_user_{i}', email=f'{prefix}_user_{i}@example.com', password=password,
+            role='admin' if i < admins else 'member',
+        )
+        for i in range(counts['users'])
+    ]
+    for batch in _batches(users, batch_size):
+        CustomUser.objects.bulk_create(batch)
+    member_ids = list(
+        CustomUser.objects.filter(username__startswith=f'{prefix}_user_', role='member').values_list('id', flat=True)
+    )
+    created['users'] = len(users)
+    log(f"{len(users)} users")
+
+    books = [
+        Book(
+            title=f'{prefix} book {i}: {_sentence(rng, 3)}', author=f'Author {rng.randrange(counts["books"] // 4 + 1)}',
+            genre=rng.choice(GENRES), description=_sentence(rng, 30),
+        )
+        for i in range(counts['books'])
+    ]
+    for batch in _batches(books, batch_size):
+        Book.objects.bulk_create(batch)
+    book_ids = list(Book.objects.filter(title__startswith=f'{prefix} book ').values_list('id', flat=True))
+    created['books'] = len(books)
+    log(f"{len(books)} books")
+
+    groups = [
+        Group(name=f'{prefix} group {i}', book_id=rng.choice(book_ids), reading_goals=_sentence(rng, 12))
+        for i in range(counts['groups'])
+    ]
+    for batch in _batches(groups, batch_size):
+        Group.objects.bulk_create(batch)
+    group_ids = list(Group.objects.filter(book_id__in=book_ids).order_by('id').values_list('id', flat=True))
+    created['groups'] = len(groups)
+
+    members = {group_id: rng.sample(member_ids, min(members_per_group, len(member_ids))) for group_id in group_ids}
+    memberships = [
+        GroupMembership(group_id=group_id, customuser_id=user_id)
+        for group_id, user_ids in members.items() for user_id in user_ids
+    ]
+    for batch in _batches(memberships, batch_size):
+        GroupMembership.objects.bulk_create(batch)
+    created['memberships'] = len(memberships)
+    log(f"{len(groups)} groups, {len(memberships)} memberships")
+
+    # Chapters, read marks and discussions are written one slice of chapters at a time
+    discussions_per_chapter, extra_discussions = divmod(counts['discussions'], max(counts['chapters'], 1))
+    created.update(chapters=0, read_marks=0, discussions=0)
+    for chapter_slice in _batches(_chapters(group_ids, counts['chapters'], rng, today), batch_size):
+        with transaction.atomic():
+            chapter_slice = Chapter.objects.bulk_create(chapter_slice)
+            read_marks = []
+            posts = []
+            for chapter in chapter_slice:
+                group_members = members[chapter.group_id]
+                read_marks.extend(
+                    ChapterReadMark(chapter_id=chapter.id, customuser_id=user_id)
+                    for user_id in group_members if rng.random() < read_ratio
+                )
+                total = discussions_per_chapter + (1 if created['chapters'] < extra_discussions else 0)
+                created['chapters'] += 1
+                posts.extend(
+                    Discussion(chapter_id=chapter.id, user_id=rng.choice(group_members), content=_sentence(rng, rng.randint(5, 40)))
+                    for _ in range(total)
+                )
+            ChapterReadMark.objects.bulk_create(read_marks, batch_size=batch_size)
+            created['read_marks'] += len(read_marks)
+            # A share of the posts become replies to an earlier top-level post of the same chapter
+            top_level, replies = [], []
+            for post in posts:
+                (replies if rng.random() < reply_ratio else top_level).append(post)
+            Discussion.objects.bulk_create(top_level, batch_size=batch_size)
+            roots = {}
+            for post in top_level:
+                roots.setdefault(post.chapter_id, []).append(post.id)
+            for reply in replies:
+                parents = roots.get(reply.chapter_id)
+                reply.parent_id = rng.choice(parents) if parents else None
+            Discussion.objects.bulk_create(replies, batch_size=batch_size)
+            created['discussions'] += len(posts)
+        log(f"{created['chapters']} chapters, {created['discussions']} discussions")
+
+    rebuild_counters()
+    generate_deadline_notifications(today)
+    invalidate_catalog()
+    return created
+
+
+# Delete every synthetic row created with the prefix (cascades to their groups, chapters and discussions)
+def flush_synthetic_data(prefix=DEFAULT_PREFIX):
+    with transaction.atomic():
+        books, _ = Book.objects.filter(title__startswith=f'{prefix} book ').delete()
+        users, _ = CustomUser.objects.filter(username__startswith=f'{prefix}_user_').delete()
+        invalidate_catalog()
+    return books + users
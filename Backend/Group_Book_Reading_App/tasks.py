@@ -0,0 +1,78 @@
+"""
+Background tasks run by the job queue (see jobs.py).
+
+Each task works through its rows in chunks of ``JOB_QUEUE['CHUNK_SIZE']``,
+one transaction per chunk, so no transaction holds locks on a large part of a
+table and a retry continues with the rows that are left.
+"""
+
+from datetime import date
+from django.db import transaction
+from .models import Book, Group, Chapter, Discussion, ChapterProgress, DeadlineNotification
+from .bulk_operations import member_changes, apply_member_changes
+from .jobs import task, heartbeat, job_queue_settings
+from .membership import invalidate_memberships
+from .notifications import generate_deadline_notifications
+
+GroupMembership = Group.members.through
+ChapterReadMark = Chapter.is_read.through
+
+
+# Delete the rows of a queryset, newest first, one chunk per transaction; returns how many were deleted
+def _delete_in_chunks(job, name, queryset, before_delete=None):
+    chunk_size = job_queue_settings()['CHUNK_SIZE']
+    deleted = 0
+    while True:
+        ids = list(queryset.order_by('-id').values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            return deleted
+        with transaction.atomic():
+            rows = queryset.model.objects.filter(id__in=ids)
+            if before_delete:
+                before_delete(rows)
+            rows.delete()
+        deleted += len(ids)
+        heartbeat(job, **{name: deleted})
+
+
+# Delete a book with its groups, chapters, discussions and read marks, from the leaves up
+@task('delete_book')
+def delete_book(job, book_id):
+    deleted = {
+        # Replies have higher ids than their parents, so newest first deletes them before the posts they answer
+        'discussions': _delete_in_chunks(job, 'discussions', Discussion.objects.filter(chapter__group__book_id=book_id)),
+        'read_marks': _delete_in_chunks(job, 'read_marks', ChapterReadMark.objects.filter(chapter__group__book_id=book_id)),
+        'notifications': _delete_in_chunks(job, 'notifications', DeadlineNotification.objects.filter(group__book_id=book_id)),
+        'chapter_progress': _delete_in_chunks(job, 'chapter_progress', ChapterProgress.objects.filter(group__book_id=book_id)),
+        'chapters': _delete_in_chunks(job, 'chapters', Chapter.objects.filter(group__book_id=book_id)),
+        # Queryset deletes send no m2m_changed signal
+        'memberships': _delete_in_chunks(
+            job, 'memberships', GroupMembership.objects.filter(group__book_id=book_id),
+            before_delete=lambda rows: invalidate_memberships(list(rows.values_list('customuser_id', flat=True))),
+        ),
+        'groups': _delete_in_chunks(job, 'groups', Group.objects.filter(book_id=book_id)),
+    }
+    deleted['books'], _ = Book.objects.filter(id=book_id).delete()
+    return deleted
+
+
+# Make exactly `member_ids` the members of a group
+@task('replace_group_members')
+def replace_group_members(job, group_id, member_ids):
+    try:
+        group = Group.objects.get(id=group_id)
+    except Group.DoesNotExist:
+        return {"skipped": "Group not found"}
+    to_remove, to_add = member_changes(group, member_ids)
+    apply_member_changes(
+        group, to_remove, to_add, job_queue_settings()['CHUNK_SIZE'],
+        progress=lambda removed, added: heartbeat(job, removed=removed, added=added),
+    )
+    return {"removed": len(to_remove), "added": len(to_add)}
+
+
+# Recompute the deadline notifications of every member, as of an ISO date (default today)
+@task('generate_deadline_notifications')
+def deadline_notifications(job, today=None):
+    total, removed = generate_deadline_notifications(date.fromisoformat(today) if today else None)
+    return {"active": total, "removed": removed}
@@ -1,3 +1,1484 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import tempfile
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock, skipUnless
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import connection, connections, router, transaction
+from django.http import HttpResponse
+from django.test import AsyncClient, AsyncRequestFactory, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import NoReverseMatch, resolve, reverse
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from .benchmarks import SCENARIOS
+from .authentication import ClaimsJWTAuthentication, ClaimsTokenObtainPairSerializer, auth_states
+from .catalog_cache import bump_catalog_version, catalog_cache, catalog_version
+from .checks import check_shared_caches, shared_cache_problems
+from .membership import is_member
+from .discussions import DiscussionTree
+from .notifications import generate_deadline_notifications, overdue_unread, sync_chapter_notification
+from .progress import build_progress
+from .push import StreamToken
+from .read_counters import rebuild_counters, refresh_chapter_counters, toggle_read_mark, verify_counters
+from . import async_views, idempotency, jobs, membership, renderers, search, views
+from .profiling import QueryBudgetExceeded, RequestProfilingMiddleware, get_registry
+from .renderers import FastJSONRenderer, FastJSONParser, encode_fragment
+from .routers import ReplicaPinningMiddleware, primary_reads
+from .serializers import BookSerializer, GroupSerializer, ChapterSerializer, DiscussionSerializer
+from .models import CustomUser, Book, Group, Chapter, Discussion, ChapterProgress, DeadlineNotification, IdempotencyRecord, Job
 
-# Create your tests here.
+
+# Return the detail column of SQLite's EXPLAIN QUERY PLAN for a queryset
+def query_plan(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+# Per-group, per-chapter progress computation the set-based engine replaced (the original view_progress loop)
+def legacy_progress(groups):
+    progress_data = []
+    for group in groups:
+        chapters = group.chapters.all()
+        if not chapters.exists():
+            continue
+        total_members = group.members.count()
+        group_data = {"group_id": group.id, "group_name": group.name, "total_members": total_members, "chapters": []}
+        for chapter in chapters:
+            read_users = chapter.is_read.all()
+            read_percentage = min((read_users.count() / total_members) * 100 if total_members > 0 else 0, 100.0)
+            not_read_users = group.members.exclude(id__in=[user.id for user in read_users])
+            group_data["chapters"].append({
+                "chapter_id": chapter.id,
+                "title": chapter.title,
+                "deadline": chapter.deadline,
+                "read_percentage": read_percentage,
+                "read_users": [{"id": user.id, "username": user.username} for user in read_users],
+                "not_read_users": [{"id": user.id, "username": user.username} for user in not_read_users],
+            })
+        progress_data.append(group_data)
+    return progress_data
+
+
+# The set-based progress engine returns what the per-group, per-chapter loop returned, in three queries
+class ProgressEngineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        users = [CustomUser.objects.create_user(username=f'member{i}', password='secret', role='member') for i in range(4)]
+        book = Book.objects.create(title='Book', author='Author', genre='Genre', description='Description')
+        group_a, group_b, group_empty, group_no_members = [
+            Group.objects.create(name=name, book=book, reading_goals='Goals') for name in ('A', 'B', 'Empty', 'No members')
+        ]
+        group_a.members.add(*users[:3])
+        group_b.members.add(users[0], users[3])
+        group_empty.members.add(users[0])
+        for title, readers in (('A1', [users[0], users[2]]), ('A2', []), ('A3', users[:3])):
+            Chapter.objects.create(group=group_a, title=title, deadline=date(2025, 1, 1)).is_read.add(*readers)
+        Chapter.objects.create(group=group_b, title='B1', deadline=date(2025, 2, 1)).is_read.add(users[3])
+        # A reader who is not (or no longer) a member of the group
+        Chapter.objects.create(group=group_no_members, title='N1', deadline=date(2025, 3, 1)).is_read.add(users[1])
+        cls.groups = [group_a, group_b, group_empty, group_no_members]
+
+    def test_matches_per_group_computation(self):
+        self.assertEqual(build_progress(self.groups), legacy_progress(self.groups))
+
+    def test_query_count_does_not_grow_with_groups(self):
+        with self.assertNumQueries(3):
+            progress = build_progress(self.groups)
+        self.assertEqual([entry["group_name"] for entry in progress], ['A', 'B', 'No members'])
+        self.assertEqual(progress[2]["chapters"][0]["read_percentage"], 0)
+
+
+# The ChapterProgress counters follow the read marks actually written, and the rebuild command repairs drift
+class ReadCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='member', password='secret', role='member')
+        cls.other = CustomUser.objects.create_user(username='other', password='secret', role='member')
+        book = Book.objects.create(title='Book', author='Author', genre='Genre', description='Description')
+        cls.group = Group.objects.create(name='Group', book=book, reading_goals='Goals')
+        cls.group.members.add(cls.user, cls.other)
+        cls.chapter = Chapter.objects.create(group=cls.group, title='Chapter', deadline=date(2025, 1, 1))
+        refresh_chapter_counters([cls.chapter.id])
+
+    def setUp(self):
+        cache.clear()
+
+    def read_count(self):
+        return ChapterProgress.objects.get(chapter=self.chapter).read_count
+
+    def test_toggle_through_api_updates_counter(self):
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {ClaimsTokenObtainPairSerializer.get_token(self.user).access_token}'
+        path = f'/api/groups/{self.group.id}/chapter/{self.chapter.id}/'
+        response = self.client.patch(path)
+        self.assertEqual(response.json()["message"], 'Chapter successfully marked as read.')
+        self.assertEqual(self.read_count(), 1)
+        response = self.client.patch(path)
+        self.assertEqual(response.json()["message"], 'Chapter successfully marked as unread.')
+        self.assertEqual(self.read_count(), 0)
+        self.assertEqual(verify_counters(), [])
+
+    def test_concurrent_writes_do_not_drift(self):
+        self.assertTrue(toggle_read_mark(self.chapter, self.user))
+        # Another request removed the mark after this one decided to mark the chapter as unread
+        self.chapter.is_read.remove(self.user)
+        ChapterProgress.objects.filter(chapter=self.chapter).update(read_count=0)
+        self.assertTrue(toggle_read_mark(self.chapter, self.user))
+        self.assertEqual(self.read_count(), 1)
+        # An insert that loses the race against the same mark leaves the counter alone
+        with mock.patch.object(Chapter.is_read.through.objects, 'filter') as marks:
+            marks.return_value.delete.return_value = (0, {})
+            self.assertTrue(toggle_read_mark(self.chapter, self.user))
+        self.assertEqual(self.read_count(), 1)
+        self.assertTrue(toggle_read_mark(self.chapter, self.other))
+        self.assertEqual(self.read_count(), 2)
+        self.assertEqual(verify_counters(), [])
+
+    def test_rebuild_command_repairs_drift(self):
+        self.chapter.is_read.add(self.user)  # Written outside the API
+        with self.assertRaisesMessage(CommandError, f"out of date for 1 chapters: [{self.chapter.id}]"):
+            call_command('rebuild_read_counters', '--verify-only', stdout=io.StringIO())
+        out = io.StringIO()
+        call_command('rebuild_read_counters', stdout=out)
+        self.assertIn("Read counters verified.", out.getvalue())
+        self.assertEqual(self.read_count(), 1)
+        call_command('rebuild_read_counters', '--verify-only', stdout=io.StringIO())
+
+    def test_membership_changes_through_relation_update_counters(self):
+        member_count = lambda: ChapterProgress.objects.get(chapter=self.chapter).member_count
+        newcomer = CustomUser.objects.create_user(username='newcomer', password='secret', role='member')
+        self.group.members.add(newcomer)
+        self.assertEqual(member_count(), 3)
+        newcomer.user_groups.remove(self.group)
+        self.assertEqual(member_count(), 2)
+        newcomer.user_groups.add(self.group)
+        self.assertEqual(member_count(), 3)
+        newcomer.user_groups.clear()
+        self.assertEqual(member_count(), 2)
+        self.group.members.clear()
+        self.assertEqual(member_count(), 0)
+        self.assertEqual(verify_counters(), [])
+
+    def test_summary_lists_groups_and_chapters_without_counters(self):
+        uncounted = Chapter.objects.bulk_create([Chapter(group=self.group, title='Uncounted', deadline=date(2025, 2, 1))])[0]
+        uncounted.is_read.add(self.user)
+        empty = Group.objects.create(name='Empty', book=self.group.book, reading_goals='Goals')
+        empty.members.add(self.user)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {ClaimsTokenObtainPairSerializer.get_token(self.user).access_token}'
+        response = self.client.get('/api/progress/summary/')
+        self.assertEqual(response.status_code, 200)
+        summary = response.json()
+        self.assertEqual([group["group_id"] for group in summary], [self.group.id, empty.id])
+        self.assertEqual(summary[0]["total_members"], 2)
+        self.assertEqual(
+            [(chapter["chapter_id"], chapter["read_count"], chapter["read_percentage"]) for chapter in summary[0]["chapters"]],
+            [(self.chapter.id, 0, 0.0), (uncounted.id, 1, 50.0)],
+        )
+        self.assertEqual((summary[1]["total_members"], summary[1]["chapters"]), (1, []))
+
+
+# Threaded discussions serialize with their nested replies in a fixed number of queries
+class DiscussionThreadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='member', password='secret', role='member')
+        book = Book.objects.create(title='Book', author='Author', genre='Genre', description='Description')
+        cls.group = Group.objects.create(name='Group', book=book, reading_goals='Goals')
+        cls.group.members.add(cls.user)
+        cls.chapter = Chapter.objects.create(group=cls.group, title='Chapter', deadline=date(2025, 1, 1))
+        for i in range(3):
+            parent = Discussion.objects.create(chapter=cls.chapter, user=cls.user, content=f'Post {i}')
+            for depth in range(3):
+                parent = Discussion.objects.create(chapter=cls.chapter, user=cls.user, content=f'Reply {i}.{depth}', parent=parent)
+        # One minute apart, in creation order
+        for minute, discussion in enumerate(Discussion.objects.order_by('id')):
+            Discussion.objects.filter(id=discussion.id).update(created_at=datetime(2025, 1, 1, 12, minute, tzinfo=dt_timezone.utc))
+
+    def setUp(self):
+        cache.clear()
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {ClaimsTokenObtainPairSerializer.get_token(self.user).access_token}'
+
+    # Content of a thread and its replies, depth first
+    def contents(self, node):
+        return [node["content"]] + [content for reply in node["replies"] for content in self.contents(reply)]
+
+    def test_serializer_loads_the_tree_once(self):
+        with self.assertNumQueries(2):
+            data = DiscussionSerializer(Discussion.objects.filter(chapter=self.chapter).select_related('user'), many=True).data
+        self.assertEqual(len(data), 12)
+        self.assertEqual(self.contents(data[0]), ['Post 0', 'Reply 0.0', 'Reply 0.1', 'Reply 0.2'])
+        self.assertEqual(data[-1]["replies"], [])
+
+    def test_threads_nest_replies(self):
+        response = self.client.get(f'/api/groups/{self.group.id}/discussions_by_chapter/', {'chapter_id': self.chapter.id})
+        threads = response.json()
+        self.assertEqual([thread["content"] for thread in threads], ['Post 0', 'Post 1', 'Post 2'])
+        self.assertEqual(self.contents(threads[1]), ['Post 1', 'Reply 1.0', 'Reply 1.1', 'Reply 1.2'])
+
+    def test_new_reply_serializes_without_loading_the_tree(self):
+        parent = Discussion.objects.select_related('user').get(content='Reply 2.2')
+        with self.assertNumQueries(0):
+            data = DiscussionSerializer(parent, context={'discussion_tree': DiscussionTree([parent])}).data
+        self.assertEqual(data["replies"], [])
+        response = self.client.post(
+            f'/api/groups/{self.group.id}/discussions_by_chapter/post/',
+            {'chapter_id': self.chapter.id, 'parent_id': parent.id, 'content': 'Reply 2.3'},
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.json()["parent"], response.json()["replies"]), (parent.id, []))
+
+    def test_polling_loads_only_new_discussions(self):
+        # Post 1 was created at 12:04; its replies follow at 12:05-12:07
+        since = datetime(2025, 1, 1, 12, 4, tzinfo=dt_timezone.utc)
+        self.assertEqual(len(DiscussionTree.for_chapter(self.chapter.id, after=since).nodes), 7)
+        response = self.client.get(
+            f'/api/groups/{self.group.id}/discussions_by_chapter/',
+            {'chapter_id': self.chapter.id, 'last_fetched_at': '2025-01-01T12:03:30Z'},
+        )
+        self.assertEqual([thread["content"] for thread in response.json()], ['Post 1', 'Post 2'])
+        self.assertEqual(self.contents(response.json()[0]), ['Post 1', 'Reply 1.0', 'Reply 1.1', 'Reply 1.2'])
+        response = self.client.get(
+            f'/api/groups/{self.group.id}/discussions_by_chapter/',
+            {'chapter_id': self.chapter.id, 'last_fetched_at': 'yesterday'},
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+# The discussion feed pages through a chapter with an opaque (created_at, id) cursor
+class DiscussionFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='member', password='secret', role='member')
+        book = Book.objects.create(title='Book', author='Author', genre='Genre', description='Description')
+        cls.group = Group.objects.create(name='Group', book=book, reading_goals='Goals')
+        cls.group.members.add(cls.user)
+        cls.chapter = Chapter.objects.create(group=cls.group, title='Chapter', deadline=date(2025, 1, 1))
+        created_at = datetime(2025, 1, 1, 12, tzinfo=dt_timezone.utc)
+        # Posts 1 and 2 share a timestamp, so the id breaks the tie
+        for i, minute in enumerate((0, 1, 1, 2, 3)):
+            discussion = Discussion.objects.create(chapter=cls.chapter, user=cls.user, content=f'Post {i}')
+            Discussion.objects.filter(id=discussion.id).update(created_at=created_at.replace(minute=minute))
+
+    def setUp(self):
+        cache.clear()
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {ClaimsTokenObtainPairSerializer.get_token(self.user).access_token}'
+
+    def feed(self, **params):
+        return self.client.get(f'/api/groups/{self.group.id}/discussions_by_chapter/feed/', {'chapter_id': self.chapter.id, **params})
+
+    def test_cursor_round_trip(self):
+        pages, cursor = [], None
+        while True:
+            page = self.feed(limit=2, **({'cursor': cursor} if cursor else {})).json()
+            pages.append(([result["content"] for result in page["results"]], page["has_more"]))
+            cursor = page["next_cursor"]
+            if not page["has_more"]:
+                break
+        self.assertEqual(pages, [(['Post 0', 'Post 1'], True), (['Post 2', 'Post 3'], True), (['Post 4'], False)])
+        # Nothing new yet: an empty page that hands the same cursor back
+        self.assertEqual(self.feed(cursor=cursor).json(), {"results": [], "next_cursor": cursor, "has_more": False})
+        discussion = Discussion.objects.create(chapter=self.chapter, user=self.user, content='Post 5')
+        page = self.feed(cursor=cursor).json()
+        self.assertEqual([result["id"] for result in page["results"]], [discussion.id])
+        self.assertNotIn("replies", page["results"][0])
+
+    def test_invalid_cursor_and_limit(self):
+        for cursor in ('not-a-cursor', 'W10', 'WyJ4IiwgMV0'):
+            response = self.feed(cursor=cursor)
+            self.assertEqual((response.status_code, response.json()), (400, {"error": "Invalid cursor."}))
+        self.assertEqual(self.feed(limit='many').status_code, 400)
+        self.assertEqual(len(self.feed(limit=0).json()["results"]), 1)
+
+
+# The discussion stream is only routed under ASGI and opens for members of the group with a short-lived stream token
+class DiscussionStreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = CustomUser.objects.create_user(username='member', password='secret', role='member')
+        cls.outsider = CustomUser.objects.create_user(username='outsider', password='secret', role='member')
+        book = Book.objects.create(title='Book', author='Author', genre='Genre', description='Description')
+        cls.group, cls.other_group = [Group.objects.create(name=name, book=book, reading_goals='Goals') for name in ('Group', 'Other')]
+        cls.group.members.add(cls.member)
+        cls.other_group.members.add(cls.member, cls.outsider)
+        cls.chapter = Chapter.objects.create(group=cls.group, title='Chapter', deadline=date(2025, 1, 1))
+
+    def setUp(self):
+        cache.clear()
+        auth_states.clear()
+
+    def access_token(self, user):
+        return str(ClaimsTokenObtainPairSerializer.get_token(user).access_token)
+
+    def issue_stream_token(self, user, group):
+        request = APIRequestFactory().post('/', HTTP_AUTHORIZATION=f'Bearer {self.access_token(user)}')
+        return views.create_stream_token(request, group_id=group.id)
+
+    async def open_stream(self, group, **params):
+        request = AsyncRequestFactory().get('/', {'chapter_id': self.chapter.id, **params})
+        return await views.discussion_stream(request, group_id=group.id)
+
+    @skipUnless(settings.SERVER_PROFILE == 'wsgi', "Streams are routed under the ASGI profile")
+    def test_not_routed_under_wsgi(self):
+        for name in ('discussion_stream', 'create_stream_token'):
+            with self.assertRaises(NoReverseMatch):
+                reverse(name, args=[self.group.id])
+
+    def test_stream_token_is_short_lived_and_scoped(self):
+        response = self.issue_stream_token(self.member, self.group)
+        self.assertEqual((response.status_code, response.data["expires_in"]), (201, 60))
+        token = StreamToken(response.data["stream_token"])
+        self.assertEqual((token['token_type'], token['group_id'], token['role']), ('stream', self.group.id, 'member'))
+        self.assertLessEqual(token['exp'] - token['iat'], 60)
+        self.assertEqual(self.issue_stream_token(self.outsider, self.group).status_code, 403)
+
+    async def test_member_opens_stream(self):
+        response = await sync_to_async(self.issue_stream_token)(self.member, self.group)
+        stream = await self.open_stream(self.group, stream_token=response.data["stream_token"])
+        self.assertEqual((stream.status_code, stream['Content-Type']), (200, 'text/event-stream'))
+        frames = aiter(stream.streaming_content)
+        self.assertEqual(await anext(frames), b'retry: 3000\n\n')
+        await frames.aclose()
+
+    async def test_rejected_tokens(self):
+        other_group_token = (await sync_to_async(self.issue_stream_token)(self.outsider, self.other_group)).data["stream_token"]
+        expired = StreamToken.for_user(self.member)
+        expired['group_id'] = self.group.id
+        expired.set_exp(lifetime=-timedelta(seconds=1))
+        for stream_token in (None, other_group_token, await sync_to_async(self.access_token)(self.member), str(expired)):
+            stream = await self.open_stream(self.group, **({'stream_token': stream_token} if stream_token else {}))
+            self.assertEqual(stream.status_code, 401)
+
+    async def test_non_member_is_forbidden(self):
+        token = await sync_to_async(self.access_token)(self.outsider)
+        request = AsyncRequestFactory().get('/', {'chapter_id': self.chapter.id}, headers={'Authorization': f'Bearer {token}'})
+        stream = await views.discussion_stream(request, group_id=self.group.id)
+        self.assertEqual(stream.status_code, 403)
+
+
+# Deadline notifications list the members with an overdue unread chapter, and follow their read marks
+class DeadlineNotificationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader, cls.laggard, cls.outsider = [
+            CustomUser.objects.create_user(username=name, password='secret', role='member') for name in ('reader', 'laggard', 'outsider')
+        ]
+        book = Book.objects.create(title='Book', author='Author', genre='Genre', description='Description')
+        cls.group = Group.objects.create(name='Group', book=book, reading_goals='Goals')
+        cls.group.members.add(cls.reader, cls.laggard)
+        cls.overdue = Chapter.objects.create(group=cls.group, title='Overdue', deadline=date(2025, 1, 1))
+        cls.upcoming = Chapter.objects.create(group=cls.group, title='Upcoming', deadline=date(2025, 12, 1))
+        cls.overdue.is_read.add(cls.reader)
+        # Read marks of users outside the group do not count
+        cls.overdue.is_read.add(cls.outsider)
+
+    def setUp(self):
+        cache.clear()
+
+    def notified(self):
+        return set(DeadlineNotification.objects.values_list('user__username', 'chapter__title'))
+
+    def test_anti_join_finds_members_with_unread_overdue_chapters(self):
+        with self.assertNumQueries(1):
+            pairs = list(overdue_unread(date(2025, 6, 1)))
+        self.assertEqual(pairs, [(self.laggard.id, self.group.id, self.overdue.id)])
+        self.assertEqual(set(overdue_unread(date(2025, 12, 2))), {
+            (self.laggard.id, self.group.id, self.overdue.id),
+            (self.reader.id, self.group.id, self.upcoming.id),
+            (self.laggard.id, self.group.id, self.upcoming.id),
+        })
+
+    def test_generator_syncs_the_table(self):
+        # A stale notification for a chapter the member has read since
+        DeadlineNotification.objects.create(user=self.reader, chapter=self.overdue, group=self.group)
+        self.assertEqual(generate_deadline_notifications(date(2025, 6, 1)), (1, 1))
+        self.assertEqual(self.notified(), {('laggard', 'Overdue')})
+        self.assertEqual(generate_deadline_notifications(date(2025, 6, 1)), (1, 0))
+        self.group.members.remove(self.laggard)
+        self.assertEqual(generate_deadline_notifications(date(2025, 6, 1)), (0, 1))
+        self.assertEqual(self.notified(), set())
+
+    def test_read_mark_toggles_sync_the_notification(self):
+        generate_deadline_notifications(date(2025, 6, 1))
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {ClaimsTokenObtainPairSerializer.get_token(self.laggard).access_token}'
+        response = self.client.get('/api/chapter-deadline-notifications/')
+        self.assertEqual([notification["chapter_title"] for notification in response.json()], ['Overdue'])
+        self.client.patch(f'/api/groups/{self.group.id}/chapter/{self.overdue.id}/')
+        self.assertEqual(self.notified(), set())
+        self.assertEqual(self.client.get('/api/chapter-deadline-notifications/').json(), [])
+        self.client.patch(f'/api/groups/{self.group.id}/chapter/{self.overdue.id}/')
+        self.assertEqual(self.notified(), {('laggard', 'Overdue')})
+
+    def test_unread_chapter_before_its_deadline_is_not_notified(self):
+        self.upcoming.deadline = date(2999, 1, 1)
+        sync_chapter_notification(self.laggard, self.upcoming, is_read=False)
+        self.assertEqual(self.notified(), set())
+
+
+# The bulk endpoints report a status per requested item and keep the read counters in step
+class BulkOperationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(username='admin', password='secret', role='admin')
+        cls.member, cls.newcomer = [
+            CustomUser.objects.create_user(username=name, password='secret', role='member') for name in ('member', 'newcomer')
+        ]
+        book = Book.objects.create(title='Book', author='Author', genre='Genre', description='Description')
+        cls.group, other_group = [Group.objects.create(name=name, book=book, reading_goals='Goals') for name in ('Group', 'Other')]
+        cls.group.members.add(cls.member)
+        cls.chapters = [Chapter.objects.create(group=cls.group, title=f'Chapter {i}', deadline=date(2999, 1, 1)) for i in range(3)]
+        cls.other_chapter = Chapter.objects.create(group=other_group, title='Other', deadline=date(2999, 1, 1))
+        cls.chapters[2].is_read.add(cls.member)
+        refresh_chapter_counters([chapter.id for chapter in cls.chapters] + [cls.other_chapter.id])
+
+    def setUp(self):
+        cache.clear()
+
+    def login(self, user):
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {ClaimsTokenObtainPairSerializer.get_token(user).access_token}'
+
+    def counters(self):
+        return list(ChapterProgress.objects.filter(chapter__in=self.chapters).order_by('chapter_id').values_list('read_count', 'member_count'))
+
+    def test_read_marks_per_item_status(self):
+        self.login(self.member)
+        first, second, third = [chapter.id for chapter in self.chapters]
+        response = self.client.post(
+            '/api/chapters/read-marks/bulk/',
+            {'read': [first, self.other_chapter.id, 999999, third], 'unread': [second]},
+            content_type='application/json',
+        )
+        self.assertEqual(response.json()["results"], [
+            {"chapter_id": first, "status": "read"},
+            {"chapter_id": self.other_chapter.id, "status": "not_found"},
+            {"chapter_id": 999999, "status": "not_found"},
+            {"chapter_id": third, "status": "already_read"},
+            {"chapter_id": second, "status": "already_unread"},
+        ])
+        response = self.client.post('/api/chapters/read-marks/bulk/', {'unread': [third]}, content_type='application/json')
+        self.assertEqual(response.json()["results"], [{"chapter_id": third, "status": "unread"}])
+        self.assertEqual(self.counters(), [(1, 1), (0, 1), (0, 1)])
+        self.assertFalse(self.other_chapter.is_read.exists())
+        self.assertEqual(verify_counters(), [])
+
+    def test_read_marks_reject_invalid_ids(self):
+        self.login(self.member)
+        for payload in ({'read': [True]}, {'unread': [False]}, {'read': ['1']}, {'read': 1}):
+            response = self.client.post('/api/chapters/read-marks/bulk/', payload, content_type='application/json')
+            self.assertEqual(response.status_code, 400, payload)
+        chapter_id = self.chapters[0].id
+        response = self.client.post('/api/chapters/read-marks/bulk/', {'read': [chapter_id], 'unread': [chapter_id]}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_members_per_item_status(self):
+        self.login(self.admin)
+        path = f'/api/groups/{self.group.id}/members/bulk/'
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(path, {'usernames': ['member', 'newcomer', 'ghost', 'newcomer']}, content_type='application/json')
+        self.assertEqual([result["status"] for result in response.json()["results"]], ['already_member', 'added', 'not_found', 'already_member'])
+        self.assertEqual(self.counters(), [(0, 2), (0, 2), (1, 2)])
+        self.assertTrue(is_member(self.newcomer, self.group.id))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(path, {'action': 'remove', 'usernames': ['member', 'ghost', 'admin']}, content_type='application/json')
+        self.assertEqual([result["status"] for result in response.json()["results"]], ['removed', 'not_found', 'not_member'])
+        self.assertEqual(self.counters(), [(0, 1), (0, 1), (1, 1)])
+        self.assertFalse(is_member(self.member, self.group.id))
+        self.assertEqual(self.client.post(path, {'action': 'replace', 'usernames': []}, content_type='application/json').status_code, 400)
+
+
+# Search ranks books by where the terms match, returns highlighted snippets, keeps the index in step with
+# edits, and only shows discussions of the caller's groups
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = CustomUser.objects.create_user(username='member', password='secret', role='member')
+        cls.outsider = CustomUser.objects.create_user(username='outsider', password='secret', role='member')
+        cls.by_description = Book.objects.create(title='Sand Planet', author='Author', genre='Genre', description='A story of Dune and its sandworms')
+        cls.by_title = Book.objects.create(title='Dune', author='Frank Herbert', genre='Science fiction', description='Desert planet')
+        Book.objects.create(title='Emma', author='Jane Austen', genre='Classic', description='Matchmaking')
+        cls.group = Group.objects.create(name='Group', book=cls.by_title, reading_goals='Goals')
+        other_group = Group.objects.create(name='Other', book=cls.by_title, reading_goals='Goals')
+        cls.group.members.add(cls.member)
+        other_group.members.add(cls.outsider)
+        chapter = Chapter.objects.create(group=cls.group, title='Chapter', deadline=date(2025, 1, 1))
+        other_chapter = Chapter.objects.create(group=other_group, title='Chapter', deadline=date(2025, 1, 1))
+        cls.discussion = Discussion.objects.create(chapter=chapter, user=cls.member, content='The spice must flow through the whole empire')
+        Discussion.objects.create(chapter=other_chapter, user=cls.outsider, content='The spice trade of the other group')
+
+    def setUp(self):
+        cache.clear()
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {ClaimsTokenObtainPairSerializer.get_token(self.member).access_token}'
+
+    def search(self, q, **params):
+        return self.client.get('/api/search/', {'q': q, **params}).json()
+
+    def discussion_ids(self, q, user=None):
+        return [row["id"] for row in search.search_discussions(user or self.member, search.search_terms(q))["results"]]
+
+    @skipUnless(connection.vendor == 'sqlite', "FTS5 indexes are SQLite only")
+    def test_ranking_and_snippets(self):
+        books = self.search('dune', type='books')["books"]
+        self.assertEqual([book["id"] for book in books["results"]], [self.by_title.id, self.by_description.id])
+        self.assertEqual(books["results"][0]["snippet"], '<mark>Dune</mark>')
+        self.assertIn('<mark>Dune</mark> and its sandworms', books["results"][1]["snippet"])
+        self.assertLess(books["results"][0]["rank"], books["results"][1]["rank"])
+        # The last term matches as a prefix, stems match their inflections
+        self.assertEqual([book["title"] for book in self.search('frank herb', type='books')["books"]["results"]], ['Dune'])
+        self.assertEqual([book["title"] for book in self.search('sandworm', type='books')["books"]["results"]], ['Sand Planet'])
+        page = self.search('planet', type='books', limit=1)["books"]
+        self.assertEqual((len(page["results"]), page["has_more"]), (1, True))
+        discussions = self.search('spice flow', type='discussions')["discussions"]["results"]
+        self.assertEqual(discussions[0]["snippet"], 'The <mark>spice</mark> must <mark>flow</mark> through the whole empire')
+        self.assertEqual(discussions[0]["created_at"], self.discussion.created_at.isoformat().replace('+00:00', 'Z'))
+
+    @skipUnless(connection.vendor == 'sqlite', "FTS5 indexes are SQLite only")
+    def test_index_follows_edits_and_deletes(self):
+        self.assertEqual(self.discussion_ids('empire'), [self.discussion.id])
+        Discussion.objects.filter(id=self.discussion.id).update(content='A new hope for the galaxy')
+        self.assertEqual(self.discussion_ids('empire'), [])
+        self.assertEqual(self.discussion_ids('galaxy'), [self.discussion.id])
+        Discussion.objects.filter(id=self.discussion.id).delete()
+        self.assertEqual(self.discussion_ids('galaxy'), [])
+        self.by_title.title = 'Arrakis'
+        self.by_title.save()
+        self.assertEqual([book["id"] for book in search.search_books(['dune'])["results"]], [self.by_description.id])
+        self.by_description.delete()
+        self.assertEqual(search.search_books(['dune'])["results"], [])
+
+    def test_discussions_of_other_groups_are_hidden(self):
+        self.assertEqual(self.discussion_ids('spice'), [self.discussion.id])
+        self.assertNotIn(self.discussion.id, self.discussion_ids('spice', user=self.outsider))
+        self.group.members.remove(self.member)
+        self.assertEqual(self.discussion_ids('spice'), [])
+        self.assertEqual(self.client.get('/api/search/', {'q': ' !? '}).status_code, 400)
+
+    def test_like_fallback(self):
+        with mock.patch.object(search, 'connection', mock.Mock(vendor='postgresql')):
+            books = search.search_books(search.search_terms('DUNE'))
+            self.assertEqual([book["title"] for book in books["results"]], ['Dune', 'Sand Planet'])
+            self.assertEqual(books["results"][1]["snippet"], 'A story of Dune and its sandworms')
+            self.assertEqual(search.search_books(['dune', 'herbert'])["results"][0]["id"], self.by_title.id)
+            self.assertEqual(self.discussion_ids('spice'), [self.discussion.id])
+            self.assertEqual(self.discussion_ids('spice', user=self.outsider), [Discussion.objects.exclude(id=self.discussion.id).get().id])
+
+
+# Every new SQLite connection is tuned with the pragmas of settings.SQLITE_PRAGMAS
+@skipUnless(connection.vendor == 'sqlite', "The pragmas are SQLite only")
+class SQLitePragmaTests(TestCase):
+    def test_new_connection_applies_pragmas(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # A file database: in-memory ones (the test database) have no WAL journal
+            wrapper = type(connections['default'])({**connection.settings_dict, 'NAME': str(Path(directory) / 'pragmas.sqlite3')}, alias='pragmas')
+            try:
+                with wrapper.cursor() as cursor:
+                    pragmas = {name: cursor.execute(f"PRAGMA {name}").fetchone()[0] for name in ('journal_mode', 'busy_timeout', 'synchronous')}
+            finally:
+                wrapper.close()
+        # synchronous reads back as a number: NORMAL is 1
+        self.assertEqual(pragmas, {'journal_mode': 'wal', 'busy_timeout': settings.SQLITE_PRAGMAS['busy_timeout'], 'synchronous': 1})
+
+
+# Asserts that the hot lookups of the views are answered from an index rather than a table scan
+@skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN output is SQLite specific")
+class HotQueryIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='member', password='secret', role='member')
+        cls.book = Book.objects.create(title='Book', author='Author', genre='Genre', description='Description')
+        cls.group = Group.objects.create(name='Group', book=cls.book, reading_goals='Goals')
+        cls.group.members.add(cls.user)
+        cls.chapter = Chapter.objects.create(group=cls.group, title='Chapter', deadline=date(2025, 1, 1))
+        Discussion.objects.create(chapter=cls.chapter, user=cls.user, content='Post')
+
+    # `expected` is a substring of the plan step, e.g. the index name or the indexed column terms
+    def assertUsesIndex(self, queryset, expected=None):
+        plan = query_plan(queryset)
+        table = queryset.model._meta.db_table
+        self.assertFalse(
+            [step for step in plan if step == f"SCAN {table}"],
+            f"Full table scan of {table}: {plan}",
+        )
+        uses_index = [step for step in plan if table in step and ' INDEX ' in f"{step} "]
+        self.assertTrue(uses_index, f"No index used on {table}: {plan}")
+        if expected:
+            self.assertTrue(any(expected in step for step in uses_index), f"{expected} not used: {plan}")
+        return plan
+
+    def assertNoSortStep(self, plan):
+        self.assertFalse([step for step in plan if 'TEMP B-TREE' in step], f"Extra sort step: {plan}")
+
+    def test_discussion_tree_and_feed_use_feed_index(self):
+        queryset = Discussion.objects.filter(chapter_id=self.chapter.id).order_by('created_at', 'id')
+        self.assertNoSortStep(self.assertUsesIndex(queryset, 'discussion_feed_idx'))
+
+    def test_top_level_threads_use_thread_index(self):
+        queryset = Discussion.objects.filter(chapter_id=self.chapter.id, parent=None).order_by('created_at')
+        self.assertNoSortStep(self.assertUsesIndex(queryset, 'discussion_thread_idx'))
+
+    def test_group_chapters_by_deadline_use_composite_index(self):
+        queryset = Chapter.objects.filter(group_id=self.group.id, deadline__lt=date(2025, 6, 1))
+        self.assertUsesIndex(queryset, 'chapter_group_deadline_idx')
+
+    def test_overdue_chapters_use_deadline_index(self):
+        self.assertUsesIndex(Chapter.objects.filter(deadline__lt=date(2025, 6, 1)))
+
+    def test_create_or_join_group_lookup_uses_unique_constraint(self):
+        queryset = Group.objects.filter(book_id=self.book.id, name='Group')
+        # SQLite creates unique constraints as inline UNIQUE clauses backed by an automatic index
+        self.assertUsesIndex(queryset, 'book_id=? AND name=?')
+
+    def test_members_by_role_use_role_index(self):
+        self.assertUsesIndex(CustomUser.objects.filter(role='member'), 'role')
+
+    def test_books_by_genre_and_author_use_composite_index(self):
+        queryset = Book.objects.filter(genre='Genre', author='Author')
+        self.assertUsesIndex(queryset, 'book_genre_author_idx')
+
+    def test_membership_check_uses_through_table_index(self):
+        self.assertUsesIndex(Group.members.through.objects.filter(group_id=self.group.id, customuser_id=self.user.id))
+
+    def test_read_marks_of_user_use_through_table_index(self):
+        queryset = Chapter.is_read.through.objects.filter(customuser_id=self.user.id, chapter_id__in=[self.chapter.id])
+        self.assertUsesIndex(queryset)
+
+    def test_progress_counters_of_group_use_index(self):
+        self.assertUsesIndex(ChapterProgress.objects.filter(group_id=self.group.id))
+
+    def test_user_notifications_use_index(self):
+        self.assertUsesIndex(DeadlineNotification.objects.filter(user_id=self.user.id))
+
+
+# Runs the budgeted read endpoints against several groups, chapters and posts with the query
+# budgets enforced, so an N+1 regression fails here instead of only being logged in production
+@override_settings(PROFILING={**settings.PROFILING, 'ENABLED': True, 'BUDGET_MODE': 'raise'})
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='member', password='secret', role='member')
+        others = [CustomUser.objects.create_user(username=f'other{i}', password='secret', role='member') for i in range(3)]
+        book = Book.objects.create(title='Book', author='Author', genre='Genre', description='Description')
+        for i in range(3):
+            group = Group.objects.create(name=f'Group {i}', book=book, reading_goals='Goals')
+            group.members.add(cls.user, *others)
+            for j in range(3):
+                chapter = Chapter.objects.create(group=group, title=f'Chapter {j}', deadline=date(2025, 1, 1))
+                chapter.is_read.add(*others[:j])
+                for k in range(3):
+                    post = Discussion.objects.create(chapter=chapter, user=others[k], content=f'Post {k}')
+                    Discussion.objects.create(chapter=chapter, user=cls.user, content='Reply', parent=post)
+        rebuild_counters()
+        cls.group, cls.chapter = group, chapter
+
+    def setUp(self):
+        cache.clear()
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {ClaimsTokenObtainPairSerializer.get_token(self.user).access_token}'
+
+    def assertWithinBudget(self, path, **params):
+        response = self.client.get(path, params)
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def test_catalog_and_group_endpoints(self):
+        self.assertWithinBudget('/api/books/')
+        self.assertWithinBudget('/api/groups/')
+        self.assertWithinBudget(f'/api/groups/{self.group.id}/')
+        self.assertWithinBudget(f'/api/groups/{self.group.id}/chapters/')
+
+    def test_composite_page_endpoints(self):
+        self.assertWithinBudget('/api/home/')
+        self.assertWithinBudget(f'/api/groups/{self.group.id}/dashboard/')
+
+    def test_progress_endpoints(self):
+        self.assertWithinBudget('/api/progress/')
+        self.assertWithinBudget('/api/progress/summary/')
+        self.assertWithinBudget('/api/chapter-deadline-notifications/')
+
+    def test_discussion_endpoints(self):
+        self.assertWithinBudget(f'/api/groups/{self.group.id}/discussions_by_chapter/', chapter_id=self.chapter.id)
+        self.assertWithinBudget(f'/api/groups/{self.group.id}/discussions_by_chapter/feed/', chapter_id=self.chapter.id)
+        self.assertWithinBudget('/api/search/', q='post')
+
+    # Queries recorded for a request, after resetting the caches it fills
+    def recorded_queries(self, name, request):
+        cache.clear()
+        auth_states.clear()
+        get_registry().reset()
+        response = request()
+        self.assertEqual(response.status_code, 200, response.content)
+        return get_registry().snapshot()[name]["sql_queries"]["max"]
+
+    # Under ASGI, sync views run in a worker thread; their queries still count towards the budget
+    def test_async_client_counts_sync_view_queries(self):
+        headers = {'Authorization': self.client.defaults['HTTP_AUTHORIZATION']}
+        wsgi_queries = self.recorded_queries('view_progress', lambda: self.client.get('/api/progress/'))
+        asgi_queries = self.recorded_queries('view_progress', lambda: async_to_sync(self.async_client.get)('/api/progress/', headers=headers))
+        self.assertGreater(wsgi_queries, 0)
+        self.assertEqual(asgi_queries, wsgi_queries)
+        with self.settings(PROFILING={**settings.PROFILING, 'BUDGET_MODE': 'raise', 'QUERY_BUDGETS': {'view_progress': 1}}):
+            # The middleware reads its settings when the handler loads it
+            with self.assertRaisesMessage(QueryBudgetExceeded, "view_progress ran"):
+                async_to_sync(AsyncClient().get)('/api/progress/', headers=headers)
+
+    # Streaming responses are recorded once their body is sent, with the queries that ran while streaming
+    def test_streaming_response_recorded_after_body(self):
+        admin = CustomUser.objects.create_user(username='admin', password='secret', role='admin')
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {ClaimsTokenObtainPairSerializer.get_token(admin).access_token}'
+        get_registry().reset()
+        response = self.client.get('/api/exports/discussions/')
+        self.assertNotIn('export_dataset', get_registry().snapshot())
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 54)
+        self.assertGreater(get_registry().snapshot()['export_dataset']["sql_queries"]["max"], 0)
+
+
+# The dataset and benchmark commands run end to end on a tiny dataset
+class BenchmarkCommandTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.log = io.StringIO()
+        call_command(
+            'generate_synthetic_data', '--users', '12', '--books', '2', '--groups', '3', '--chapters', '7',
+            '--discussions', '20', '--members-per-group', '4', '--admins', '1', '--batch-size', '2', stdout=cls.log,
+        )
+
+    def setUp(self):
+        cache.clear()
+        auth_states.clear()
+
+    def test_generate_synthetic_data(self):
+        self.assertEqual(
+            (CustomUser.objects.count(), Group.objects.count(), Chapter.objects.count(), Discussion.objects.count()),
+            (12, 3, 7, 20),
+        )
+        # Chapters are created and filled one batch at a time
+        self.assertIn("2 chapters, ", self.log.getvalue())
+        self.assertIn("7 chapters, 20 discussions", self.log.getvalue())
+        self.assertEqual(verify_counters(), [])
+
+    def test_run_benchmarks_leaves_the_dataset_unchanged(self):
+        read_marks = list(Chapter.is_read.through.objects.order_by('id').values_list('chapter_id', 'customuser_id'))
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch('Group_Book_Reading_App.management.commands.run_benchmarks.setup_test_environment'), \
+                mock.patch('Group_Book_Reading_App.management.commands.run_benchmarks.teardown_test_environment'):
+            output = Path(directory) / 'baseline.json'
+            # An odd number of toggles per context would leave read marks flipped without the rollback
+            call_command('run_benchmarks', '--iterations', '2', '--warmup', '1', '--output', str(output), stdout=io.StringIO())
+            report = json.loads(output.read_text())
+        self.assertEqual(set(report['results']), {scenario.name for scenario in SCENARIOS})
+        self.assertEqual([name for name, result in report['results'].items() if result['errors']], [])
+        self.assertEqual(list(Chapter.is_read.through.objects.order_by('id').values_list('chapter_id', 'customuser_id')), read_marks)
+        self.assertEqual(verify_counters(), [])
+
+    def test_benchmark_serializers(self):
+        out = io.StringIO()
+        call_command('benchmark_serializers', '--rows', '5', '--iterations', '1', stdout=out)
+        self.assertEqual([line.split()[:2] for line in out.getvalue().splitlines()[1:]], [['books', '2'], ['groups', '3'], ['chapters', '5']])
+
+
+# The async views of the ASGI profile answer like the sync views they replace, within the same query budgets
+@override_settings(PROFILING={**settings.PROFILING, 'ENABLED': True, 'BUDGET_MODE': 'raise'})
+class AsyncViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='member', password='secret', role='member')
+        cls.outsider = CustomUser.objects.create_user(username='outsider', password='secret', role='member')
+        book = Book.objects.create(title='Book', author='Author', genre='Genre', description='Description')
+        cls.group = Group.objects.create(name='Group', book=book, reading_goals='Goals')
+        cls.group.members.add(cls.user)
+        for j in range(3):
+            cls.chapter = Chapter.objects.create(group=cls.group, title=f'Chapter {j}', deadline=date(2025, 1, j + 1))
+            cls.chapter.is_read.add(cls.user)
+            post = Discussion.objects.create(chapter=cls.chapter, user=cls.user, content=f'Post {j}')
+            Discussion.objects.create(chapter=cls.chapter, user=cls.user, content='Reply', parent=post)
+
+    def setUp(self):
+        cache.clear()
+        auth_states.clear()
+        get_registry().reset()
+
+    def authorization(self, user):
+        return f'Bearer {ClaimsTokenObtainPairSerializer.get_token(user).access_token}'
+
+    # Response of the async view behind `path`, through the profiling middleware as under ASGI
+    def async_get(self, view, path, params=None, user=None, method='get'):
+        headers = {'Authorization': self.authorization(user or self.user)} if user is not False else {}
+        request = getattr(AsyncRequestFactory(), method)(path, params or {}, headers=headers)
+        request.resolver_match = match = resolve(path)
+
+        async def get_response(request):
+            return await view(request, **match.kwargs)
+        return async_to_sync(RequestProfilingMiddleware(get_response))(request)
+
+    def test_matches_sync_views(self):
+        self.client.defaults['HTTP_AUTHORIZATION'] = self.authorization(self.user)
+        discussions = f'/api/groups/{self.group.id}/discussions_by_chapter/'
+        cases = [
+            (async_views.get_books, '/api/books/', {}),
+            (async_views.get_books, '/api/books/', {'fields': 'id,title', 'limit': 1}),
+            (async_views.get_group, f'/api/groups/{self.group.id}/', {}),
+            (async_views.group_chapters, f'/api/groups/{self.group.id}/chapters/', {'expand': ''}),
+            (async_views.fetch_discussions_by_chapter, discussions, {'chapter_id': self.chapter.id}),
+            (async_views.fetch_discussions_by_chapter, discussions, {'chapter_id': self.chapter.id, 'last_fetched_at': '2000-01-01T00:00:00'}),
+            (async_views.fetch_discussions_by_chapter, discussions, {'chapter_id': self.chapter.id, 'last_fetched_at': 'soon'}),
+            (async_views.fetch_discussions_by_chapter, discussions, {}),
+            (async_views.view_progress, '/api/progress/', {}),
+            (async_views.get_books, '/api/books/', {'fields': 'isbn'}),
+        ]
+        for view, path, params in cases:
+            with self.subTest(path=path, params=params):
+                cache.clear()
+                expected = self.client.get(path, params)
+                cache.clear()
+                response = self.async_get(view, path, params)
+                self.assertEqual(response.status_code, expected.status_code)
+                self.assertEqual(json.loads(response.content), expected.json())
+
+    def test_queries_are_counted_and_budgeted(self):
+        self.async_get(async_views.view_progress, '/api/progress/')
+        self.assertGreater(get_registry().snapshot()['view_progress']["sql_queries"]["max"], 0)
+        with self.settings(PROFILING={**settings.PROFILING, 'BUDGET_MODE': 'raise', 'QUERY_BUDGETS': {'view_progress': 1}}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.async_get(async_views.view_progress, '/api/progress/')
+
+    def test_access_control(self):
+        path = f'/api/groups/{self.group.id}/chapters/'
+        self.assertEqual(self.async_get(async_views.group_chapters, path, user=False).status_code, 401)
+        self.assertEqual(self.async_get(async_views.group_chapters, path, user=self.outsider).status_code, 403)
+        self.assertEqual(self.async_get(async_views.group_chapters, path, method='post').status_code, 405)
+        self.assertEqual(self.async_get(async_views.get_group, '/api/groups/999999/').status_code, 404)
+
+
+# The stateless JWT authentication serves role checks from the token claims and the revocation cache
+class ClaimsAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='member', password='secret', role='member')
+
+    def setUp(self):
+        auth_states.clear()
+        token = ClaimsTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+
+    def test_login_token_carries_claims(self):
+        response = self.client.post('/api/login/', {'username': 'member', 'password': 'secret'})
+        self.assertEqual(response.status_code, 200)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f"Bearer {response.json()['access']}"
+        self.assertEqual(self.client.get('/api/member-view/').status_code, 200)
+
+    def test_cached_auth_state_costs_no_queries(self):
+        self.client.get('/api/user-info/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/user-info/')
+        self.assertEqual(response.json(), {"role": "member", "id": self.user.id, "username": "member"})
+
+    def test_role_change_revokes_token(self):
+        self.assertEqual(self.client.get('/api/member-view/').status_code, 200)
+        self.user.role = 'admin'
+        self.user.save()
+        self.assertEqual(self.client.get('/api/member-view/').status_code, 401)
+
+    def test_deactivation_revokes_token(self):
+        self.assertEqual(self.client.get('/api/member-view/').status_code, 200)
+        CustomUser.objects.filter(id=self.user.id).update(is_active=False)
+        auth_states.evict(self.user.id)  # Queryset updates send no signal; other processes wait for the TTL
+        self.assertEqual(self.client.get('/api/member-view/').status_code, 401)
+
+    def test_username_change_revokes_token(self):
+        self.assertEqual(self.client.get('/api/member-view/').status_code, 200)
+        self.user.username = 'renamed'
+        self.user.save()
+        self.assertEqual(self.client.get('/api/member-view/').status_code, 401)
+
+    # The cache settings apply without a restart: with no room for entries, every request reads the auth state
+    @override_settings(JWT_REVOCATION_CACHE={'MAX_SIZE': 0})
+    def test_cache_settings_are_read_at_use(self):
+        self.client.get('/api/user-info/')
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/api/user-info/').status_code, 200)
+
+
+# Membership checks are served from the per-user group id cache, which membership changes drop on commit
+class MembershipCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='member', password='secret', role='member')
+        book = Book.objects.create(title='Book', author='Author', genre='Genre', description='Description')
+        cls.group = Group.objects.create(name='Group', book=book, reading_goals='Goals')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cached_check_costs_no_queries(self):
+        self.assertFalse(is_member(self.user, self.group.id))
+        with self.assertNumQueries(0):
+            self.assertFalse(is_member(self.user, self.group.id))
+
+    def test_membership_changes_invalidate_cache(self):
+        self.assertFalse(is_member(self.user, self.group.id))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.members.add(self.user)
+        self.assertTrue(is_member(self.user, self.group.id))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.user_groups.remove(self.group)
+        self.assertFalse(is_member(self.user, self.group.id))
+
+    def test_group_delete_invalidates_cache(self):
+        self.group.members.add(self.user)
+        group_id = self.group.id
+        self.assertTrue(is_member(self.user, group_id))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.delete()
+        self.assertFalse(is_member(self.user, group_id))
+
+    def test_fill_racing_an_invalidation_is_not_kept(self):
+        group_ids_query = membership._group_ids_query
+
+        # The user joins (and the join commits) after the fill has read the old memberships
+        def racing_query(user_id):
+            group_ids = list(group_ids_query(user_id))
+            with self.captureOnCommitCallbacks(execute=True):
+                self.group.members.add(self.user)
+            return group_ids
+
+        with mock.patch.object(membership, '_group_ids_query', racing_query):
+            self.assertFalse(is_member(self.user, self.group.id))
+        self.assertTrue(is_member(self.user, self.group.id))
+
+
+# Catalog responses are cached per catalog version and revalidated with ETag / Last-Modified; writes to books,
+# groups and memberships move the version on commit
+class CatalogCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(username='admin', password='secret', role='admin')
+        cls.member = CustomUser.objects.create_user(username='member', password='secret', role='member')
+        cls.book = Book.objects.create(title='Book', author='Author', genre='Genre', description='Description')
+
+    def setUp(self):
+        cache.clear()
+        auth_states.clear()
+
+    def get_books(self, user=None, **headers):
+        token = ClaimsTokenObtainPairSerializer.get_token(user or self.member).access_token
+        return self.client.get('/api/books/', headers={'Authorization': f'Bearer {token}', **headers})
+
+    def test_conditional_requests(self):
+        response = self.get_books()
+        self.assertEqual((response.status_code, response['Cache-Control']), (200, 'private, no-cache'))
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        self.assertEqual(self.get_books(**{'If-None-Match': etag}).status_code, 304)
+        self.assertEqual(self.get_books(**{'If-None-Match': f'"other", {etag}'}).status_code, 304)
+        self.assertEqual(self.get_books(**{'If-None-Match': '"other"'}).status_code, 200)
+        self.assertEqual(self.get_books(**{'If-Modified-Since': last_modified}).status_code, 304)
+        # A cached response costs no catalog queries, and is the same as the first one
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_books().content, response.content)
+
+    def test_book_writes_invalidate(self):
+        etag = self.get_books()['ETag']
+        token = ClaimsTokenObtainPairSerializer.get_token(self.admin).access_token
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                '/api/books/create/',
+                {'title': 'New book', 'author': 'Author', 'genre': 'Genre', 'description': 'Description'},
+                headers={'Authorization': f'Bearer {token}'},
+            )
+        response = self.get_books(**{'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('New book', [book["title"] for book in response.json()["results"]])
+
+    def test_group_and_membership_writes_invalidate(self):
+        etags = [self.get_books()['ETag']]
+        with self.captureOnCommitCallbacks(execute=True):
+            group = Group.objects.create(name='Group', book=self.book, reading_goals='Goals')
+        etags.append(self.get_books()['ETag'])
+        with self.captureOnCommitCallbacks(execute=True):
+            group.members.add(self.member)
+        etags.append(self.get_books()['ETag'])
+        self.assertEqual(len(set(etags)), 3)
+        # A write that rolls back leaves the version alone
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Book.objects.create(title='Rolled back', author='Author', genre='Genre', description='Description')
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(self.get_books(**{'If-None-Match': etags[-1]}).status_code, 304)
+
+    def test_username_change_invalidates(self):
+        group = Group.objects.create(name='Group', book=self.book, reading_goals='Goals')
+        group.members.add(self.member)
+        etag = self.get_books()['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.member.last_login = datetime.now(dt_timezone.utc)
+            self.member.save(update_fields=['last_login'])
+            self.member.email = 'member@example.com'
+            self.member.save()
+        self.assertEqual(self.get_books(**{'If-None-Match': etag}).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.member.username = 'renamed'
+            self.member.save()
+        self.assertEqual(self.get_books(**{'If-None-Match': etag}).status_code, 200)
+
+    def test_concurrent_bumps_are_not_lost(self):
+        version = catalog_version()
+        stale = mock.patch.object(caches['default'], 'get', return_value=version)
+        # Two processes read the same version before either one writes
+        with mock.patch('Group_Book_Reading_App.catalog_cache.time.time', return_value=version / 1000), stale:
+            bump_catalog_version()
+            bump_catalog_version()
+        self.assertEqual(catalog_version(), version + 2)
+
+
+# Several processes cannot share cached state through a process-local cache
+class SharedCacheCheckTests(TestCase):
+    SHARED = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost:6379/0'}}
+
+    def test_single_process_may_use_local_cache(self):
+        self.assertEqual(shared_cache_problems(), [])
+
+    @override_settings(WEB_CONCURRENCY=2)
+    def test_several_processes_need_shared_catalog_and_membership_cache(self):
+        self.assertEqual(shared_cache_problems(), [
+            "CACHES['default'] uses the process-local django.core.cache.backends.locmem.LocMemCache but holds "
+            "the catalog version (CATALOG_CACHE), the membership ids (MEMBERSHIP_CACHE)",
+        ])
+        with self.settings(CACHES=self.SHARED):
+            self.assertEqual(shared_cache_problems(), [])
+        with self.settings(CATALOG_CACHE={'ALIAS': 'catalog'}, MEMBERSHIP_CACHE={'ALIAS': 'membership'}):
+            self.assertEqual(shared_cache_problems(), [
+                "CACHES has no 'catalog' alias for the catalog version (CATALOG_CACHE)",
+                "CACHES has no 'membership' alias for the membership ids (MEMBERSHIP_CACHE)",
+            ])
+
+    # A member removed in one process must not stay authorized in another
+    @override_settings(WEB_CONCURRENCY=2, MEMBERSHIP_CACHE={'ALIAS': 'membership'})
+    def test_membership_cache_must_be_shared(self):
+        local = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+        with self.settings(CACHES={**self.SHARED, 'membership': local}):
+            self.assertEqual(shared_cache_problems(), [
+                "CACHES['membership'] uses the process-local django.core.cache.backends.locmem.LocMemCache but holds "
+                "the membership ids (MEMBERSHIP_CACHE)",
+            ])
+            with self.assertRaisesMessage(ImproperlyConfigured, "the membership ids (MEMBERSHIP_CACHE). Configure a shared"):
+                check_shared_caches()
+        with self.settings(CACHES={**self.SHARED, 'membership': self.SHARED['default']}):
+            check_shared_caches()
+
+    # Workers are processes of their own: the caches they invalidate must be shared with the server
+    @override_settings(JOB_QUEUE={'ENABLED': True})
+    def test_job_queue_needs_shared_cache(self):
+        self.assertEqual(len(shared_cache_problems()), 1)
+        with self.settings(CACHES=self.SHARED):
+            self.assertEqual(shared_cache_problems(), [])
+
+    # The pin of a user who wrote through one process must hold their next request on the primary in any other
+    @override_settings(REPLICA_ROUTING={'REPLICAS': ['replica_1'], 'CACHE_ALIAS': 'pins'})
+    def test_replicas_need_shared_pin_cache(self):
+        self.assertEqual(shared_cache_problems(), ["CACHES has no 'pins' alias for the replica pins (REPLICA_ROUTING)"])
+        with self.settings(CACHES={**settings.CACHES, 'pins': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            with self.assertRaisesMessage(ImproperlyConfigured, "CACHES['pins'] uses the process-local"):
+                check_shared_caches()
+        with self.settings(CACHES={**settings.CACHES, 'pins': self.SHARED['default']}):
+            self.assertEqual(shared_cache_problems(), [])
+        with self.settings(REPLICA_ROUTING={'REPLICAS': [], 'CACHE_ALIAS': 'pins'}):
+            self.assertEqual(shared_cache_problems(), [])
+
+
+# Safe requests read from a replica, except for users who wrote within the pin window.
+# A TransactionTestCase: reads inside a transaction on the primary never go to a replica.
+@override_settings(REPLICA_ROUTING={'REPLICAS': ['replica_1'], 'PIN_SECONDS': 60, 'CACHE_ALIAS': 'default'})
+class ReplicaRoutingTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        auth_states.clear()
+        self.writer = CustomUser.objects.create_user(username='writer', password='secret', role='member')
+        self.reader = CustomUser.objects.create_user(username='reader', password='secret', role='member')
+
+    # Database the user's reads are routed to during a request with this method and response status
+    def read_alias(self, method, user, status_code=200):
+        routed = []
+
+        def view(request):
+            request.user = ClaimsJWTAuthentication().authenticate(request)[0]
+            routed.append(router.db_for_read(Book))
+            return HttpResponse(status=status_code)
+
+        token = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+        request = RequestFactory().generic(method, '/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        ReplicaPinningMiddleware(view)(request)
+        return routed[0]
+
+    def test_safe_requests_read_from_replica(self):
+        self.assertEqual(self.read_alias('GET', self.reader), 'replica_1')
+        self.assertEqual(self.read_alias('POST', self.reader), 'default')
+        self.assertEqual(router.db_for_read(Book), 'default')  # Outside a request
+        self.assertEqual(router.db_for_write(Book), 'default')
+
+    def test_writer_reads_own_writes_from_primary(self):
+        self.read_alias('POST', self.writer)
+        self.assertEqual(self.read_alias('GET', self.writer), 'default')
+        self.assertEqual(self.read_alias('GET', self.reader), 'replica_1')
+
+    def test_failed_write_does_not_pin(self):
+        self.read_alias('POST', self.writer, status_code=400)
+        self.assertEqual(self.read_alias('GET', self.writer), 'replica_1')
+
+    def test_primary_reads_and_transactions_use_primary(self):
+        def view(request):
+            with primary_reads():
+                routed.append(router.db_for_read(Book))
+            with transaction.atomic():
+                routed.append(router.db_for_read(Book))
+            return HttpResponse()
+
+        routed = []
+        ReplicaPinningMiddleware(view)(RequestFactory().get('/'))
+        self.assertEqual(routed, ['default', 'default'])
+
+    def test_catalog_cache_fills_from_primary(self):
+        @catalog_cache('routing')
+        def view(request):
+            routed.append(router.db_for_read(Book))
+            return Response([])
+
+        def listing(request):
+            routed.append(router.db_for_read(Book))
+            return view(request)
+
+        routed = []
+        ReplicaPinningMiddleware(listing)(RequestFactory().get('/'))
+        self.assertEqual(routed, ['replica_1', 'default'])
+
+
+# Creating or joining a group never duplicates groups or memberships, and Idempotency-Key retries replay the response
+class IdempotentJoinTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='member', password='secret', role='member')
+        cls.other = CustomUser.objects.create_user(username='other', password='secret', role='member')
+        cls.book = Book.objects.create(title='Book', author='Author', genre='Genre', description='Description')
+        cls.path = f'/api/books/{cls.book.id}/groups/'
+
+    def setUp(self):
+        cache.clear()
+
+    def join(self, user, name='Group', **headers):
+        token = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+        return self.client.post(
+            self.path, {'name': name, 'reading_goals': 'Goals'}, content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {token}', **headers,
+        )
+
+    def test_create_then_join(self):
+        self.assertEqual(self.join(self.user).status_code, 201)
+        response = self.join(self.other)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['group']['members'], [
+            {"id": self.user.id, "username": "member"}, {"id": self.other.id, "username": "other"},
+        ])
+        self.assertEqual(self.join(self.user).status_code, 400)
+        self.assertEqual(Group.objects.count(), 1)
+        self.assertTrue(is_member(self.other, response.json()['group']['id']))
+
+    def test_retry_with_key_replays_response(self):
+        first = self.join(self.user, HTTP_IDEMPOTENCY_KEY='join-1')
+        retry = self.join(self.user, HTTP_IDEMPOTENCY_KEY='join-1')
+        self.assertEqual((retry.status_code, retry.json()), (201, first.json()))
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(self.join(self.user, name='Other', HTTP_IDEMPOTENCY_KEY='join-1').status_code, 422)
+        self.assertEqual(Group.objects.count(), 1)
+
+    def test_concurrent_retry_replays_first_response(self):
+        first = self.join(self.user, HTTP_IDEMPOTENCY_KEY='join-1')
+        stored = idempotency._stored
+        lookups = []
+
+        # The retry's first lookup runs before the first request has committed
+        def racing_lookup(user, key):
+            lookups.append(key)
+            return None if len(lookups) == 1 else stored(user, key)
+
+        with mock.patch.object(idempotency, '_stored', racing_lookup):
+            retry = self.join(self.user, HTTP_IDEMPOTENCY_KEY='join-1')
+        self.assertEqual((retry.status_code, retry.json()), (201, first.json()))
+        self.assertEqual(IdempotencyRecord.objects.count(), 1)
+
+
+# Heavy writes answer 202 with a background job; workers run it in chunks and retry failures with backoff
+@override_settings(JOB_QUEUE={**settings.JOB_QUEUE, 'ENABLED': True, 'CHUNK_SIZE': 2})
+class JobQueueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(username='admin', password='secret', role='admin')
+        cls.members = [CustomUser.objects.create_user(username=f'member{i}', password='secret', role='member') for i in range(4)]
+        cls.book, cls.other_book = [
+            Book.objects.create(title=title, author='Author', genre='Genre', description='Description') for title in ('Book', 'Other')
+        ]
+        for book in (cls.book, cls.other_book):
+            for i in range(2):
+                group = Group.objects.create(name=f'Group {i}', book=book, reading_goals='Goals')
+                group.members.add(*cls.members)
+                for j in range(3):
+                    chapter = Chapter.objects.create(group=group, title=f'Chapter {j}', deadline=date(2025, 1, 1))
+                    chapter.is_read.add(*cls.members[:j])
+                    post = Discussion.objects.create(chapter=chapter, user=cls.members[0], content='Post')
+                    Discussion.objects.create(chapter=chapter, user=cls.members[1], content='Reply', parent=post)
+        cls.group = group
+
+    def setUp(self):
+        cache.clear()
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {ClaimsTokenObtainPairSerializer.get_token(self.admin).access_token}'
+
+    def run_jobs(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return jobs.run_pending_jobs()
+
+    def test_delete_book_runs_as_job(self):
+        group_id = self.book.groups.first().id
+        self.assertTrue(is_member(self.members[0], group_id))
+        response = self.client.delete(f'/api/books/{self.book.id}/delete/')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['job']['status'], 'queued')
+        self.assertTrue(Book.objects.filter(id=self.book.id).exists())
+
+        self.assertEqual(self.run_jobs(), 1)
+        self.assertFalse(Book.objects.filter(id=self.book.id).exists())
+        self.assertFalse(Discussion.objects.filter(chapter__group__book_id=self.book.id).exists())
+        self.assertEqual(Chapter.objects.count(), 6)
+        self.assertEqual(Discussion.objects.count(), 12)
+        self.assertFalse(is_member(self.members[0], group_id))
+        status = self.client.get(response['Location']).json()
+        self.assertEqual(status['status'], 'succeeded')
+        self.assertEqual(status['result'], {
+            'discussions': 12, 'read_marks': 6, 'notifications': 0, 'chapter_progress': 0,
+            'chapters': 6, 'memberships': 8, 'groups': 2, 'books': 1,
+        })
+
+    def test_large_member_reset_runs_as_job(self):
+        members = [{'username': 'member0'}, {'username': 'admin'}]
+        response = self.client.patch(f'/api/groups/{self.group.id}/update/', {'members': members, 'name': 'Renamed'}, content_type='application/json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['group']['name'], 'Renamed')
+        self.run_jobs()
+        self.assertEqual(sorted(self.group.members.values_list('username', flat=True)), ['admin', 'member0'])
+        self.assertEqual(Job.objects.get().result, {'removed': 3, 'added': 1})
+        # Small changes are applied inline
+        response = self.client.patch(f'/api/groups/{self.group.id}/update/', {'members': [{'username': 'member0'}]}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([member['username'] for member in response.json()['members']], ['member0'])
+
+    def test_failed_job_is_retried_with_backoff(self):
+        attempts = []
+
+        def flaky(job):
+            attempts.append(job.attempts)
+            raise RuntimeError("temporary failure")
+
+        with mock.patch.dict(jobs.TASKS, {'flaky': flaky}), self.assertLogs('Group_Book_Reading_App.jobs', 'ERROR'):
+            job = jobs.enqueue('flaky')
+            jobs.run_pending_jobs()
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), ('queued', 1))
+            self.assertGreater(job.run_after, job.created_at)
+            self.assertEqual(jobs.run_pending_jobs(), 0)  # Not due yet
+            Job.objects.filter(id=job.id).update(run_after=job.created_at, attempts=job.max_attempts - 1)
+            jobs.run_pending_jobs()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.last_error), ('failed', "RuntimeError('temporary failure')"))
+        self.assertEqual(attempts, [1, job.max_attempts])
+
+    def test_job_status_is_private_to_its_creator(self):
+        job = jobs.enqueue('generate_deadline_notifications', user=self.admin)
+        token = ClaimsTokenObtainPairSerializer.get_token(self.members[0]).access_token
+        self.assertEqual(self.client.get(f'/api/jobs/{job.id}/', HTTP_AUTHORIZATION=f'Bearer {token}').status_code, 404)
+        self.assertEqual(self.client.get(f'/api/jobs/{job.id}/').json()['status'], 'queued')
+
+    # Without the queue, heavy writes run in the request and answer synchronously, and jobs run in the process
+    # that queued them, so its caches see their invalidations
+    def test_disabled_queue_runs_jobs_in_process(self):
+        group_id = self.book.groups.first().id
+        self.assertTrue(is_member(self.members[0], group_id))
+        with self.settings(JOB_QUEUE={**settings.JOB_QUEUE, 'ENABLED': False, 'CHUNK_SIZE': 2}):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.delete(f'/api/books/{self.book.id}/delete/')
+            self.assertEqual(response.status_code, 204)
+            self.assertFalse(Book.objects.filter(id=self.book.id).exists())
+            self.assertFalse(is_member(self.members[0], group_id))
+            job = Job.objects.get()
+            self.assertEqual((job.status, job.attempts, job.max_attempts, job.locked_by), ('succeeded', 1, 1, 'inline'))
+            self.assertEqual(jobs.run_pending_jobs(), 0)
+            members = [{'username': 'member0'}, {'username': 'admin'}]
+            response = self.client.patch(f'/api/groups/{self.group.id}/update/', {'members': members}, content_type='application/json')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(sorted(member['username'] for member in response.json()['members']), ['admin', 'member0'])
+            self.assertEqual(Job.objects.count(), 1)
+            with self.assertRaisesMessage(CommandError, "The job queue is disabled"):
+                call_command('run_jobs', '--burst')
+
+            # A failed job is not retried: no worker would pick the retry up
+            with mock.patch.dict(jobs.TASKS, {'flaky': mock.Mock(side_effect=RuntimeError("failure"))}):
+                with self.assertLogs('Group_Book_Reading_App.jobs', 'ERROR'), self.captureOnCommitCallbacks(execute=True):
+                    failed = jobs.enqueue('flaky')
+            self.assertEqual((failed.status, failed.last_error), ('failed', "RuntimeError('failure')"))
+
+
+# Dataset exports stream every row, in id order, as NDJSON or CSV
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(username='admin', password='secret', role='admin')
+        cls.books = [
+            Book.objects.create(title=f'Book {i}', author='Author', genre='Genre', description='Line one\nline "two"')
+            for i in range(5)
+        ]
+
+    def setUp(self):
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {ClaimsTokenObtainPairSerializer.get_token(self.admin).access_token}'
+
+    def export(self, dataset, **params):
+        response = self.client.get(f'/api/exports/{dataset}/', params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson_export(self):
+        rows = [json.loads(line) for line in self.export('books').splitlines()]
+        self.assertEqual([row['id'] for row in rows], [book.id for book in self.books])
+        self.assertEqual(rows[0]['description'], 'Line one\nline "two"')
+
+    def test_csv_export_after_id(self):
+        rows = list(csv.reader(io.StringIO(self.export('books', output='csv', after_id=self.books[2].id))))
+        self.assertEqual(rows[0], ['id', 'title', 'author', 'genre', 'description'])
+        self.assertEqual([int(row[0]) for row in rows[1:]], [book.id for book in self.books[3:]])
+
+    def test_exports_are_admin_only(self):
+        member = CustomUser.objects.create_user(username='member', password='secret', role='member')
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {ClaimsTokenObtainPairSerializer.get_token(member).access_token}'
+        self.assertEqual(self.client.get('/api/exports/books/').status_code, 403)
+
+
+# The compiled row serializers render the same bytes as the DRF serializers for every field selection
+class RowSerializerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        users = [CustomUser.objects.create_user(username=f'user{i}', password='secret') for i in range(4)]
+        for i in range(3):
+            book = Book.objects.create(title=f'Book "{i}"', author='Author', genre='Genre', description='Déjà vu\n')
+            group = Group.objects.create(name=f'Group {i}', book=book, reading_goals='Goals')
+            group.members.add(*reversed(users[i:]))
+            for j in range(2):
+                chapter = Chapter.objects.create(group=group, title=f'Chapter {j}', deadline=date(2025, 1, j + 1))
+                chapter.is_read.add(*users[j:])
+
+    def test_rows_match_drf_serializers(self):
+        selections = [(None, None), (['id', 'title'], None), (None, []), (None, ['book']), (['members', 'name', 'is_read', 'deadline'], [])]
+        for serializer_class in (BookSerializer, GroupSerializer, ChapterSerializer):
+            queryset = serializer_class.Meta.model.objects.all()
+            for fields, expand in selections:
+                with self.subTest(serializer=serializer_class.__name__, fields=fields, expand=expand):
+                    self.assertEqual(
+                        JSONRenderer().render(serializer_class.row_serializer.serialize(queryset, fields, expand)),
+                        JSONRenderer().render(serializer_class(queryset, many=True, fields=fields, expand=expand).data),
+                    )
+
+
+# List endpoints select fields and expansions by name and page through the rows with an id cursor
+class ListParameterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = CustomUser.objects.create_user(username='member', password='secret', role='member')
+        cls.books = [Book.objects.create(title=f'Book {i}', author='Author', genre='Genre', description='Description') for i in range(5)]
+        Group.objects.create(name='Group', book=cls.books[0], reading_goals='Goals').members.add(cls.member)
+
+    def setUp(self):
+        cache.clear()
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {ClaimsTokenObtainPairSerializer.get_token(self.member).access_token}'
+
+    def test_fields_and_expand(self):
+        books = self.client.get('/api/books/', {'fields': 'id,title'}).json()["results"]
+        self.assertEqual(books[0], {"id": self.books[0].id, "title": 'Book 0'})
+        group = self.client.get('/api/groups/', {'expand': 'members'}).json()["results"][0]
+        self.assertEqual((group["book"], group["members"]), (self.books[0].id, [{"id": self.member.id, "username": 'member'}]))
+        group = self.client.get('/api/groups/', {'fields': 'name,book', 'expand': 'book', 'limit': 'all'}).json()[0]
+        self.assertEqual((sorted(group), group["book"]["title"]), (['book', 'name'], 'Book 0'))
+
+    def test_unknown_names_are_rejected(self):
+        response = self.client.get('/api/books/', {'fields': 'id,titel,colour'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json()["detail"],
+            "Unknown fields: titel, colour. Valid fields: author, description, genre, id, title.",
+        )
+        response = self.client.get('/api/groups/', {'expand': 'book,owner'})
+        self.assertEqual((response.status_code, response.json()["detail"]), (400, "Unknown expand: owner. Valid expand: book, members."))
+        self.assertEqual(self.client.get('/api/books/', {'expand': 'author'}).json()["detail"], "Unknown expand: author. Valid expand: none.")
+
+    def test_cursor_pagination(self):
+        pages, params = [], {'limit': 2, 'fields': 'id'}
+        while True:
+            page = self.client.get('/api/books/', params).json()
+            pages.append(([book["id"] for book in page["results"]], page["has_more"]))
+            params = {**params, 'cursor': page["next_cursor"]}
+            if not page["has_more"]:
+                break
+        ids = [book.id for book in self.books]
+        self.assertEqual(pages, [(ids[0:2], True), (ids[2:4], True), (ids[4:], False)])
+        # The last cursor stays valid and picks up rows added later
+        self.assertEqual(self.client.get('/api/books/', params).json()["results"], [])
+        with self.captureOnCommitCallbacks(execute=True):
+            book = Book.objects.create(title='Book 5', author='Author', genre='Genre', description='Description')
+        self.assertEqual(self.client.get('/api/books/', params).json()["results"], [{"id": book.id}])
+        for params in ({'cursor': 'not-a-cursor'}, {'limit': 'many'}, {'limit': 'all', 'cursor': params['cursor']}):
+            self.assertEqual(self.client.get('/api/books/', params).status_code, 400)
+
+    @mock.patch('Group_Book_Reading_App.pagination.MAX_PAGE_SIZE', 3)
+    @mock.patch('Group_Book_Reading_App.pagination.DEFAULT_PAGE_SIZE', 2)
+    def test_lists_are_paged_unless_opted_out(self):
+        ids = [book.id for book in self.books]
+        page = self.client.get('/api/books/', {'fields': 'id'}).json()
+        self.assertEqual(([book["id"] for book in page["results"]], page["has_more"]), (ids[:2], True))
+        page = self.client.get('/api/books/', {'fields': 'id', 'limit': 50}).json()
+        self.assertEqual(([book["id"] for book in page["results"]], page["has_more"]), (ids[:3], True))
+        # limit=all keeps the unpaged shape: the full list as a bare array
+        self.assertEqual(self.client.get('/api/books/', {'fields': 'id', 'limit': 'all'}).json(), [{"id": book_id} for book_id in ids])
+
+
+# The JSON renderer renders DRF's bytes with and without orjson, and splices pre-encoded fragments
+class FastJSONRendererTests(TestCase):
+    data = {
+        "text": "Déjà vu \u2028 \"quoted\"",
+        "created_at": datetime(2025, 1, 27, 5, 37, 0, 120000, tzinfo=dt_timezone.utc),
+        "naive": datetime(2025, 1, 27, 5, 37),
+        "deadline": date(2025, 2, 1),
+        "score": Decimal('1.5'),
+        "ratio": 2 / 3,
+        "ids": [1, 2, None, True],
+        7: "integer key",
+    }
+
+    def test_matches_drf_renderer(self):
+        expected = JSONRenderer().render(self.data)
+        self.assertEqual(FastJSONRenderer().render(self.data), expected)
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(FastJSONRenderer().render(self.data), expected)
+
+    def test_fragments_are_spliced(self):
+        expected = JSONRenderer().render({"cached": self.data, "fresh": [1]})
+        payload = {"cached": encode_fragment(self.data), "fresh": [1]}
+        self.assertEqual(FastJSONRenderer().render(payload), expected)
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(FastJSONRenderer().render(payload), expected)
+
+    def test_parser(self):
+        self.assertEqual(FastJSONParser().parse(io.BytesIO('{"name": "Déjà"}'.encode())), {"name": "Déjà"})
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"name": '))
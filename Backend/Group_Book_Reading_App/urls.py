@@ -1,6 +1,11 @@
+from django.conf import settings
 from django.urls import path
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from .views import AdminView, MemberView, RegisterView, UserInfoView, get_book, get_books, get_group, get_groups, create_or_join_group, get_groups_by_book, get_member_groups, mark_chapter_as_read, view_progress, group_chapters, get_user_id, fetch_discussions_by_chapter, add_discussion_by_chapter, get_chapter_details, create_book, update_book, delete_book, create_group, update_group, delete_group, fetch_users, view_chapter, create_chapter, update_chapter, delete_chapter, get_books_admin, get_groups_admin, chapter_deadline_notification
+from .views import AdminView, MemberView, RegisterView, UserInfoView, get_book, get_books, get_group, get_groups, home_summary, group_dashboard, create_or_join_group, get_groups_by_book, get_member_groups, mark_chapter_as_read, bulk_mark_chapters_as_read, view_progress, view_progress_summary, group_chapters, get_user_id, fetch_discussions_by_chapter, fetch_discussion_feed, add_discussion_by_chapter, discussion_stream, get_chapter_details, create_book, update_book, delete_book, create_group, update_group, bulk_update_group_members, delete_group, fetch_users, view_chapter, create_chapter, update_chapter, delete_chapter, get_books_admin, get_groups_admin, chapter_deadline_notification, search, request_metrics, export_dataset, job_status, create_stream_token
+
+# Under the ASGI profile the read-heavy member endpoints are served by their async versions
+if settings.SERVER_PROFILE == 'asgi':
+    from .async_views import get_books, get_group, group_chapters, fetch_discussions_by_chapter, view_progress  # noqa: F811
  
 urlpatterns = [
     path('api/register/', RegisterView.as_view(), name='register'),
@@ -13,32 +18,48 @@ urlpatterns = [
     path('api/books/<int:book_id>/', get_book, name='get_book'),
     path('api/groups/', get_groups, name='get_groups'),
     path('api/groups/<int:group_id>/', get_group, name='get_group'),
+    path('api/groups/<int:group_id>/dashboard/', group_dashboard, name='group_dashboard'),
+    path('api/home/', home_summary, name='home_summary'),
     path('api/books/<int:book_id>/groups/', create_or_join_group, name='create_or_join_group'),
     path('api/group-by-book/', get_groups_by_book, name='get_groups_by_book'),
     path('api/member/groups/', get_member_groups, name="get_member_groups"),
     path('api/groups/<int:group_id>/chapter/<int:chapter_id>/', mark_chapter_as_read, name='mark_chapter_as_read'),
+    path('api/chapters/read-marks/bulk/', bulk_mark_chapters_as_read, name='bulk_mark_chapters_as_read'),
     path('api/progress/', view_progress, name='view_progress'),
+    path('api/progress/summary/', view_progress_summary, name='view_progress_summary'),
     path('api/groups/<int:group_id>/chapters/', group_chapters, name='group-chapters'),
     path('api/user-id/', get_user_id, name='get_user_id'),
     path('api/groups/<int:group_id>/discussions_by_chapter/', fetch_discussions_by_chapter, name='fetch_discussions_by_chapter'),
+    path('api/groups/<int:group_id>/discussions_by_chapter/feed/', fetch_discussion_feed, name='fetch_discussion_feed'),
     path('api/groups/<int:group_id>/discussions_by_chapter/post/', add_discussion_by_chapter, name='add_discussion_by_chapter'),
     path('api/groupchapter/<int:group_id>/chapter/<int:chapter_id>/', get_chapter_details, name='get_chapter_details'),
+    path('api/search/', search, name='search'),
     path('api/chapter-deadline-notifications/', chapter_deadline_notification, name='chapter_deadline_notifications'),
     #book CRUD
-    path('api/books-admin/', get_books_admin, name='get_books'),
+    path('api/books-admin/', get_books_admin, name='get_books_admin'),
     path('api/books/create/', create_book, name='create_book'),
     path('api/books/<int:book_id>/update/', update_book, name='update_book'),
     path('api/books/<int:book_id>/delete/', delete_book, name='delete_book'),
     #group CRUD
-    path('api/groups-admin/', get_groups_admin, name='get_groups'),
+    path('api/groups-admin/', get_groups_admin, name='get_groups_admin'),
     path('api/groups/create/', create_group, name='create_group'),
     path('api/groups/<int:group_id>/update/', update_group, name='update_group'),
+    path('api/groups/<int:group_id>/members/bulk/', bulk_update_group_members, name='bulk_update_group_members'),
     path('api/groups/<int:group_id>/delete/', delete_group, name='delete_group'),
     path('api/users/', fetch_users, name='fetch-users'),
+    path('api/metrics/', request_metrics, name='request_metrics'),
+    path('api/exports/<str:dataset>/', export_dataset, name='export_dataset'),
+    path('api/jobs/<int:job_id>/', job_status, name='job_status'),
     #chapter CRUD
     path('api/chapter/create/', create_chapter, name='create_chapter'),
     path('api/chapter/', view_chapter, name='view_all_chapters'),  # For retrieving all chapters
     path('api/chapter/<int:chapter_id>/update/', update_chapter, name='update_chapter'),
     path('api/chapter/<int:chapter_id>/delete/', delete_chapter, name='delete_chapter'),
 ]
- 
\ No newline at end of file
+ 
+# Discussion streams hold their connection open, so they are only routed where an idle stream holds no worker
+if settings.SERVER_PROFILE == 'asgi':
+    urlpatterns += [
+        path('api/groups/<int:group_id>/discussions_by_chapter/stream/token/', create_stream_token, name='create_stream_token'),
+        path('api/groups/<int:group_id>/discussions_by_chapter/stream/', discussion_stream, name='discussion_stream'),
+    ]
@@ -2,15 +2,33 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from .permissions import IsAdmin, IsMember
-from .models import CustomUser, Book, Group, Chapter, Discussion
+from .models import CustomUser, Book, Group, Chapter, Discussion, ChapterProgress, Job
 from rest_framework.generics import CreateAPIView
-from .serializers import RegisterSerializer, BookSerializer, GroupSerializer, ChapterSerializer, DiscussionSerializer, CustomUserSerializer
+from .serializers import RegisterSerializer, BookSerializer, GroupSerializer, ChapterSerializer, DiscussionSerializer, CustomUserSerializer, JobSerializer
+from .progress import build_progress
+from .discussions import DiscussionTree, InvalidCursor, discussion_feed, parse_last_fetched_at, FEED_PAGE_SIZE
+from .push import publish_discussion, stream_token, authenticate_stream_request, discussion_event_stream, STREAM_TOKEN_SECONDS
+from .notifications import user_notifications, sync_chapter_notification
+from .bulk_operations import resolve_usernames, add_member, member_changes, apply_member_changes, bulk_update_members, bulk_mark_chapters, MAX_BULK_ITEMS, MEMBER_ACTIONS
+from .catalog_cache import catalog_cache, invalidate_catalog
+from .pagination import list_response
+from .search import search_terms, search_books, search_discussions, SEARCH_PAGE_SIZE, SEARCH_MAX_PAGE_SIZE
+from .read_counters import refresh_chapter_counters, toggle_read_mark, progress_summary
+from .profiling import get_registry, prometheus_text
+from .membership import is_member, ais_member
+from .dashboards import home_summary_data, group_dashboard_data
+from .exports import export_stream, aexport_stream, DATASETS, OUTPUTS
+from .idempotency import idempotent
+from .jobs import enqueue, run_now, job_queue_settings
 from rest_framework.decorators import api_view, permission_classes
+from django.conf import settings
 from rest_framework import permissions, status
 from django.db import transaction
-from datetime import datetime
-from django.utils.timezone import make_aware
-from datetime import datetime
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
 from django.utils import timezone
 
 # View to register a new user
@@ -40,6 +58,8 @@ class UserInfoView(APIView):
         user = request.user
         return Response({
             "role": user.role,  # Return the user's role
+            "id": user.id,
+            "username": user.username,
         })
 
 # API view to fetch the current authenticated user's ID
@@ -51,14 +71,15 @@ def get_user_id(request):
 # Fetch a list of all books (only accessible to members)
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated, IsMember])
+@catalog_cache('books')
 def get_books(request):
     books = Book.objects.all()
-    serializer = BookSerializer(books, many=True)
-    return Response(serializer.data)
+    return Response(list_response(request, books, BookSerializer))
 
 # Fetch details of a single book by ID (only accessible to members)
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated, IsMember])
+@catalog_cache('book')
 def get_book(request, book_id):
     try:
         book = Book.objects.get(id=book_id)
@@ -72,23 +93,38 @@ def get_book(request, book_id):
 @permission_classes([permissions.IsAuthenticated, IsMember])
 def get_groups(request):
     groups = Group.objects.all()
-    serializer = GroupSerializer(groups, many=True)
-    return Response(serializer.data)
+    return Response(list_response(request, groups, GroupSerializer))
 
 # Fetch details of a single group by ID (only accessible to members)
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated, IsMember])
 def get_group(request, group_id):
     try:
-        group = Group.objects.get(id=group_id)
+        group = GroupSerializer.optimize_queryset(Group.objects.all()).get(id=group_id)
         serializer = GroupSerializer(group)
         return Response(serializer.data)
     except Group.DoesNotExist:
         return Response({'error': 'Group not found'}, status=status.HTTP_404_NOT_FOUND)
 
+# Fetch everything the member home page shows: books, groups and the user's deadline notifications (only accessible to members)
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated, IsMember])
+def home_summary(request):
+    return Response(home_summary_data(request.user), status=status.HTTP_200_OK)
+
+# Fetch everything the group page shows: the group and, for its members, the group's reading progress (only accessible to members)
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated, IsMember])
+def group_dashboard(request, group_id):
+    try:
+        return Response(group_dashboard_data(request.user, group_id), status=status.HTTP_200_OK)
+    except Group.DoesNotExist:
+        return Response({'error': 'Group not found'}, status=status.HTTP_404_NOT_FOUND)
+
 # Allow users to create or join a group for a specific book (only accessible to members)
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated, IsMember])
+@idempotent
 def create_or_join_group(request, book_id):
     try:
         book = Book.objects.get(id=book_id)
@@ -101,29 +137,25 @@ def create_or_join_group(request, book_id):
     if not group_name:
         return Response({"error":"Group name is required."}, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        with transaction.atomic():  # Ensure atomicity when creating or joining the group
-            group, created = Group.objects.get_or_create(book=book, name=group_name, defaults={"reading_goals": reading_goals})
-            if request.user in group.members.all():
-                return Response({"error":"You are already part of the selected group."}, status=status.HTTP_400_BAD_REQUEST)
-            group.members.add(request.user)  # Add the user to the group
-            serializer = GroupSerializer(group)
-            return Response(
-                {
-                    "group": serializer.data,
-                    "created": created,  
-                },
-                status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
-            )
-    except Exception as e:
+    with transaction.atomic():  # Ensure atomicity when creating or joining the group
+        # The unique (book, name) constraint makes concurrent creates of the same group return the one row
+        group, created = Group.objects.get_or_create(book=book, name=group_name, defaults={"reading_goals": reading_goals})
+        if not created and is_member(request.user, group.id, fresh=True):
+            return Response({"error":"You are already part of the selected group."}, status=status.HTTP_400_BAD_REQUEST)
+        add_member(group, request.user.id)  # Add the user to the group
+        serializer = GroupSerializer(group)
         return Response(
-            {"error": f"An error occurred: {str(e)}"},
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            {
+                "group": serializer.data,
+                "created": created,  
+            },
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
         )
 
 # Fetch groups by book (only accessible to members)
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated, IsMember])
+@catalog_cache('groups_by_book')
 def get_groups_by_book(request):
     book_id = request.query_params.get('book')
     if not book_id:
@@ -163,7 +195,7 @@ def mark_chapter_as_read(request, group_id, chapter_id):
     except Group.DoesNotExist:
         return Response({"error": "Group with the provided ID does not exist."}, status=status.HTTP_404_NOT_FOUND)
 
-    if request.user not in group.members.all():
+    if not is_member(request.user, group.id):
         return Response({"error": "You are not a member of this group."}, status=status.HTTP_403_FORBIDDEN)
 
     try:
@@ -171,14 +203,11 @@ def mark_chapter_as_read(request, group_id, chapter_id):
     except Chapter.DoesNotExist:
         return Response({"error": "Chapter with the provided ID does not exist in this group."}, status=status.HTTP_404_NOT_FOUND)
 
-    if request.user in chapter.is_read.all():
-        chapter.is_read.remove(request.user)  # Mark as unread
-        action = "unread"
-    else:
-        chapter.is_read.add(request.user)  # Mark as read
-        action = "read"
-
-    chapter.save()
+    with transaction.atomic():  # Keep the read mark and the read counters in sync
+        is_read = toggle_read_mark(chapter, request.user)
+        sync_chapter_notification(request.user, chapter, is_read=is_read)
+        action = "read" if is_read else "unread"
+        chapter.save()
     serializer = ChapterSerializer(chapter)
     return Response(
         {
@@ -188,64 +217,54 @@ def mark_chapter_as_read(request, group_id, chapter_id):
         status=status.HTTP_200_OK
     )
 
+# Mark or unmark many chapters as read for the user in one request (only accessible to members)
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated, IsMember])
+def bulk_mark_chapters_as_read(request):
+    read_ids = request.data.get('read', [])
+    unread_ids = request.data.get('unread', [])
+    if not isinstance(read_ids, list) or not isinstance(unread_ids, list):
+        return Response({"error": "read and unread must be lists of chapter IDs."}, status=status.HTTP_400_BAD_REQUEST)
+    # bool is a subclass of int, but true/false are not chapter IDs
+    if not all(isinstance(chapter_id, int) and not isinstance(chapter_id, bool) for chapter_id in read_ids + unread_ids):
+        return Response({"error": "Chapter IDs must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+    if len(read_ids) + len(unread_ids) > MAX_BULK_ITEMS:
+        return Response({"error": f"At most {MAX_BULK_ITEMS} chapters can be updated at once."}, status=status.HTTP_400_BAD_REQUEST)
+    if set(read_ids) & set(unread_ids):
+        return Response({"error": "A chapter cannot be marked as both read and unread."}, status=status.HTTP_400_BAD_REQUEST)
+    results = bulk_mark_chapters(request.user, read_ids, unread_ids)
+    return Response({"results": results}, status=status.HTTP_200_OK)
+
 # Fetch the user's reading progress across all groups they belong to (only accessible to members)
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated, IsMember])
 def view_progress(request):
-    if request.user:
-        groups = Group.objects.filter(members=request.user)  # Get groups the user is part of
-    # else:
-    #     groups = request.user.groups.all()
-    if not groups.exists():
+    groups = list(Group.objects.filter(members=request.user))  # Get groups the user is part of
+    if not groups:
         return Response({"error": "User is not a member of any group."}, status=status.HTTP_400_BAD_REQUEST)
-    progress_data = []
-    for group in groups:
-        chapters = group.chapters.all()
-        if not chapters.exists():
-            continue
-        total_members = group.members.count()
-        group_data = {
-            "group_id": group.id,
-            "group_name": group.name,
-            "total_members": total_members,
-            "chapters": []
-        }
-        for chapter in chapters:
-            read_users = chapter.is_read.all()
-            read_count = read_users.count()
-            read_percentage = (read_count / total_members) * 100 if total_members > 0 else 0
-            read_percentage = min(read_percentage, 100.0)
-            read_user_data = [{"id": user.id, "username": user.username} for user in read_users]
-            not_read_users = group.members.exclude(id__in=[user.id for user in read_users])
-            not_read_user_data = [{"id": user.id, "username": user.username} for user in not_read_users]
-            chapter_data = {
-                "chapter_id": chapter.id,
-                "title": chapter.title,
-                "deadline": chapter.deadline,
-                "read_percentage": read_percentage,
-                "read_users": read_user_data,
-                "not_read_users": not_read_user_data
-            }
-            group_data["chapters"].append(chapter_data)
-        progress_data.append(group_data)
-    if not progress_data:
-        return Response([], status=status.HTTP_200_OK)
+    # Members, chapters and read marks for all groups are loaded in bulk by the progress engine
+    progress_data = build_progress(groups)
     return Response(progress_data, status=status.HTTP_200_OK)
 
+# Fetch read percentages for the user's groups from the materialized read counters (only accessible to members)
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated, IsMember])
+def view_progress_summary(request):
+    return Response(progress_summary(request.user), status=status.HTTP_200_OK)
+
 # Fetch chapters for a group (only accessible to members)
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated, IsMember])
 def group_chapters(request, group_id):
     try:
         group = Group.objects.get(id=group_id)
-        if request.user not in group.members.all():
+        if not is_member(request.user, group.id):
             return Response(
                 {"detail":"You are not a member of this group."},
                 status=status.HTTP_403_FORBIDDEN,
             )
         chapters = Chapter.objects.filter(group=group)
-        serializer = ChapterSerializer(chapters, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(list_response(request, chapters, ChapterSerializer), status=status.HTTP_200_OK)
     except Group.DoesNotExist:
         return Response(
             {"detail":"Group not found"},
@@ -268,36 +287,41 @@ def fetch_discussions_by_chapter(request, group_id):
         chapter = group.chapters.get(id=chapter_id)
     except Chapter.DoesNotExist:
         return Response({"error": "Chapter with the provided ID does not exist."}, status=status.HTTP_404_NOT_FOUND) 
-    # Fetch discussions
-    discussions = chapter.discussions.filter(parent=None).order_by('created_at')
+    last_fetched_time = None
     if last_fetched_at:
         try:
-            # Parse the timestamp and make it timezone-aware
-            last_fetched_time = datetime.fromisoformat(last_fetched_at)
-            if not last_fetched_time.tzinfo:  # If the datetime is naive, make it UTC-aware
-                last_fetched_time = make_aware(last_fetched_time, timezone=pytz.UTC)
-            # Filter discussions created after the provided timestamp
-            discussions = discussions.filter(created_at__gt=last_fetched_time)
+            last_fetched_time = parse_last_fetched_at(last_fetched_at)
         except (ValueError, TypeError):
             return Response({"error": "Invalid timestamp format for last_fetched_at. Use ISO 8601 format like '2025-01-27T05:37:00Z'."}, status=status.HTTP_400_BAD_REQUEST)
- 
-    def serialize_discussion(discussion):
-        """Recursive function to serialize a discussion and its replies."""
-        return {
-            "id": discussion.id,
-            "chapter": discussion.chapter.id,
-            "user": {
-                "id": discussion.user.id,
-                "username": discussion.user.username,
-            },
-            "content": discussion.content,
-            "parent": discussion.parent.id if discussion.parent else None,
-            "created_at": discussion.created_at,
-            "replies": [serialize_discussion(reply) for reply in discussion.replies.order_by('created_at')],
-        } 
-    # Serialize all top-level discussions with their replies
-    serialized_data = [serialize_discussion(discussion) for discussion in discussions]
-    return Response(serialized_data, status=status.HTTP_200_OK)
+    # Fetch the chapter's discussions (only those created after the provided timestamp when polling) in one
+    # query and assemble the threads in memory; replies to older threads are left out with their roots
+    threads = DiscussionTree.for_chapter(chapter.id, after=last_fetched_time).threads()
+    return Response(threads, status=status.HTTP_200_OK)
+
+# Fetch a flat, cursor-paginated delta of every discussion created in a chapter after the given cursor (only accessible to members)
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated, IsMember])
+def fetch_discussion_feed(request, group_id):
+    try:
+        group = Group.objects.get(id=group_id)
+    except Group.DoesNotExist:
+        return Response({"error": "Group with the provided ID does not exist."}, status=status.HTTP_404_NOT_FOUND)
+    chapter_id = request.query_params.get('chapter_id')
+    if not chapter_id:
+        return Response({"error": "Chapter ID is required."}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = int(request.query_params.get('limit', FEED_PAGE_SIZE))
+    except ValueError:
+        return Response({"error": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        chapter = group.chapters.get(id=chapter_id)
+    except Chapter.DoesNotExist:
+        return Response({"error": "Chapter with the provided ID does not exist."}, status=status.HTTP_404_NOT_FOUND)
+    try:
+        feed = discussion_feed(chapter.id, cursor=request.query_params.get('cursor'), limit=limit)
+    except InvalidCursor:
+        return Response({"error": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(feed, status=status.HTTP_200_OK)
 
 # Add a new discussion post in a thread for a chapter. (only accessible to members) 
 @api_view(['POST'])
@@ -330,9 +354,51 @@ def add_discussion_by_chapter(request, group_id):
         content=content,
         parent=parent_discussion
     )
-    serializer = DiscussionSerializer(discussion)
+    # A new discussion has no replies yet, so its tree is the discussion alone
+    serializer = DiscussionSerializer(discussion, context={'discussion_tree': DiscussionTree([discussion])})
+    publish_discussion(group.id, discussion, serializer.data)  # Push the new post to open discussion streams
     return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+# Issue a short-lived token that opens the discussion stream of a group (only accessible to members, served over ASGI)
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated, IsMember])
+def create_stream_token(request, group_id):
+    if not is_member(request.user, group_id):
+        return Response({"error": "You are not a member of this group."}, status=status.HTTP_403_FORBIDDEN)
+    return Response(
+        {"stream_token": str(stream_token(request, group_id)), "expires_in": STREAM_TOKEN_SECONDS},
+        status=status.HTTP_201_CREATED,
+    )
+
+# Stream new discussion posts of a chapter as Server-Sent Events (only accessible to members, served over ASGI)
+async def discussion_stream(request, group_id):
+    if request.method != 'GET':
+        return JsonResponse({"error": "Method not allowed."}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    try:
+        user = await sync_to_async(authenticate_stream_request)(request, group_id)
+    except (InvalidToken, AuthenticationFailed):
+        user = None
+    if user is None:
+        return JsonResponse({"error": "Authentication credentials were not provided or are invalid."}, status=status.HTTP_401_UNAUTHORIZED)
+    if user.role != 'member':
+        return JsonResponse({"error": "You do not have permission to perform this action."}, status=status.HTTP_403_FORBIDDEN)
+    if not await ais_member(user, group_id):
+        return JsonResponse({"error": "You are not a member of this group."}, status=status.HTTP_403_FORBIDDEN)
+    chapter_id = request.GET.get('chapter_id')
+    if not chapter_id or not chapter_id.isdigit():
+        return JsonResponse({"error": "Chapter ID is required."}, status=status.HTTP_400_BAD_REQUEST)
+    if not await Chapter.objects.filter(id=chapter_id, group_id=group_id).aexists():
+        return JsonResponse({"error": "Chapter with the provided ID does not exist."}, status=status.HTTP_404_NOT_FOUND)
+    # Reconnecting EventSource clients send the last event id, which is a feed cursor
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('cursor')
+    response = StreamingHttpResponse(
+        discussion_event_stream(group_id, int(chapter_id), last_event_id),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Disable proxy buffering so events are flushed immediately
+    return response
+
 # Fetch chapter details for a group (only accessible to members) 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated, IsMember])
@@ -345,40 +411,40 @@ def get_chapter_details(request, group_id, chapter_id):
     serializer = ChapterSerializer(chapter)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
+# Full-text search over books and the discussions of the user's groups (only accessible to members)
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated, IsMember])
+def search(request):
+    terms = search_terms(request.query_params.get('q'))
+    if not terms:
+        return Response({"error": "A search query (q) is required."}, status=status.HTTP_400_BAD_REQUEST)
+    search_type = request.query_params.get('type', 'all')
+    if search_type not in ('all', 'books', 'discussions'):
+        return Response({"error": "type must be one of: all, books, discussions."}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        page = max(int(request.query_params.get('page', 1)), 1)
+        limit = min(max(int(request.query_params.get('limit', SEARCH_PAGE_SIZE)), 1), SEARCH_MAX_PAGE_SIZE)
+    except ValueError:
+        return Response({"error": "page and limit must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+    offset = (page - 1) * limit
+    results = {"query": " ".join(terms), "page": page}
+    if search_type in ('all', 'books'):
+        results["books"] = search_books(terms, limit, offset)
+    if search_type in ('all', 'discussions'):
+        results["discussions"] = search_discussions(request.user, terms, limit, offset)
+    return Response(results, status=status.HTTP_200_OK)
+
 # Getting Chapter Deadline Notification view that a member part of
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated, IsMember])
 def chapter_deadline_notification(request):
-    user = request.user    
-    # Get all the groups the user is a member of
-    groups = Group.objects.filter(members=user)    
+    user = request.user
     # Check if user is part of any group
-    if not groups.exists():
-        return Response({"error": "User is not a member of any group."}, status=status.HTTP_400_BAD_REQUEST)    
-    notifications = []    
-    for group in groups:
-        chapters = group.chapters.all()
-        # Check if there are chapters in the group
-        if not chapters.exists():
-            continue
-        for chapter in chapters:
-            # Calculate the difference in days between the deadline and today
-            today = timezone.now().date()
-            days_left = (chapter.deadline - today).days            
-            # If the deadline has passed and the chapter is not read, create a notification
-            if days_left < 0 and user not in chapter.is_read.all():
-                notification_message = f"The deadline for chapter '{chapter.title}' has passed {abs(days_left)} days ago!"                
-                # Add the notification message to the notifications list
-                notifications.append({
-                    "group_name": group.name,
-                    "chapter_id": chapter.id,
-                    "chapter_title": chapter.title,
-                    "notification": notification_message
-                })   
-    # If no notifications, return an empty response
-    if not notifications:
-        return Response([], status=status.HTTP_200_OK)    
-    return Response(notifications, status=status.HTTP_200_OK)  
+    if not Group.members.through.objects.filter(customuser=user).exists():
+        return Response({"error": "User is not a member of any group."}, status=status.HTTP_400_BAD_REQUEST)
+    # Overdue, unread chapters are precomputed by the generate_deadline_notifications command
+    notifications = user_notifications(user)
+    return Response(notifications, status=status.HTTP_200_OK)
  
   
 """ 
@@ -394,10 +460,10 @@ def chapter_deadline_notification(request):
 # Fetch all books (Admin only)
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated, IsAdmin])
+@catalog_cache('books_admin')
 def get_books_admin(request):
     books = Book.objects.all()
-    serializer = BookSerializer(books, many=True)
-    return Response(serializer.data)
+    return Response(list_response(request, books, BookSerializer))
 
 # Create a new book (Admin only)
 @api_view(['POST'])
@@ -406,6 +472,7 @@ def create_book(request):
     serializer = BookSerializer(data=request.data)
     if serializer.is_valid():
         serializer.save()
+        invalidate_catalog()
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -419,6 +486,7 @@ def update_book(request, book_id):
         serializer = BookSerializer(book, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
+            invalidate_catalog()
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     except Book.DoesNotExist:
@@ -429,12 +497,18 @@ def update_book(request, book_id):
 @permission_classes([permissions.IsAuthenticated, IsAdmin])
 def delete_book(request, book_id):
     try:
-        # Try to fetch the book by ID and delete it
         book = Book.objects.get(id=book_id)
-        book.delete()
-        return Response({'message': 'Book deleted successfully'}, status=status.HTTP_204_NO_CONTENT)
     except Book.DoesNotExist:
         return Response({'error': 'Book not found'}, status=status.HTTP_404_NOT_FOUND)
+    # The cascade through the book's groups, chapters and discussions runs in chunks, on the job queue when it
+    # is enabled and otherwise in this request
+    if job_queue_settings()['ENABLED']:
+        job = enqueue('delete_book', {'book_id': book.id}, user=request.user)
+        return job_accepted(job, {'message': 'Book deletion queued'})
+    job = run_now('delete_book', {'book_id': book.id}, user=request.user)
+    if job.status != 'succeeded':
+        return Response({'error': 'Book deletion failed', 'job': JobSerializer(job).data}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return Response({'message': 'Book deleted successfully'}, status=status.HTTP_204_NO_CONTENT)
 
 
 # Groups CRUD operations
@@ -444,8 +518,7 @@ def delete_book(request, book_id):
 @permission_classes([permissions.IsAuthenticated, IsAdmin])
 def get_groups_admin(request):
     groups = Group.objects.all()
-    serializer = GroupSerializer(groups, many=True)
-    return Response(serializer.data)
+    return Response(list_response(request, groups, GroupSerializer))
 
 # Create a new group (Admin only)
 @api_view(['POST'])
@@ -467,23 +540,20 @@ def create_group(request):
             return Response({"detail": "Book not found."}, status=status.HTTP_404_NOT_FOUND)
     else:
         return Response({"detail": "Book ID is required."}, status=status.HTTP_400_BAD_REQUEST)
-    # Validate and create users (members)
-    members = []
-    for member in member_data:
-        username = member.get('username')
-        if not username:
-            return Response({"detail": "Username is required for members."}, status=status.HTTP_400_BAD_REQUEST)
-        try:
-            user = CustomUser.objects.get(username=username)
-        except CustomUser.DoesNotExist:
-            # Create a new user if they don't exist
-            # user = CustomUser.objects.create(username=username)
-            return Respnse({"detail": "User with given userid does not exists."},status=status.HTTP_404_NOT_FOUND)
-        members.append(user)
+    # Validate the members and resolve all usernames with a single query
+    usernames = [member.get('username') for member in member_data]
+    if not all(usernames):
+        return Response({"detail": "Username is required for members."}, status=status.HTTP_400_BAD_REQUEST)
+    user_ids = resolve_usernames(usernames)
+    if len(user_ids) != len(set(usernames)):
+        return Response({"detail": "User with given userid does not exists."}, status=status.HTTP_404_NOT_FOUND)
+    members = list(user_ids.values())
     # Create the new group and associate it with the book and members
-    group = Group.objects.create(name=group_name, book=book, reading_goals=reading_goals)
-    group.members.set(members)
-    group.save()
+    with transaction.atomic():
+        group = Group.objects.create(name=group_name, book=book, reading_goals=reading_goals)
+        group.members.set(members)
+        group.save()
+        invalidate_catalog()
     serializer = GroupSerializer(group)
     return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -494,8 +564,57 @@ def fetch_users(request):
     # Fetch users with the 'member' role
     members = CustomUser.objects.filter(role='member')
     # Serialize and return the member data
-    serializer = CustomUserSerializer(members, many=True)
-    return Response(serializer.data)
+    return Response(list_response(request, members, CustomUserSerializer))
+
+# Request metrics per URL name: query count, SQL, serializer and total time percentiles (Admin only)
+# ?output=prometheus returns the Prometheus text format instead of JSON
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated, IsAdmin])
+def request_metrics(request):
+    snapshot = get_registry().snapshot()
+    if request.query_params.get('output') == 'prometheus':
+        return HttpResponse(prometheus_text(snapshot), content_type='text/plain; version=0.0.4')
+    return Response(snapshot)
+
+# Stream a whole dataset as NDJSON (default) or CSV with ?output=csv; ?after_id=<id> only exports later rows (Admin only)
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated, IsAdmin])
+def export_dataset(request, dataset):
+    if dataset not in DATASETS:
+        return Response({"error": f"Unknown dataset. Choose one of: {', '.join(DATASETS)}."}, status=status.HTTP_404_NOT_FOUND)
+    output = request.query_params.get('output', 'ndjson')
+    if output not in OUTPUTS:
+        return Response({"error": f"Unknown output. Choose one of: {', '.join(OUTPUTS)}."}, status=status.HTTP_400_BAD_REQUEST)
+    after_id = request.query_params.get('after_id')
+    if after_id is not None:
+        try:
+            after_id = int(after_id)
+        except ValueError:
+            return Response({"error": "after_id must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+    stream = aexport_stream if settings.SERVER_PROFILE == 'asgi' else export_stream
+    response = StreamingHttpResponse(stream(dataset, output, after_id), content_type=OUTPUTS[output])
+    response['Content-Disposition'] = f'attachment; filename="{dataset}.{output}"'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+# 202 Accepted for work queued as a background job, pointing to the job's status
+def job_accepted(job, data):
+    return Response(
+        {**data, 'job': JobSerializer(job).data},
+        status=status.HTTP_202_ACCEPTED,
+        headers={'Location': reverse('job_status', args=[job.id])},
+    )
+
+# Status of a background job (the user who queued it, or an admin)
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def job_status(request, job_id):
+    jobs = Job.objects.all() if request.user.role == 'admin' else Job.objects.filter(created_by=request.user)
+    try:
+        job = jobs.get(id=job_id)
+    except Job.DoesNotExist:
+        return Response({"detail": "Job not found."}, status=status.HTTP_404_NOT_FOUND)
+    return Response(JobSerializer(job).data)
 
 # Update an existing group (Admin only)
 @api_view(['PATCH'])
@@ -519,26 +638,55 @@ def update_group(request, group_id):
             return Response({"detail": "Book not found."}, status=status.HTTP_404_NOT_FOUND)
     # Validate and update group members
     if member_data is not None:
-        members = []
-        for member in member_data:
-            username = member.get('username')
-            if not username:
-                return Response({"detail": "Username is required for members."}, status=status.HTTP_400_BAD_REQUEST)
-            try:
-                user = CustomUser.objects.get(username=username)
-            except CustomUser.DoesNotExist:
-                #user = CustomUser.objects.create(username=username)
-                return Respnse({"detail": "User with given userid does not exists."},status = status.HTTP_404_NOT_FOUND)
-            members.append(user)
-        group.members.set(members)
-    # Save the updated group
-    group.name = group_name
-    group.reading_goals = reading_goals
-    group.save()
+        # Resolve all usernames with a single query
+        usernames = [member.get('username') for member in member_data]
+        if not all(usernames):
+            return Response({"detail": "Username is required for members."}, status=status.HTTP_400_BAD_REQUEST)
+        user_ids = resolve_usernames(usernames)
+        if len(user_ids) != len(set(usernames)):
+            return Response({"detail": "User with given userid does not exists."}, status=status.HTTP_404_NOT_FOUND)
+        members = list(user_ids.values())
+    job = None
+    with transaction.atomic():
+        if member_data is not None:
+            to_remove, to_add = member_changes(group, members)
+            config = job_queue_settings()
+            chunk_size = config['CHUNK_SIZE']
+            if config['ENABLED'] and len(to_remove) + len(to_add) > chunk_size:
+                # Large member resets run in chunks on the job queue
+                job = enqueue('replace_group_members', {'group_id': group.id, 'member_ids': members}, user=request.user)
+            else:
+                apply_member_changes(group, to_remove, to_add, chunk_size)
+        # Save the updated group
+        group.name = group_name
+        group.reading_goals = reading_goals
+        group.save()
+        invalidate_catalog()
     # Serialize and return the updated group
     serializer = GroupSerializer(group)
+    if job is not None:
+        return job_accepted(job, {'group': serializer.data})
     return Response(serializer.data, status=status.HTTP_200_OK)
 
+# Add or remove many members of a group by username in one request (Admin only)
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated, IsAdmin])
+def bulk_update_group_members(request, group_id):
+    try:
+        group = Group.objects.get(id=group_id)
+    except Group.DoesNotExist:
+        return Response({"detail": "Group not found."}, status=status.HTTP_404_NOT_FOUND)
+    action = request.data.get('action', 'add')
+    usernames = request.data.get('usernames')
+    if action not in MEMBER_ACTIONS:
+        return Response({"detail": f"action must be one of: {', '.join(MEMBER_ACTIONS)}."}, status=status.HTTP_400_BAD_REQUEST)
+    if not isinstance(usernames, list) or not all(isinstance(username, str) and username for username in usernames):
+        return Response({"detail": "usernames must be a list of usernames."}, status=status.HTTP_400_BAD_REQUEST)
+    if len(usernames) > MAX_BULK_ITEMS:
+        return Response({"detail": f"At most {MAX_BULK_ITEMS} usernames can be processed at once."}, status=status.HTTP_400_BAD_REQUEST)
+    results = bulk_update_members(group, usernames, action)
+    return Response({"group_id": group.id, "results": results}, status=status.HTTP_200_OK)
+
 # Delete a group (Admin only)
 @api_view(['DELETE'])
 @permission_classes([permissions.IsAuthenticated, IsAdmin])
@@ -546,6 +694,7 @@ def delete_group(request, group_id):
     try:
         group = Group.objects.get(id=group_id)
         group.delete()
+        invalidate_catalog()
         return Response({'message': 'Group deleted successfully'}, status=status.HTTP_204_NO_CONTENT)
     except Group.DoesNotExist:
         return Response({'error': 'Group not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -566,8 +715,7 @@ def view_chapter(request, chapter_id=None):
             return Response({"detail": "Chapter not found"}, status=status.HTTP_404_NOT_FOUND)
     else:
         chapters = Chapter.objects.all()
-        serializer = ChapterSerializer(chapters, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(list_response(request, chapters, ChapterSerializer), status=status.HTTP_200_OK)
 
 # Create a new chapter (Admin only) 
 @api_view(['POST'])
@@ -575,12 +723,14 @@ def view_chapter(request, chapter_id=None):
 def create_chapter(request):
     serializer = ChapterSerializer(data=request.data)
     if serializer.is_valid():
-        chapter = serializer.save()  # Save the chapter first
-        # Now handle the `is_read` field, which is a ManyToMany relationship
-        if 'is_read' in request.data:
-            users = CustomUser.objects.filter(id__in=request.data['is_read'])
-            chapter.is_read.set(users)  # Set the ManyToMany relation
-            chapter.save()  # Save the chapter with the updated `is_read`
+        with transaction.atomic():
+            chapter = serializer.save()  # Save the chapter first
+            # Now handle the `is_read` field, which is a ManyToMany relationship
+            if 'is_read' in request.data:
+                users = CustomUser.objects.filter(id__in=request.data['is_read'])
+                chapter.is_read.set(users)  # Set the ManyToMany relation
+                chapter.save()  # Save the chapter with the updated `is_read`
+            refresh_chapter_counters([chapter.id])  # Create the chapter's read counters
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -594,13 +744,15 @@ def update_chapter(request, chapter_id):
         # Update fields other than `is_read`
         serializer = ChapterSerializer(chapter, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save() 
-            # Handle the `is_read` field specifically
-            if 'is_read' in request.data:
-                # Filter the provided user IDs to only include those in the group
-                valid_users = group_members.filter(id__in=request.data['is_read'])
-                chapter.is_read.set(valid_users)  # Set or update the ManyToMany relation
-                chapter.save()  
+            with transaction.atomic():
+                serializer.save() 
+                # Handle the `is_read` field specifically
+                if 'is_read' in request.data:
+                    # Filter the provided user IDs to only include those in the group
+                    valid_users = group_members.filter(id__in=request.data['is_read'])
+                    chapter.is_read.set(valid_users)  # Set or update the ManyToMany relation
+                    chapter.save()  
+                refresh_chapter_counters([chapter.id])  # The read marks or the chapter's group may have changed
             # Return the updated chapter data
             return Response(ChapterSerializer(chapter).data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST) 
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
+from django.core.exceptions import ImproperlyConfigured
+from corsheaders.defaults import default_headers
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -44,6 +47,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'Group_Book_Reading_App.profiling.RequestProfilingMiddleware',  # First, so it times the whole request
+    'Group_Book_Reading_App.routers.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -75,14 +80,92 @@ TEMPLATES = [
 WSGI_APPLICATION = 'Group_Book_Reading_Platform.wsgi.application'
 
 
+# Server profile: 'wsgi' (default) or 'asgi'. The ASGI profile (e.g. `uvicorn Group_Book_Reading_Platform.asgi:application`)
+# serves the read-heavy member endpoints with async views, see Group_Book_Reading_App/async_views.py.
+SERVER_PROFILE = os.environ.get('SERVER_PROFILE', 'wsgi')
+if SERVER_PROFILE not in ('wsgi', 'asgi'):
+    raise ImproperlyConfigured(f"Unknown SERVER_PROFILE {SERVER_PROFILE!r}; use 'wsgi' or 'asgi'.")
+
+# Number of server processes sharing this configuration (the variable gunicorn and uvicorn read for their
+# worker count). With more than one, the caches that hold cross-request state must be shared, see CACHES.
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', 1))
+
+
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
-
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Selected with the DB_PROFILE environment variable: 'sqlite' (default) or 'postgres'.
+
+DB_PROFILE = os.environ.get('DB_PROFILE', 'sqlite')
+
+if DB_PROFILE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # Take the write lock when a transaction starts, so concurrent writers wait for
+                # busy_timeout instead of failing with "database is locked" on lock upgrade
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
     }
+elif DB_PROFILE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',  # Requires psycopg (requirements-optional.txt)
+            'NAME': os.environ.get('DB_NAME', 'group_book_reading'),
+            'USER': os.environ.get('DB_USER', 'postgres'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),  # Persistent connections, in seconds
+            'CONN_HEALTH_CHECKS': True,  # Re-check persistent connections before reusing them
+            'OPTIONS': {},
+        }
+    }
+    DB_POOLER = os.environ.get('DB_POOLER', '')
+    if DB_POOLER == 'psycopg':
+        # In-process psycopg 3 pool; replaces persistent connections
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+        }
+    elif DB_POOLER == 'pgbouncer':
+        # External pooler in transaction mode: server-side cursors do not survive across transactions
+        DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+    elif DB_POOLER:
+        raise ImproperlyConfigured(f"Unknown DB_POOLER {DB_POOLER!r}; use 'psycopg' or 'pgbouncer'.")
+    if SERVER_PROFILE == 'asgi' and DB_POOLER != 'psycopg':
+        # Async requests do not reuse persistent connections; use a pooler instead
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+else:
+    raise ImproperlyConfigured(f"Unknown DB_PROFILE {DB_PROFILE!r}; use 'sqlite' or 'postgres'.")
+
+# Read replicas (see Group_Book_Reading_App/routers.py): comma-separated database files (sqlite) or hosts
+# (postgres) in DB_REPLICAS, added as the aliases replica_1, replica_2, ... with the primary's other settings.
+# Tests read the replicas through the primary's test database.
+DB_REPLICAS = [replica.strip() for replica in os.environ.get('DB_REPLICAS', '').split(',') if replica.strip()]
+for index, replica in enumerate(DB_REPLICAS, start=1):
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'NAME' if DB_PROFILE == 'sqlite' else 'HOST': replica,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['Group_Book_Reading_App.routers.ReplicaRouter']
+REPLICA_ROUTING = {
+    'REPLICAS': [f'replica_{index}' for index in range(1, len(DB_REPLICAS) + 1)],
+    'PIN_SECONDS': int(os.environ.get('DB_REPLICA_PIN_SECONDS', 5)),  # Keep above the replication lag
+    'CACHE_ALIAS': 'default',  # Holds the pins; with DB_REPLICAS set it must be shared (set REDIS_URL)
+}
+
+# Applied to every new SQLite connection (see Group_Book_Reading_App/database.py)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',  # Readers no longer block the writer and vice versa
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),  # Milliseconds to wait for a lock
+    'synchronous': 'NORMAL',  # Safe with WAL; fsync at checkpoints instead of every commit
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
 }
 
 
@@ -128,14 +211,27 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 CORS_ORIGIN_ALLOW_ALL = True
 #CORS_ORIGIN_WHITELIST = ('http://localhost:7077', 'http://localhost:8089', 'http://localhost:9089')
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed']
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'Group_Book_Reading_App.authentication.ClaimsJWTAuthentication',  # Stateless: no user query per request
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # orjson-backed JSON (falls back to the standard library when orjson is not installed); the
+    # browsable API is only offered in DEBUG
+    'DEFAULT_RENDERER_CLASSES': [
+        'Group_Book_Reading_App.renderers.FastJSONRenderer',
+        *(['rest_framework.renderers.BrowsableAPIRenderer'] if DEBUG else []),
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'Group_Book_Reading_App.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=7),  # Increase access token lifetime
@@ -145,6 +241,93 @@ SIMPLE_JWT = {
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_OBTAIN_SERIALIZER': 'Group_Book_Reading_App.authentication.ClaimsTokenObtainPairSerializer',
+}
+
+# Revocation checks of the stateless JWT authentication: per-user auth state cached in each process
+JWT_REVOCATION_CACHE = {
+    'MAX_SIZE': 10000,
+    'TTL': 60,  # Seconds a role change, password change or deactivation can take to reach other processes
 }
 
 AUTH_USER_MODEL = 'Group_Book_Reading_App.CustomUser'
+
+# Fan-out broker for the discussion push stream. The in-memory broker only reaches subscribers of the
+# same process; point BACKEND at a BaseBroker subclass backed by a shared service for multi-worker deployments.
+DISCUSSION_BROKER = {
+    'BACKEND': 'Group_Book_Reading_App.broker.InMemoryBroker',
+    'OPTIONS': {
+        'max_queue_size': 100,  # Per-subscriber buffer; the oldest messages are dropped for slow consumers
+    },
+}
+
+# Caches. The catalog version (CATALOG_CACHE) and the membership ids (MEMBERSHIP_CACHE) are invalidated in
+# one process and read in all of them, so with several processes they need a shared backend: set REDIS_URL. Startup fails if a process-local cache
+# would hold them (see Group_Book_Reading_App/checks.py).
+REDIS_URL = os.environ.get('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'group-book-reading',
+        },
+    }
+
+CATALOG_CACHE = {
+    'ALIAS': 'default',
+    'TIMEOUT': 300,  # Seconds; writes invalidate entries immediately through the catalog version
+}
+
+# Per-user cache of group ids behind the membership checks (see Group_Book_Reading_App/membership.py)
+MEMBERSHIP_CACHE = {
+    'ALIAS': 'default',
+    'TIMEOUT': 300,  # Seconds; membership changes drop the affected users' entries on commit
+}
+
+# Stored responses of requests sent with an Idempotency-Key header (see Group_Book_Reading_App/idempotency.py)
+IDEMPOTENCY = {
+    'TTL': 24 * 60 * 60,  # Seconds; run purge_idempotency_records periodically to delete expired records
+}
+
+# Database-backed background job queue (see Group_Book_Reading_App/jobs.py), run with `python manage.py run_jobs`.
+# Workers invalidate cached state from their own process, so enabling the queue needs a shared cache (REDIS_URL);
+# while it is disabled, each job runs in the process that queued it.
+JOB_QUEUE = {
+    'ENABLED': os.environ.get('JOB_QUEUE_ENABLED', '') == '1',
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF_SECONDS': 10,  # First retry delay, doubled on every further attempt up to MAX_BACKOFF_SECONDS
+    'MAX_BACKOFF_SECONDS': 3600,
+    'LEASE_SECONDS': 300,  # Jobs whose worker stops sending heartbeats for this long are picked up again
+    'POLL_INTERVAL': 1.0,
+    'CHUNK_SIZE': 1000,  # Rows per transaction in chunked jobs; smaller member resets run inline
+}
+
+# Per-request profiling (see Group_Book_Reading_App/profiling.py). QUERY_BUDGETS caps the SQL queries of
+# a request per URL name; over-budget requests are logged, or fail with BUDGET_MODE = 'raise' (tests).
+PROFILING = {
+    'ENABLED': True,
+    'WINDOW_SIZE': 1000,  # Samples kept per URL name for the percentiles
+    'BUDGET_MODE': 'log',
+    'QUERY_BUDGETS': {
+        'get_books': 2,
+        'get_groups': 3,
+        'get_group': 3,
+        'group_dashboard': 6,
+        'home_summary': 5,
+        'group-chapters': 5,
+        'view_progress': 5,
+        'view_progress_summary': 2,
+        'fetch_discussions_by_chapter': 4,
+        'fetch_discussion_feed': 4,
+        'chapter_deadline_notifications': 3,
+        'search': 3,
+        'job_status': 2,
+    },
+}
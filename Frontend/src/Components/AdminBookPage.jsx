@@ -55,7 +55,7 @@ const AdminBookPage = () => {
         const fetchBooks = async () => {
             try {
                 const accessToken = localStorage.getItem("accessToken");
-                const response = await axios.get("http://localhost:8087/api/books-admin/", {
+                const response = await axios.get("http://localhost:8087/api/books-admin/?limit=all", {
                     headers: { Authorization: `Bearer ${accessToken}` },
                 });
                 setBooks(response.data);
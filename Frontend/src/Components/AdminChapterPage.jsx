@@ -60,7 +60,7 @@ const AdminChapterPage = () => {
     //fetch chapters from API
     const fetchChapters = async () => {
         try {
-            const response = await axios.get('http://localhost:8087/api/chapter/', { headers: { Authorization: `Bearer ${accessToken}` }, });
+            const response = await axios.get('http://localhost:8087/api/chapter/?limit=all', { headers: { Authorization: `Bearer ${accessToken}` }, });
             setChapters(response.data);
         } catch (error) {
             console.error("Error fetching chapters: ", error);
@@ -70,7 +70,7 @@ const AdminChapterPage = () => {
     //fetch groups from API
     const fetchGroups = async () => {
         try {
-            const response = await axios.get('http://localhost:8087/api/groups-admin/', { headers: { Authorization: `Bearer ${accessToken}` }, });
+            const response = await axios.get('http://localhost:8087/api/groups-admin/?limit=all', { headers: { Authorization: `Bearer ${accessToken}` }, });
             setGroups(response.data);
         } catch (error) {
             console.error("Error fetching groups: ", error);
@@ -56,7 +56,7 @@ const AdminGroupPage = () => {
     const fetchGroups = async () => {
         try {
             const accessToken = localStorage.getItem("accessToken");
-            const response = await axios.get("http://localhost:8087/api/groups-admin/", {headers: {Authorization: `Bearer ${accessToken}`}});
+            const response = await axios.get("http://localhost:8087/api/groups-admin/?limit=all", {headers: {Authorization: `Bearer ${accessToken}`}});
             setGroups(response.data);
         } catch (error) {
             console.error("Failed to fetch groups.");
@@ -67,7 +67,7 @@ const AdminGroupPage = () => {
     const fetchBooks = async () => {
         try {
             const accessToken = localStorage.getItem("accessToken");
-            const response = await axios.get("http://localhost:8087/api/books-admin/", {headers: {Authorization: `Bearer ${accessToken}`}});
+            const response = await axios.get("http://localhost:8087/api/books-admin/?limit=all", {headers: {Authorization: `Bearer ${accessToken}`}});
             setBooks(response.data);
         } catch (error) {
             console.error("Failed to fetch books");
@@ -78,7 +78,7 @@ const AdminGroupPage = () => {
     const fetchMembers = async () => {
         try {
             const accessToken = localStorage.getItem("accessToken");
-            const response = await axios.get("http://localhost:8087/api/users/", {headers: {Authorization: `Bearer ${accessToken}`}});
+            const response = await axios.get("http://localhost:8087/api/users/?limit=all", {headers: {Authorization: `Bearer ${accessToken}`}});
             setMembers(response.data);
         } catch (error) {
             console.error("Failed to fetch members.");
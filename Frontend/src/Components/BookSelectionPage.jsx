@@ -45,7 +45,7 @@ const BookSelectionPage = () => {
             try {
                 const token = localStorage.getItem("accessToken");
                 const headers = { Authorization: `Bearer ${token}` };
-                const response = await axios.get("http://localhost:8087/api/books/", { headers });
+                const response = await axios.get("http://localhost:8087/api/books/?limit=all", { headers });
                 setBooks(response.data);
             } catch (error) {
                 console.error("Error fetching books: ", error);
@@ -1,5 +1,6 @@
 //This component handles the discussion threads for a specific chapter within a reading group.
 //Users can view, post, and reply to discussions related to the chapter.
+//New posts by other members arrive live over the discussion stream (Server-Sent Events) when the server offers it.
 
 import { useState, useEffect } from "react";
 import { useParams, useNavigate } from "react-router";
@@ -19,6 +20,20 @@ import {
         Send, 
       } from "@mui/icons-material";
  
+//adds a post to the thread tree under its parent, unless it is already there
+export const insertPost = (threads, post) => {
+  const contains = (nodes) => nodes.some((node) => node.id === post.id || contains(node.replies || []));
+  if (contains(threads)) return threads;
+  const node = { ...post, replies: post.replies || [] };
+  if (!post.parent) return [...threads, node];
+  const attach = (nodes) =>
+    nodes.map((thread) =>
+      thread.id === post.parent
+        ? { ...thread, replies: [...(thread.replies || []), node] }
+        : { ...thread, replies: attach(thread.replies || []) }
+    );
+  return attach(threads);
+};
 
 const DiscussionPage = () => {
   //get groupId and chapterId from URL parameters
@@ -58,6 +73,51 @@ const DiscussionPage = () => {
     };
     fetchDetails();
   }, [groupId, chapterId]);
+
+  //subscribe to new posts of the chapter; without a stream (e.g. a WSGI server) the page keeps its loaded threads
+  useEffect(() => {
+    if (typeof EventSource === "undefined") return;
+    let source = null;
+    let lastEventId = null;
+    let closed = false;
+    const connect = async () => {
+      try {
+        //EventSource cannot send headers, so open it with a short-lived stream token
+        const tokenResponse = await axios.post(
+          `http://localhost:8087/api/groups/${groupId}/discussions_by_chapter/stream/token/`,
+          {},
+          { headers: authHeaders }
+        );
+        if (closed) return;
+        const params = new URLSearchParams({
+          chapter_id: chapterId,
+          stream_token: tokenResponse.data.stream_token,
+        });
+        //resume after the last post received when reconnecting
+        if (lastEventId) params.set("cursor", lastEventId);
+        source = new EventSource(
+          `http://localhost:8087/api/groups/${groupId}/discussions_by_chapter/stream/?${params}`
+        );
+        source.addEventListener("discussion", (event) => {
+          lastEventId = event.lastEventId;
+          setDiscussionThreads((prevThreads) => insertPost(prevThreads, JSON.parse(event.data)));
+        });
+        source.onerror = () => {
+          //the browser retries dropped connections itself; a rejected one (expired token) needs a new token
+          if (source.readyState === EventSource.CLOSED && !closed) {
+            setTimeout(connect, 3000);
+          }
+        };
+      } catch (error) {
+        console.error("Discussion stream unavailable: ", error);
+      }
+    };
+    connect();
+    return () => {
+      closed = true;
+      if (source) source.close();
+    };
+  }, [groupId, chapterId]);
  
   //handles adding new post
   const handleAddPost = async () => {
@@ -70,8 +130,8 @@ const DiscussionPage = () => {
         { headers: authHeaders }
       );
 
-      //update discussion threads with new post
-      setDiscussionThreads((prevThreads) => [...prevThreads, response.data]);
+      //update discussion threads with new post (the stream may have delivered it already)
+      setDiscussionThreads((prevThreads) => insertPost(prevThreads, response.data));
 
       //clear input field
       setNewPostContent("");
@@ -94,13 +154,9 @@ const DiscussionPage = () => {
         { headers: authHeaders }
       );
 
-      //update replies in the corresponding thread
+      //update replies in the corresponding thread, at any depth
       setDiscussionThreads((prevThreads) =>
-        prevThreads.map((thread) =>
-          thread.id === parentId
-            ? { ...thread, replies: [...thread.replies, response.data] }
-            : thread
-        )
+        insertPost(prevThreads, { ...response.data, parent: parentId })
       );
 
       //clear reply input field
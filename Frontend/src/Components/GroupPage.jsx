@@ -42,23 +42,15 @@ const GroupPage = () => {
       const token = localStorage.getItem("accessToken");
       const headers = { Authorization: `Bearer ${token}` };
  
-      // Fetch user ID
-      const userResponse = await axios.get("http://localhost:8087/api/user-id/", { headers });
-      setUserId(userResponse.data.userId);
- 
-      // Fetch group details
-      const groupResponse = await axios.get(`http://localhost:8087/api/groups/${groupId}/`, {
+      // Fetch the group, its chapters' reading progress and the user ID in one request
+      const dashboardResponse = await axios.get(`http://localhost:8087/api/groups/${groupId}/dashboard/`, {
         headers,
       });
-      setGroup(groupResponse.data);
- 
-      // Fetch progress details for chapters
-      const chaptersResponse = await axios.get("http://localhost:8087/api/progress/", { headers });
-      const groupProgress = chaptersResponse.data.find(
-        (g) => g.group_id === parseInt(groupId, 10)
-      );
-      if (groupProgress) {
-        setChapters(groupProgress.chapters);
+      const dashboard = dashboardResponse.data;
+      if (dashboard) {
+        setUserId(dashboard.user_id);
+        setGroup(dashboard.group);
+        setChapters(dashboard.chapters);
       }
     } catch (error) {
       console.error("Error fetching progress data:", error);
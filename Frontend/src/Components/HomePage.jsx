@@ -60,17 +60,11 @@ const HomePage = () => {
                 const token = localStorage.getItem("accessToken");
                 const headers = { Authorization: `Bearer ${token}` };
                 
-                //fetch available books
-                const booksResponse = await axios.get("http://localhost:8087/api/books/", { headers });
-                setBooks(booksResponse.data);
- 
-                //fetch available groups
-                const groupsResponse = await axios.get("http://localhost:8087/api/groups/", { headers });
-                setGroups(groupsResponse.data);
-
-                //fetch notifications
-                const notificationResponse = await axios.get("http://localhost:8087/api/chapter-deadline-notifications/", {headers});
-                setNotifications(notificationResponse.data);
+                //fetch available books, available groups and notifications in one request
+                const homeResponse = await axios.get("http://localhost:8087/api/home/", { headers });
+                setBooks(homeResponse.data.books);
+                setGroups(homeResponse.data.groups);
+                setNotifications(homeResponse.data.notifications);
             } catch (error) {
                 console.error("Error fetching data: ", error);
             }
@@ -1,6 +1,6 @@
 //this test file ensures that the DiscussionPageComponent renders correctly, displays discussion threads
-//allows users to post and reply, handles cases with no discussions
-import { render, screen, waitFor, fireEvent } from "@testing-library/react";
+//allows users to post and reply, handles cases with no discussions, and adds posts pushed over the discussion stream
+import { render, screen, waitFor, fireEvent, act } from "@testing-library/react";
 import { BrowserRouter } from "react-router";
 import DiscussionPage from "../Components/DiscussionPage";
 import { useParams } from "react-router";
@@ -126,4 +126,51 @@ describe("DiscussionPage Component", () => {
             expect(screen.getByText("New post added")).toBeInTheDocument();
         });
     });
+
+    //test to check if posts received from the discussion stream are added to their thread once
+    test("adds posts pushed over the discussion stream", async () => {
+        //mocking EventSource, which jsdom does not provide
+        const sources = [];
+        global.EventSource = class {
+            constructor(url) {
+                this.url = url;
+                this.listeners = {};
+                sources.push(this);
+            }
+            addEventListener(type, listener) {
+                this.listeners[type] = listener;
+            }
+            close() {}
+        };
+        global.EventSource.CLOSED = 2;
+        axios.post.mockResolvedValueOnce({ data: { stream_token: "stream-token", expires_in: 60 } });
+        render(
+            <BrowserRouter>
+                <DiscussionPage />
+            </BrowserRouter>
+        );
+        await waitFor(() => {
+            expect(screen.getByText("Alice")).toBeInTheDocument();
+            expect(sources).toHaveLength(1);
+        });
+        expect(sources[0].url).toContain("chapter_id=101");
+        expect(sources[0].url).toContain("stream_token=stream-token");
+        //the same reply pushed twice is shown once
+        const event = {
+            lastEventId: "cursor-1",
+            data: JSON.stringify({
+                id: 3,
+                parent: 1,
+                user: { username: "Carol" },
+                content: "Live reply",
+                created_at: "2025-01-21T16:00:00Z",
+            }),
+        };
+        act(() => sources[0].listeners.discussion(event));
+        act(() => sources[0].listeners.discussion(event));
+        await waitFor(() => {
+            expect(screen.getAllByText("Live reply")).toHaveLength(1);
+        });
+        delete global.EventSource;
+    });
 });
\ No newline at end of file
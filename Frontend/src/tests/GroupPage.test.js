@@ -23,36 +23,29 @@ describe("GroupPage Component", () => {
         useParams.mockReturnValue({ groupId: "1" });
         //mock API responses
         axios.get.mockImplementation((url) => {
-            if (url.includes("/api/groups/1/")) {
+            if (url.includes("/api/groups/1/dashboard/")) {
                 return Promise.resolve({
                     data: {
-                        id: 1,
-                        name: "Test Group",
-                        book: { title: "Test Book", author: "John Doe" },
-                        reading_goals: "Read one chapter per week",
-                        members: [{ id: 1, username: "Alice" }, { id: 2, username: "Bob" }],
-                    },
-                });
-            } else if (url.includes("/api/progress/")) {
-                return Promise.resolve({
-                    data: [
-                        {
-                            group_id: 1,
-                            chapters: [
-                                {
-                                    chapter_id: 101,
-                                    title: "Chapter 1",
-                                    deadline: "2025-02-01",
-                                    read_users: [{ id: 1 }], 
-                                    read_percentage: 50,
-                                },
-                            ],
+                        user_id: 1,
+                        group: {
+                            id: 1,
+                            name: "Test Group",
+                            book: { title: "Test Book", author: "John Doe" },
+                            reading_goals: "Read one chapter per week",
+                            members: [{ id: 1, username: "Alice" }, { id: 2, username: "Bob" }],
                         },
-                    ],
+                        total_members: 2,
+                        chapters: [
+                            {
+                                chapter_id: 101,
+                                title: "Chapter 1",
+                                deadline: "2025-02-01",
+                                read_users: [{ id: 1 }], 
+                                read_percentage: 50,
+                            },
+                        ],
+                    },
                 });
-            } 
-            else if (url.includes("/api/user-id/")) {
-                return Promise.resolve({ data: { userId: 1 } });
             }
             return Promise.reject(new Error("Not found"));
         });